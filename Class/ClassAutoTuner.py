@@ -0,0 +1,286 @@
+import math
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# Modèle du premier ordre avec retard : gain (RPM/PWM), constante de temps et retard (s)
+PlantModel = namedtuple("PlantModel", ["gain", "time_constant", "dead_time"])
+
+# Résultat d'un réglage automatique (gains parallèles du PIDController)
+TuningResult = namedtuple("TuningResult", ["kp", "ki", "kd", "rule", "model", "ultimate_gain", "ultimate_period"])
+
+TUNING_RULES = ("imc", "ziegler-nichols", "cohen-coon")
+
+
+def fit_fopdt(t, y, u_step, theta_points=60, tau_points=60):
+    """
+    Identifie un modèle du premier ordre avec retard sur une réponse indicielle.
+
+    Pour chaque couple (retard, constante de temps) d'une grille, le gain optimal
+    s'obtient par moindres carrés linéaires ; toute la grille est évaluée d'un
+    coup avec NumPy, puis une seconde grille plus fine est centrée sur le meilleur
+    couple.
+
+    Args:
+        t: Instants depuis l'échelon (s).
+        y: Variation de vitesse depuis l'état initial (RPM).
+        u_step: Amplitude de l'échelon de PWM.
+        theta_points: Taille de la grille sur le retard.
+        tau_points: Taille de la grille sur la constante de temps.
+
+    Returns:
+        Un PlantModel.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    duration = t[-1] - t[0]
+    dt = np.median(np.diff(t))
+    thetas = np.linspace(0.0, 0.5 * duration, theta_points)
+    taus = np.geomspace(max(dt, 1e-4), 2 * duration, tau_points)
+
+    for _ in range(2):
+        elapsed = t[None, None, :] - thetas[:, None, None]
+        basis = np.where(elapsed > 0, 1 - np.exp(-np.maximum(elapsed, 0) / taus[None, :, None]), 0.0) * u_step
+        norm = np.einsum("ijk,ijk->ij", basis, basis)
+        gains = np.einsum("ijk,k->ij", basis, y) / np.where(norm > 0, norm, np.inf)
+        residuals = np.einsum("ijk,ijk->ij", basis * gains[:, :, None] - y, basis * gains[:, :, None] - y)
+        i, j = np.unravel_index(np.argmin(residuals), residuals.shape)
+        best = PlantModel(float(gains[i, j]), float(taus[j]), float(thetas[i]))
+
+        # Grille affinée autour du meilleur couple
+        theta_step = thetas[1] - thetas[0]
+        thetas = np.linspace(max(best.dead_time - theta_step, 0.0), best.dead_time + theta_step, theta_points)
+        taus = np.geomspace(best.time_constant / 1.5, best.time_constant * 1.5, tau_points)
+    return best
+
+
+def model_from_ultimate(gain, ultimate_gain, ultimate_period):
+    """
+    Modèle du premier ordre avec retard déduit du point critique (essai au relais) et du gain statique.
+    """
+    product = gain * ultimate_gain
+    if product <= 1:
+        raise ValueError("Point critique incohérent avec le gain statique (K * Ku <= 1).")
+    omega = 2 * math.pi / ultimate_period
+    tau = math.sqrt(product ** 2 - 1) / omega
+    theta = (math.pi - math.atan(omega * tau)) / omega
+    return PlantModel(gain, tau, theta)
+
+
+def compute_gains(model, rule="imc", ultimate=None, closed_loop_time=None, min_dead_time=1e-3):
+    """
+    Calcule les gains (kp, ki, kd) du PID parallèle selon une règle de réglage.
+
+    Args:
+        model: PlantModel identifié.
+        rule: "imc", "ziegler-nichols" ou "cohen-coon".
+        ultimate: (Ku, Tu) issus d'un essai au relais ; Ziegler-Nichols utilise
+            alors la méthode du point critique.
+        closed_loop_time: Constante de temps en boucle fermée visée pour l'IMC
+            (par défaut max(0.8 retard, constante de temps / 2)).
+        min_dead_time: Retard minimal pris en compte (évite des gains infinis).
+
+    Returns:
+        Un tuple (kp, ki, kd).
+    """
+    k, tau = model.gain, model.time_constant
+    theta = max(model.dead_time, min_dead_time)
+
+    if rule == "ziegler-nichols":
+        if ultimate is not None:
+            ku, tu = ultimate
+            kp, ti, td = 0.6 * ku, tu / 2, tu / 8
+        else:
+            kp, ti, td = 1.2 * tau / (k * theta), 2 * theta, 0.5 * theta
+    elif rule == "cohen-coon":
+        ratio = theta / tau
+        kp = (1 / k) * (tau / theta) * (4 / 3 + ratio / 4)
+        ti = theta * (32 + 6 * ratio) / (13 + 8 * ratio)
+        td = 4 * theta / (11 + 2 * ratio)
+    elif rule == "imc":
+        lam = closed_loop_time if closed_loop_time is not None else max(0.8 * theta, tau / 2)
+        kp = (tau + theta / 2) / (k * (lam + theta / 2))
+        ti = tau + theta / 2
+        td = tau * theta / (2 * tau + theta)
+    else:
+        raise ValueError(f"Règle de réglage inconnue : {rule}")
+    return kp, kp / ti, kp * td
+
+
+class AutoTuner:
+    def __init__(self, motor, measure=None, wait=None, sample_rate=100.0):
+        """
+        Réglage automatique du PID de vitesse par essai indiciel ou au relais.
+
+        Les essais pilotent le moteur directement en PWM (Motor.start /
+        Motor.apply_pwm), mesurent la vitesse à fréquence fixe puis identifient
+        un modèle du premier ordre avec retard.
+
+        Args:
+            motor: Instance de Motor (carte réelle ou simulée).
+            measure: Fonction sans argument retournant la vitesse (RPM) ; par
+                défaut Motor.estimate_speed.
+            wait: Fonction d'attente prenant une durée en secondes ; par défaut
+                board.advance pour une carte simulée en temps virtuel, sinon time.sleep.
+            sample_rate: Fréquence d'échantillonnage des essais en Hz.
+        """
+        self.motor = motor
+        self.measure = measure if measure is not None else motor.estimate_speed
+        board = motor.board
+        if wait is None:
+            virtual = hasattr(board, "advance") and not getattr(board, "realtime", True)
+            wait = board.advance if virtual else time.sleep
+        self.wait = wait
+        self.sample_rate = sample_rate
+
+    def _record(self, duration, command=None, until=None):
+        """
+        Échantillonne la vitesse pendant `duration` secondes.
+
+        Args:
+            duration: Durée maximale en secondes.
+            command: Fonction (vitesse) -> PWM appelée à chaque échantillon, ou None.
+            until: Fonction sans argument ; l'essai s'arrête dès qu'elle retourne True.
+
+        Returns:
+            (t, y, u) sous forme de tableaux NumPy.
+        """
+        period = 1.0 / self.sample_rate
+        n = max(1, int(round(duration * self.sample_rate)))
+        t = np.arange(1, n + 1) * period
+        y = np.empty(n)
+        u = np.empty(n)
+        for i in range(n):
+            self.wait(period)
+            y[i] = self.measure()
+            if command is not None:
+                self.motor.apply_pwm(command(y[i]))
+            u[i] = self.motor.pwm
+            if until is not None and until():
+                return t[:i + 1], y[:i + 1], u[:i + 1]
+        return t, y, u
+
+    def _settle(self, pwm, settle_time):
+        self.motor.apply_pwm(pwm)
+        _, y, _ = self._record(settle_time)
+        return float(np.mean(y[len(y) // 2:]))
+
+    def step_test(self, pwm_low=60, pwm_high=160, settle_time=1.5, duration=2.0):
+        """
+        Essai en boucle ouverte : stabilisation à pwm_low puis échelon vers pwm_high.
+
+        Returns:
+            (t, dy, du) : temps depuis l'échelon, variation de vitesse et de PWM.
+        """
+        self.motor.stop_control()
+        self.motor.start(pwm_low)
+        y0 = self._settle(pwm_low, settle_time)
+        self.motor.apply_pwm(pwm_high)
+        t, y, _ = self._record(duration)
+        return t, y - y0, pwm_high - pwm_low
+
+    def relay_test(self, bias=128, amplitude=60, cycles=6, settle_time=1.5, timeout=20.0, hysteresis=20.0):
+        """
+        Essai au relais (Åström-Hägglund) autour du point de fonctionnement `bias`.
+
+        Le gain statique est d'abord mesuré entre bias - amplitude/2 et
+        bias + amplitude/2, puis le relais (avec hystérésis en RPM) entretient une
+        oscillation dont on mesure l'amplitude et la période.
+
+        Returns:
+            (K, Ku, Tu, t, y, u) : gain statique, gain et période critiques et
+            enregistrement de l'essai.
+        """
+        self.motor.stop_control()
+        self.motor.start(int(bias - amplitude / 2))
+        y_low = self._settle(int(bias - amplitude / 2), settle_time)
+        y_high = self._settle(int(bias + amplitude / 2), settle_time)
+        gain = (y_high - y_low) / amplitude
+        y0 = self._settle(bias, settle_time)
+
+        state = {"high": True, "switches": 0}
+
+        def relay(speed):
+            high = state["high"]
+            if speed > y0 + hysteresis:
+                high = False
+            elif speed < y0 - hysteresis:
+                high = True
+            state["switches"] += high != state["high"]
+            state["high"] = high
+            return bias + amplitude if high else bias - amplitude
+
+        # Deux commutations par période, plus les premières (régime transitoire)
+        t, y, u = self._record(timeout, command=relay, until=lambda: state["switches"] >= 2 * cycles + 4)
+
+        # Passages ascendants par le point de fonctionnement
+        crossings = np.flatnonzero((y[:-1] < y0) & (y[1:] >= y0))
+        if len(crossings) < 3:
+            raise RuntimeError("Pas d'oscillation entretenue pendant l'essai au relais.")
+        crossings = crossings[-(cycles + 1):]
+        period = float(np.mean(np.diff(t[crossings])))
+        window = y[crossings[0]:crossings[-1]]
+        oscillation = (window.max() - window.min()) / 2
+        ultimate_gain = 4 * amplitude / (math.pi * math.sqrt(max(oscillation ** 2 - hysteresis ** 2, 1e-9)))
+        return gain, ultimate_gain, period, t, y, u
+
+    def tune(self, method="step", rule="imc", **kwargs):
+        """
+        Lance un essai, identifie le modèle et calcule les gains.
+
+        Args:
+            method: "step" (échelon en boucle ouverte), "relay" ou "frequency"
+                (réponse fréquentielle en cache, voir ClassFrequencyResponse).
+            rule: Règle de réglage (voir TUNING_RULES).
+            kwargs: Options de step_test, relay_test ou FrequencyResponseTest.cached.
+
+        Returns:
+            Un TuningResult.
+        """
+        try:
+            if method == "step":
+                t, dy, du = self.step_test(**kwargs)
+                model = fit_fopdt(t, dy, du)
+                ultimate = None
+            elif method == "relay":
+                gain, ku, tu, *_ = self.relay_test(**kwargs)
+                model = model_from_ultimate(gain, ku, tu)
+                ultimate = (ku, tu)
+            elif method == "frequency":
+                # Réponse fréquentielle en boucle ouverte, mesurée une fois puis reprise du cache
+                from Class.ClassFrequencyResponse import FrequencyResponseTest, fit_fopdt_frequency
+
+                test = FrequencyResponseTest(self.motor, self.measure, sample_rate=self.sample_rate,
+                                             wait=None if self.wait is time.sleep else self.wait)
+                model = fit_fopdt_frequency(test.cached("open", **kwargs))
+                ultimate = None
+            else:
+                raise ValueError(f"Méthode d'essai inconnue : {method}")
+        finally:
+            self.motor.stop()
+
+        kp, ki, kd = compute_gains(model, rule, ultimate=ultimate, min_dead_time=1.0 / self.sample_rate)
+        print(f"Modèle identifié : K={model.gain:.3f} RPM/PWM, tau={model.time_constant:.3f} s, "
+              f"retard={model.dead_time:.3f} s -> P={kp:.4f}, I={ki:.4f}, D={kd:.4f} ({rule})")
+        return TuningResult(kp, ki, kd, rule, model,
+                            ultimate[0] if ultimate else None, ultimate[1] if ultimate else None)
+
+
+def simulated_tuner(model=None, sample_rate=100.0, **board_kwargs):
+    """
+    AutoTuner sur un moteur simulé en temps virtuel (plus rapide que le temps réel).
+
+    Args:
+        model: DCMotorModel à utiliser (modèle par défaut si None).
+        sample_rate: Fréquence d'échantillonnage des essais en Hz.
+        board_kwargs: Options de SimulatedTelemetrix.
+    """
+    from Class.ClassMotor import Motor
+    from Class.ClassSimulatedBoard import SimulatedTelemetrix
+
+    board = SimulatedTelemetrix(model=model, realtime=False, **board_kwargs)
+    motor = Motor(board, pwm_pin=board.pwm_pin, dir_pin=board.dir_pin,
+                  encoder_pin_a=board.encoder_pin_a, encoder_pin_b=board.encoder_pin_b,
+                  ticks_per_revolution=board.ticks_per_revolution)
+    return AutoTuner(motor, sample_rate=sample_rate)
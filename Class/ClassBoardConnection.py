@@ -0,0 +1,66 @@
+import json
+import time
+
+from Class.ClassSimulatedBoard import open_board, simulation_requested
+
+CONNECTION_CACHE = "board_connection.json"  # Dernier port / identifiant d'Arduino connus
+
+
+def load_connection_cache(path=CONNECTION_CACHE):
+    """
+    Lit la dernière connexion réussie (dictionnaire vide si aucune ou illisible).
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_connection_cache(board, path=CONNECTION_CACHE):
+    """
+    Mémorise le port série et l'identifiant de l'Arduino connecté.
+    """
+    port = getattr(getattr(board, "serial_port", None), "port", None) or getattr(board, "com_port", None)
+    if port is None:
+        return
+    try:
+        with open(path, "w") as f:
+            json.dump({"com_port": port, "arduino_instance_id": getattr(board, "arduino_instance_id", 1),
+                       "connected_at": time.strftime("%Y-%m-%d %H:%M:%S")}, f, indent=1)
+    except OSError as e:
+        print(f"Erreur lors de l'enregistrement de la connexion : {e}")
+
+
+def connect_board(simulated=None, use_cache=True, cache_path=CONNECTION_CACHE, **kwargs):
+    """
+    Ouvre la carte en essayant d'abord le dernier port connu, ce qui évite
+    d'ouvrir tous les ports série pour y chercher l'Arduino. En cas d'échec,
+    la recherche automatique de telemetrix prend le relais et le port trouvé
+    est mémorisé.
+
+    Args:
+        simulated: True pour la carte simulée (voir open_board).
+        use_cache: False pour ignorer le port mémorisé.
+        cache_path: Fichier de la dernière connexion.
+        kwargs: Arguments transmis au constructeur de la carte.
+
+    Returns:
+        Une instance de Telemetrix ou de SimulatedTelemetrix.
+    """
+    if simulation_requested(simulated):
+        return open_board(True, **kwargs)
+
+    cache = load_connection_cache(cache_path) if use_cache and "com_port" not in kwargs else {}
+    if cache.get("com_port"):
+        try:
+            options = dict(kwargs, com_port=cache["com_port"])
+            options.setdefault("arduino_instance_id", cache.get("arduino_instance_id", 1))
+            return open_board(False, **options)
+        except Exception as e:
+            print(f"Port mémorisé {cache['com_port']} indisponible ({e}) : recherche de la carte...")
+
+    board = open_board(False, **kwargs)
+    save_connection_cache(board, cache_path)
+    return board
+
@@ -0,0 +1,420 @@
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from Class.ClassMetrics import BATCH_BUCKETS, Histogram
+from Class.ClassMotor import Motor
+from Class.ClassOutputStage import emergency_write, telemetrix_frame
+from Class.ClassPidController import ControlScheduler
+
+# Taille d'une trame telemetrix (octet de longueur compris) par type de commande
+COMMAND_BYTES = {"analog": 5, "digital": 4}
+SERIAL_BAUD_RATE = 115200  # Débit de la liaison série de telemetrix
+
+# Broches des axes de démonstration (PWM, direction, encodeur A, encodeur B)
+MOTOR_PINS = [dict(pwm_pin=3, dir_pin=12, encoder_pin_a=2, encoder_pin_b=7),
+              dict(pwm_pin=5, dir_pin=13, encoder_pin_a=4, encoder_pin_b=8),
+              dict(pwm_pin=6, dir_pin=11, encoder_pin_a=14, encoder_pin_b=15),
+              dict(pwm_pin=9, dir_pin=10, encoder_pin_a=16, encoder_pin_b=17)]
+
+
+class PinRegistry:
+    def __init__(self):
+        """
+        Registre d'attribution des broches d'une carte : chaque broche a au plus un propriétaire.
+        """
+        self._pins = {}  # broche -> (propriétaire, rôle)
+        self._lock = threading.Lock()
+
+    def allocate(self, owner, pins):
+        """
+        Réserve plusieurs broches d'un coup (toutes ou aucune).
+
+        Args:
+            owner: Nom du propriétaire (par exemple le nom du moteur).
+            pins: Dictionnaire rôle -> broche ; les broches None sont ignorées.
+
+        Raises:
+            ValueError: Si une broche est déjà attribuée ou demandée deux fois.
+        """
+        wanted = {role: pin for role, pin in pins.items() if pin is not None}
+        with self._lock:
+            seen = {}
+            for role, pin in wanted.items():
+                if pin in self._pins:
+                    other, other_role = self._pins[pin]
+                    raise ValueError(f"Broche {pin} ({role} de {owner}) déjà attribuée : {other_role} de {other}.")
+                if pin in seen:
+                    raise ValueError(f"Broche {pin} utilisée deux fois par {owner} ({seen[pin]} et {role}).")
+                seen[pin] = role
+            for role, pin in wanted.items():
+                self._pins[pin] = (owner, role)
+
+    def release(self, owner):
+        """
+        Libère toutes les broches d'un propriétaire.
+        """
+        with self._lock:
+            self._pins = {pin: entry for pin, entry in self._pins.items() if entry[0] != owner}
+
+    def owner(self, pin):
+        """
+        Propriétaire d'une broche, ou None si elle est libre.
+        """
+        entry = self._pins.get(pin)
+        return entry[0] if entry is not None else None
+
+    def table(self):
+        """
+        Attribution courante : liste triée de (broche, propriétaire, rôle).
+        """
+        return sorted((pin, owner, role) for pin, (owner, role) in self._pins.items())
+
+
+class BoardManager:
+    def __init__(self, board, rate_hz=500.0, baud_rate=SERIAL_BAUD_RATE, history=5000):
+        """
+        Partage d'une carte (une connexion telemetrix) entre plusieurs moteurs.
+
+        Le gestionnaire s'intercale entre les Motor et la carte : il en reprend
+        l'API (configuration des broches, écritures, horloge), vérifie
+        l'attribution des broches et regroupe les écritures. Les boucles PID de
+        tous les moteurs sont cadencées par un ControlScheduler commun : les
+        commandes PWM et direction d'une même période partent en une seule
+        écriture série. Les débits et latences d'écriture sont mesurés.
+
+        Args:
+            board: Instance de Telemetrix ou de SimulatedTelemetrix.
+            rate_hz: Fréquence commune des boucles de régulation en Hz.
+            baud_rate: Débit de la liaison série (pour le taux d'occupation).
+            history: Nombre d'écritures conservées pour les statistiques.
+        """
+        self.board = board
+        self.baud_rate = baud_rate
+        self.registry = PinRegistry()
+        self.motors = {}
+        self.clock = getattr(board, "clock", time.time)
+        self.scheduler = ControlScheduler(rate_hz, batch=self.batch)
+
+        self._batch = threading.local()
+        self._write_lock = threading.Lock()
+        self._loop_back_callbacks = []
+        self.commands_sent = 0
+        self.serial_writes = 0
+        self.bytes_sent = 0
+        self._writes = deque(maxlen=history)  # (instant, octets, commandes, latence)
+        self._start_time = time.perf_counter()
+        self.latency_histogram = Histogram()
+        self.batch_histogram = Histogram(BATCH_BUCKETS)  # Commandes par écriture série
+        self.cpu_time = 0.0  # Temps CPU cumulé des écritures (secondes)
+        self.write_errors = 0  # Écritures ayant échoué
+        self.last_error = None  # Dernière exception d'écriture
+        self.write_started = None  # Début de l'écriture série en cours (None si aucune)
+        self.emergency_writes = 0  # Écritures d'arrêt d'urgence (hors verrou d'écriture)
+
+    # === Moteurs ===
+
+    def add_motor(self, name=None, pwm_pin=3, dir_pin=12, encoder_pin_a=2, encoder_pin_b=None,
+                  ticks_per_revolution=12, shared_loop=True, **kwargs):
+        """
+        Crée un Motor sur la carte partagée après réservation de ses broches.
+
+        Sur la carte simulée, un modèle de moteur est branché sur ces broches.
+
+        Args:
+            name: Nom du moteur (M1, M2... si None).
+            pwm_pin, dir_pin, encoder_pin_a, encoder_pin_b, ticks_per_revolution: Voir Motor.
+            shared_loop: True pour cadencer sa boucle PID par le scheduler commun
+                (écritures regroupées), False pour un thread propre.
+            kwargs: Autres arguments de Motor (telemetry...).
+
+        Returns:
+            L'instance de Motor.
+
+        Raises:
+            ValueError: Si le nom ou une broche est déjà utilisé.
+        """
+        name = name if name is not None else f"M{len(self.motors) + 1}"
+        if name in self.motors:
+            raise ValueError(f"Un moteur nommé {name} existe déjà.")
+        self.registry.allocate(name, {"pwm": pwm_pin, "direction": dir_pin,
+                                      "encodeur A": encoder_pin_a, "encodeur B": encoder_pin_b})
+        try:
+            simulate_motor = getattr(self.board, "simulate_motor", None)
+            if simulate_motor is not None:
+                simulate_motor(pwm_pin, dir_pin, (encoder_pin_a, encoder_pin_b), ticks_per_revolution)
+            motor = Motor(self, pwm_pin, dir_pin, encoder_pin_a, encoder_pin_b, ticks_per_revolution,
+                          scheduler=self.scheduler if shared_loop else None, **kwargs)
+        except Exception:
+            self.registry.release(name)
+            raise
+        motor.name = name
+        self.motors[name] = motor
+        return motor
+
+    def remove_motor(self, name):
+        """
+        Arrête un moteur et libère ses broches.
+        """
+        motor = self.motors.pop(name)
+        motor.stop()
+        self.registry.release(name)
+
+    def stop_all(self):
+        """
+        Arrête tous les moteurs ; les commandes d'arrêt partent en un seul lot.
+        """
+        with self.batch():
+            for motor in self.motors.values():
+                motor.stop()
+
+    def shutdown(self):
+        try:
+            self.stop_all()
+        finally:
+            self.board.shutdown()
+
+    # === API de la carte utilisée par Motor ===
+
+    def set_pin_mode_digital_output(self, pin_number):
+        self.board.set_pin_mode_digital_output(pin_number)
+
+    def set_pin_mode_analog_output(self, pin_number):
+        self.board.set_pin_mode_analog_output(pin_number)
+
+    def set_pin_mode_digital_input(self, pin_number, callback=None):
+        self.board.set_pin_mode_digital_input(pin_number, callback=callback)
+
+    def digital_write(self, pin, value):
+        self._queue("digital", pin, value)
+
+    def analog_write(self, pin, value):
+        self._queue("analog", pin, value)
+
+    # === Écritures groupées ===
+
+    def loop_back(self, start_character, callback=None):
+        """
+        Demande un renvoi à la carte ; la réponse est transmise à tous les
+        demandeurs (telemetrix ne garde qu'un seul callback de renvoi).
+        """
+        if callback is not None and callback not in self._loop_back_callbacks:
+            self._loop_back_callbacks.append(callback)
+        with self._write_lock:
+            self.board.loop_back(start_character, self._dispatch_loop_back)
+
+    def _dispatch_loop_back(self, data):
+        for callback in self._loop_back_callbacks:
+            callback(data)
+
+    @contextmanager
+    def batch(self):
+        """
+        Regroupe les écritures du thread courant : elles partent en une seule
+        écriture série à la sortie du bloc (la dernière valeur par broche).
+        Les blocs imbriqués sont envoyés à la sortie du plus externe.
+        """
+        state = self._batch
+        depth = getattr(state, "depth", 0)
+        if depth == 0:
+            state.pending = {}
+        state.depth = depth + 1
+        try:
+            yield
+        finally:
+            state.depth = depth
+            if depth == 0:
+                pending, state.pending = state.pending, None
+                if pending:
+                    self._send([(kind, pin, value) for pin, (kind, value) in pending.items()])
+
+    def emergency_write(self, commands):
+        """
+        Arrêt d'urgence : envoie les commandes (type, broche, valeur) à la carte
+        sans prendre le verrou d'écriture, tenu par une écriture groupée
+        peut-être bloquée (voir la fonction emergency_write de ClassOutputStage).
+        """
+        emergency_write(self.board, commands)
+        self.emergency_writes += 1
+
+    def _queue(self, kind, pin, value):
+        state = self._batch
+        if getattr(state, "depth", 0) > 0:
+            # Ordre de première écriture conservé, dernière valeur retenue
+            state.pending[pin] = (kind, value)
+        else:
+            self._send([(kind, pin, value)])
+
+    def _send(self, commands):
+        """
+        Envoie des commandes (type, broche, valeur) en une seule écriture.
+
+        Raises:
+            Exception: L'erreur de la carte ou du port série, comptée dans
+                `write_errors` et conservée dans `last_error`.
+        """
+        board = self.board
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            with self._write_lock:
+                size = sum(COMMAND_BYTES[kind] for kind, _, _ in commands)
+                # Suivi par le chien de garde : une écriture groupée bloquée est visible ici
+                self.write_started = time.perf_counter()
+                try:
+                    if len(commands) == 1:
+                        kind, pin, value = commands[0]
+                        getattr(board, f"{kind}_write")(pin, value)
+                    elif hasattr(board, "write_batch"):
+                        board.write_batch(commands)
+                    elif getattr(board, "serial_port", None) is not None:
+                        size = self._write_telemetrix(commands)
+                    else:
+                        for kind, pin, value in commands:
+                            getattr(board, f"{kind}_write")(pin, value)
+                except Exception as e:
+                    self.write_errors += 1
+                    self.last_error = e
+                    raise
+                finally:
+                    self.write_started = None
+                latency = time.perf_counter() - start
+                self.commands_sent += len(commands)
+                self.serial_writes += 1
+                self.bytes_sent += size
+                self._writes.append((start, size, len(commands), latency))
+                self.latency_histogram.observe(latency)
+                self.batch_histogram.observe(len(commands))
+                self.cpu_time += time.thread_time() - cpu_start
+        except Exception as e:
+            # Hors du verrou d'écriture : un étage de sortie peut l'attendre en tenant le sien
+            self._invalidate(commands)
+            print(f"Erreur lors de l'écriture sur la carte : {e}")
+            raise
+
+    def _invalidate(self, commands):
+        # Écritures d'un lot en échec : les étages de sortie des moteurs les
+        # croyaient déjà en place (elles ont été mises en file, pas écrites)
+        pins = {pin for _, pin, _ in commands}
+        for motor in self.motors.values():
+            for pin in pins & {motor.pwm_pin, motor.dir_pin}:
+                motor.output.invalidate(pin)
+
+    def _write_telemetrix(self, commands):
+        """
+        telemetrix n'offre pas d'écriture groupée : les trames sont construites
+        ici et écrites d'un bloc sur le port série, sans toucher au port de la
+        carte (partagé avec son thread de lecture et son arrêt).
+
+        Returns:
+            Le nombre d'octets écrits.
+        """
+        port = self.board.serial_port
+        if port is None:
+            raise RuntimeError("Port série de la carte fermé.")
+        payload = b"".join(telemetrix_frame(kind, pin, value) for kind, pin, value in commands)
+        port.write(payload)
+        return len(payload)
+
+    # === Mesures ===
+
+    def reset_stats(self):
+        with self._write_lock:
+            self.commands_sent = 0
+            self.serial_writes = 0
+            self.bytes_sent = 0
+            self._writes.clear()
+            self._start_time = time.perf_counter()
+            self.latency_histogram.reset()
+            self.batch_histogram.reset()
+
+    def stats(self, window=1.0):
+        """
+        Débit et latence de la liaison série.
+
+        Args:
+            window: Durée (s) sur laquelle le débit est calculé.
+
+        Returns:
+            Un dictionnaire : nombre de moteurs, commandes, écritures et octets
+            envoyés, commandes par écriture, débit (octets/s) et taux
+            d'occupation de la liaison sur la fenêtre, latence moyenne et
+            maximale d'une écriture (s), et statistiques du scheduler commun.
+        """
+        with self._write_lock:
+            writes = list(self._writes)
+            commands, serial_writes, sent = self.commands_sent, self.serial_writes, self.bytes_sent
+        now = time.perf_counter()
+        span = min(window, now - self._start_time)
+        recent = [w for w in writes if w[0] >= now - window]
+        bytes_per_second = sum(w[1] for w in recent) / span if span > 0 else 0.0
+        latencies = [w[3] for w in writes]
+        return {"motors": len(self.motors), "commands": commands, "serial_writes": serial_writes,
+                "bytes": sent, "commands_per_write": commands / serial_writes if serial_writes else 0.0,
+                "bytes_per_second": bytes_per_second,
+                "writes_per_second": len(recent) / span if span > 0 else 0.0,
+                "utilisation": bytes_per_second * 10 / self.baud_rate,  # 10 bits par octet (8N1)
+                "mean_latency": sum(latencies) / len(latencies) if latencies else 0.0,
+                "max_latency": max(latencies) if latencies else 0.0, "write_errors": self.write_errors,
+                "emergency_writes": self.emergency_writes, "loop": self.scheduler.stats()}
+
+
+    def register_metrics(self, registry):
+        """
+        Déclare les mesures de la liaison série partagée dans un MetricsRegistry.
+        """
+        registry.register("serial_write_latency_seconds", "histogram",
+                          "Durée d'une écriture série (lot de commandes).", lambda: self.latency_histogram)
+        registry.register("serial_commands_per_write", "histogram",
+                          "Commandes regroupées par écriture série.", lambda: self.batch_histogram)
+        registry.register("serial_bytes_total", "counter", "Octets envoyés à la carte.",
+                          lambda: self.bytes_sent)
+        registry.register("serial_writes_total", "counter", "Écritures série.", lambda: self.serial_writes)
+        registry.register("serial_write_errors_total", "counter", "Écritures série en échec.",
+                          lambda: self.write_errors)
+        registry.register("cpu_seconds_total", "counter", "Temps CPU par sous-système.",
+                          lambda: self.cpu_time, subsystem="serial")
+        registry.register("scheduler_overruns_total", "counter",
+                          "Dépassements d'échéance du scheduler commun.", lambda: self.scheduler.overruns)
+
+
+def main(simulated=None, max_motors=len(MOTOR_PINS), duration=3.0):
+    """
+    Mesure le débit série et la latence en ajoutant les moteurs un par un
+    (régulation à 3000 RPM sur chacun).
+
+    Args:
+        simulated: True pour utiliser la carte simulée (voir open_board).
+        max_motors: Nombre maximal de moteurs ajoutés.
+        duration: Durée de mesure pour chaque nombre de moteurs en secondes.
+    """
+    from Class.ClassSimulatedBoard import SIMULATED_GAINS, open_board
+
+    board = open_board(simulated)
+    manager = BoardManager(board)
+    try:
+        print(f"{'moteurs':>8} {'écritures/s':>12} {'cmd/écriture':>13} {'octets/s':>9} "
+              f"{'occupation':>11} {'latence':>10} {'calcul':>10} {'gigue':>9}")
+        for pins in MOTOR_PINS[:max_motors]:
+            motor = manager.add_motor(**pins)
+            motor.set_pid_parameters(*SIMULATED_GAINS)
+            motor.start_control(motor.estimate_speed, setpoint=3000)
+            time.sleep(0.5)
+            manager.reset_stats()
+            time.sleep(duration)
+            stats = manager.stats()
+            loop = stats["loop"]
+            print(f"{stats['motors']:>8} {stats['writes_per_second']:>12.0f} {stats['commands_per_write']:>13.2f} "
+                  f"{stats['bytes_per_second']:>9.0f} {stats['utilisation'] * 100:>10.1f}% "
+                  f"{stats['mean_latency'] * 1e6:>8.0f}µs {loop['mean_compute'] * 1e6:>8.0f}µs "
+                  f"{loop['jitter'] * 1e6:>7.0f}µs")
+        for name, motor in manager.motors.items():
+            print(f"{name} : {motor.speed_estimate:.0f} RPM")
+    finally:
+        manager.shutdown()
+
+
+if __name__ == "__main__":
+    main(simulated=True if "--simulate" in sys.argv else None)
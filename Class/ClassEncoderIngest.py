@@ -0,0 +1,325 @@
+import threading
+import time
+from collections import deque
+from itertools import repeat, starmap
+
+import numpy as np
+
+# Décodage en quadrature : QUADRATURE_TABLE[(ancien état << 2) | nouvel état], avec état = (A << 1) | B.
+# Sens positif : 00 -> 10 -> 11 -> 01 -> 00 (A en avance sur B). Les transitions invalides valent 0.
+QUADRATURE_TABLE = np.array([0, -1, 1, 0,
+                             1, 0, 0, -1,
+                             -1, 0, 0, 1,
+                             0, 1, -1, 0], dtype=np.int64)
+
+# Nombre maximal d'événements en attente (environ 10 s à la vitesse maximale d'un encodeur de 48 comptes par tour)
+MAX_PENDING_EVENTS = 65536
+
+
+class EncoderEventQueue:
+    def __init__(self, pin_a, pin_b=None, history=5, max_pending=MAX_PENDING_EVENTS):
+        """
+        File d'événements bruts de l'encodeur traitée par lots avec NumPy.
+
+        Le callback enregistré auprès de telemetrix est directement `push`
+        (deque.append) : chaque front ne coûte qu'un ajout dans la file, sans
+        calcul Python. Le décodage (quadrature, position signée, horodatage des
+        fronts) est fait de manière vectorisée lors de `process`, appelé par les
+        lecteurs. Lectures et remises à zéro sont atomiques.
+
+        La file est bornée : si personne ne la traite (invite de commandes en
+        attente d'une saisie), les plus anciens événements sont écrasés et
+        comptés dans `dropped_edges`. `start_draining` la vide périodiquement.
+
+        Args:
+            pin_a: Broche du canal A.
+            pin_b: Broche du canal B (None : canal A seul, sans sens de rotation).
+            history: Nombre de derniers fronts (position, horodatage) conservés.
+            max_pending: Nombre maximal d'événements en attente.
+        """
+        self.pin_a = pin_a
+        self.pin_b = pin_b
+        self._events = deque(maxlen=max_pending)
+        self.push = self._events.append
+        self._lock = threading.Lock()
+        self._drain_stop = None
+        self._drain_thread = None
+
+        self._a = 0
+        self._b = 0
+        self._state = 0
+        self._position = 0
+        self._offset = 0
+        self.direction = 0
+        self.last_edge = (0, None)  # (position, horodatage) du dernier front
+        self.edge_history = deque(maxlen=history)
+        self._last_time = None  # Horodatage du dernier événement traité
+
+        self.edges_total = 0
+        self.dropped_edges = 0
+        self.overflows = 0  # Lots traités alors que la file était pleine
+        self.batches = 0
+        self.max_batch = 0
+        self.cpu_time = 0.0  # Temps CPU cumulé du décodage (secondes)
+
+    def pending(self):
+        """
+        Nombre d'événements en attente de traitement.
+        """
+        return len(self._events)
+
+    def process(self):
+        """
+        Décode tous les événements en attente.
+
+        Returns:
+            Le nombre d'événements traités.
+        """
+        with self._lock:
+            return self._process()
+
+    def _process(self):
+        events = self._events
+        n = len(events)
+        if n == 0:
+            return 0
+        cpu_start = time.thread_time()
+        full = n == events.maxlen
+        # Retrait des n plus anciens événements sans boucle Python (les ajouts continuent à droite)
+        data = np.array(list(starmap(events.popleft, repeat((), n))), dtype=np.float64)
+        pins = data[:, 1]
+        values = data[:, 2].astype(np.int64)
+        times = data[:, 3]
+        index = np.arange(n)
+
+        if full:
+            # File pleine : des événements ont été écrasés depuis le lot précédent,
+            # leur nombre est estimé d'après le débit observé dans ce lot
+            self.overflows += 1
+            span = times[-1] - times[0]
+            if self._last_time is not None and span > 0:
+                self.dropped_edges += max(int(round((times[0] - self._last_time) * (n - 1) / span)), 0)
+        self._last_time = float(times[-1])
+
+        # Niveau courant de chaque canal après chaque événement (report du dernier connu)
+        is_a = pins == self.pin_a
+        last_a = np.maximum.accumulate(np.where(is_a, index, -1))
+        a = np.where(last_a >= 0, values[last_a], self._a)
+        previous_a = np.concatenate(([self._a], a[:-1]))
+
+        if self.pin_b is None:
+            # Canal A seul : chaque front compte pour une demi-impulsion (2 comptes)
+            changed = is_a & (a != previous_a)
+            delta = np.where(changed, 2, 0)
+            repeated = is_a & ~changed
+        else:
+            is_b = pins == self.pin_b
+            last_b = np.maximum.accumulate(np.where(is_b, index, -1))
+            b = np.where(last_b >= 0, values[last_b], self._b)
+            state = (a << 1) | b
+            previous = np.concatenate(([self._state], state[:-1]))
+            delta = QUADRATURE_TABLE[(previous << 2) | state]
+            # Un niveau identique au précédent sur la même broche signale des fronts manqués
+            repeated = (is_a | is_b) & (state == previous)
+            self._b = int(b[-1])
+            self._state = int(state[-1])
+        self._a = int(a[-1])
+
+        positions = self._position + np.cumsum(delta)
+        self._position = int(positions[-1])
+        edges = np.flatnonzero(delta)
+        if len(edges):
+            for i in edges[-self.edge_history.maxlen:]:
+                self.edge_history.append((int(positions[i]), float(times[i])))
+            self.last_edge = self.edge_history[-1]
+            self.direction = 1 if delta[edges[-1]] > 0 else -1
+
+        self.edges_total += len(edges)
+        self.dropped_edges += 2 * int(np.count_nonzero(repeated))
+        self.batches += 1
+        self.max_batch = max(self.max_batch, n)
+        self.cpu_time += time.thread_time() - cpu_start
+        return n
+
+    @property
+    def position(self):
+        """
+        Position signée en comptes de quadrature depuis le démarrage.
+        """
+        with self._lock:
+            self._process()
+            return self._position
+
+    def read(self, reset=False):
+        """
+        Lit (et éventuellement remet à zéro) le compteur de manière atomique.
+
+        Args:
+            reset: Si True, le compteur repart de zéro après la lecture.
+
+        Returns:
+            Le nombre de comptes depuis la dernière remise à zéro.
+        """
+        with self._lock:
+            self._process()
+            count = self._position - self._offset
+            if reset:
+                self._offset = self._position
+            return count
+
+    def reset(self, value=0):
+        """
+        Remet le compteur à `value` comptes (les événements en attente sont pris en compte).
+        """
+        with self._lock:
+            self._process()
+            self._offset = self._position - value
+
+    def snapshot(self):
+        """
+        Position, dernier front et historique des fronts, lus de manière cohérente.
+
+        Returns:
+            Un tuple (position, (position, horodatage) du dernier front, liste des derniers fronts).
+        """
+        with self._lock:
+            self._process()
+            return self._position, self.last_edge, list(self.edge_history)
+
+    def start_draining(self, period=0.05):
+        """
+        Traite la file périodiquement dans un thread, pour les programmes qui ne
+        lisent l'encodeur qu'à la demande.
+
+        Args:
+            period: Période de traitement en secondes.
+        """
+        if self._drain_thread is not None:
+            return self
+        stop = self._drain_stop = threading.Event()
+
+        def drain():
+            while not stop.wait(period):
+                self.process()
+
+        self._drain_thread = threading.Thread(target=drain, name="EncoderDrain", daemon=True)
+        self._drain_thread.start()
+        return self
+
+    def stop_draining(self):
+        if self._drain_thread is None:
+            return
+        self._drain_stop.set()
+        self._drain_thread.join()
+        self._drain_thread = None
+
+    def stats(self):
+        return {"edges_total": self.edges_total, "dropped_edges": self.dropped_edges,
+                "pending": len(self._events), "overflows": self.overflows,
+                "batches": self.batches, "max_batch": self.max_batch}
+
+
+def _ingest_step(rate, duration, batch_period, pin_a, pin_b):
+    # Un palier : producteur cadencé à `rate` fronts/s, traitement par lots toutes les `batch_period` s
+    queue = EncoderEventQueue(pin_a, pin_b)
+    sequence = [(pin_a, 1), (pin_b, 1), (pin_a, 0), (pin_b, 0)]
+    stop = threading.Event()
+    pushed = [0]
+
+    def produce():
+        push = queue.push
+        count = 0
+        start = time.perf_counter()
+        while not stop.is_set():
+            cycles = (int((time.perf_counter() - start) * rate) - count) // 4
+            if cycles <= 0:
+                time.sleep(0.0005)
+                continue
+            timestamp = time.time()
+            for _ in range(cycles):
+                for pin, value in sequence:
+                    push([2, pin, value, timestamp])
+            count += 4 * cycles
+        pushed[0] = count
+
+    producer = threading.Thread(target=produce, name="EncoderIngestProducer", daemon=True)
+    start = time.perf_counter()
+    producer.start()
+    max_pending = 0
+    while time.perf_counter() - start < duration:
+        time.sleep(batch_period)
+        max_pending = max(max_pending, queue.pending())
+        queue.process()
+    stop.set()
+    producer.join()
+    elapsed = time.perf_counter() - start
+    queue.process()
+    return {"rate": rate, "pushed_edges_per_s": pushed[0] / elapsed, "decoded_edges": queue.edges_total,
+            "pushed_edges": pushed[0], "dropped_edges": queue.dropped_edges, "overflows": queue.overflows,
+            "max_pending": max_pending}
+
+
+def measure_ingest_ceiling(start_rate=10000.0, growth=1.5, step_duration=0.5, batch_period=0.01, pin_a=2,
+                           pin_b=7, counts_per_revolution=48, max_rate=1e8):
+    """
+    Mesure le débit maximal de fronts que la file ingère et décode sans perte.
+
+    Un thread producteur pousse des fronts de quadrature synthétiques à un
+    débit fixé pendant qu'un consommateur les traite par lots, comme le ferait
+    l'acquisition. Le débit est multiplié par `growth` à chaque palier jusqu'au
+    premier front perdu ou débordement de la file, ou jusqu'à ce que le
+    producteur ne tienne plus le débit demandé. Le plafond est le débit du
+    dernier palier sans perte.
+
+    Args:
+        start_rate: Débit du premier palier en fronts par seconde.
+        growth: Facteur d'augmentation du débit entre deux paliers.
+        step_duration: Durée de chaque palier en secondes.
+        batch_period: Période de traitement des lots en secondes.
+        pin_a: Broche A simulée.
+        pin_b: Broche B simulée.
+        counts_per_revolution: Comptes de quadrature par tour (4 x ticks par tour).
+        max_rate: Débit au-delà duquel la montée s'arrête.
+
+    Returns:
+        Un dictionnaire : plafond en fronts par seconde, vitesse maximale
+        suivable en RPM, cause de l'arrêt de la montée ("dropped",
+        "overflow", "producer" ou "max_rate") et mesures de chaque palier.
+    """
+    steps = []
+    ceiling = 0.0
+    limit = "max_rate"
+    rate = start_rate
+    while rate <= max_rate:
+        step = _ingest_step(rate, step_duration, batch_period, pin_a, pin_b)
+        steps.append(step)
+        if step["overflows"] or step["max_pending"] >= MAX_PENDING_EVENTS:
+            limit = "overflow"
+            break
+        if step["dropped_edges"] or step["decoded_edges"] != step["pushed_edges"]:
+            limit = "dropped"
+            break
+        if step["pushed_edges_per_s"] < 0.9 * rate:
+            limit = "producer"
+            break
+        ceiling = step["pushed_edges_per_s"]
+        rate *= growth
+    return {"edges_per_s": ceiling, "max_trackable_rpm": ceiling / counts_per_revolution * 60, "limit": limit,
+            "steps": steps}
+
+
+def main():
+    """
+    python -m Class.ClassEncoderIngest : plafond d'ingestion des fronts d'encodeur.
+    """
+    result = measure_ingest_ceiling()
+    print(f"{'palier':>12} {'poussés/s':>12} {'perdus':>8} {'débordements':>13} {'attente max':>12}")
+    for step in result["steps"]:
+        print(f"{step['rate']:>12.0f} {step['pushed_edges_per_s']:>12.0f} {step['dropped_edges']:>8} "
+              f"{step['overflows']:>13} {step['max_pending']:>12}")
+    print(f"Plafond sans perte : {result['edges_per_s']:.0f} fronts/s "
+          f"({result['max_trackable_rpm']:.0f} RPM), limite : {result['limit']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+import csv
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from Class.ClassStepMetrics import STEP_METRICS, step_metrics
+from Class.ClassTelemetryRecorder import TelemetryReader
+
+EXPERIMENTS_DIRECTORY = "experiments"  # Dossier des campagnes d'essais
+
+# Un essai élémentaire : échelon depuis l'arrêt vers `setpoint` avec les gains donnés
+ExperimentStep = namedtuple("ExperimentStep", ["label", "setpoint", "kp", "ki", "kd", "repeat"])
+
+# Indicateurs pour lesquels une valeur plus grande est une régression
+REGRESSION_METRICS = ("rise_time", "overshoot", "settling_time", "iae", "itae")
+
+
+def expand_script(script):
+    """
+    Développe un script d'essais en une liste d'échelons.
+
+    Format du script (dictionnaire, typiquement lu depuis un fichier JSON) :
+        {"duration": 2.0, "rest": 1.0, "rate_hz": 500,
+         "runs": [{"label": "imc", "gains": [0.06, 0.4, 0.0],
+                   "setpoints": [1000, 3000], "repeats": 3}, ...]}
+
+    Returns:
+        Une liste d'ExperimentStep, dans l'ordre d'exécution.
+    """
+    steps = []
+    for index, run in enumerate(script["runs"]):
+        kp, ki, kd = run["gains"]
+        setpoints = run.get("setpoints", [run.get("setpoint", 3000)])
+        for setpoint in setpoints:
+            for repeat in range(int(run.get("repeats", 1))):
+                steps.append(ExperimentStep(run.get("label", f"run{index}"), float(setpoint),
+                                            float(kp), float(ki), float(kd), repeat))
+    return steps
+
+
+class ExperimentRunner:
+    def __init__(self, motor, directory, measure=None, duration=2.0, rest=1.0, rate_hz=500):
+        """
+        Campagne d'essais indiciels automatisée, sans interface.
+
+        Chaque échelon part du moteur arrêté : gains appliqués, enregistrement à
+        pleine fréquence de la boucle PID (TelemetryRecorder), régulation pendant
+        `duration`, puis arrêt et repos de `rest` secondes. Les indicateurs sont
+        ensuite calculés par lot sur tous les enregistrements.
+
+        Args:
+            motor: Instance de Motor (carte réelle ou simulée en temps réel).
+            directory: Dossier de la campagne (un sous-dossier par échelon).
+            measure: Fonction retournant la vitesse (RPM) ; par défaut Motor.estimate_speed.
+            duration: Durée de chaque échelon en secondes.
+            rest: Temps d'arrêt entre deux échelons en secondes.
+            rate_hz: Fréquence de la boucle PID.
+        """
+        self.motor = motor
+        self.directory = directory
+        self.measure = measure if measure is not None else motor.estimate_speed
+        self.duration = duration
+        self.rest = rest
+        self.rate_hz = rate_hz
+        self.runs = []
+
+    def run_step(self, step):
+        """
+        Exécute un échelon et l'enregistre dans son propre dossier.
+        """
+        name = f"{len(self.runs):03d}_{step.label}_{step.setpoint:.0f}_{step.repeat}"
+        directory = os.path.join(self.directory, name)
+        self.motor.set_pid_parameters(step.kp, step.ki, step.kd)
+        self.motor.start_recording(directory, metadata={"experiment": step._asdict()})
+        try:
+            self.motor.start_control(self.measure, setpoint=step.setpoint, rate_hz=self.rate_hz)
+            time.sleep(self.duration)
+        finally:
+            self.motor.stop()
+            self.motor.stop_recording()
+        self.runs.append((step, directory))
+        time.sleep(self.rest)
+        return directory
+
+    def run(self, script):
+        """
+        Exécute toutes les étapes d'un script (voir expand_script) puis enregistre le script.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "script.json"), "w") as f:
+            json.dump(script, f, indent=1)
+        steps = expand_script(script)
+        for i, step in enumerate(steps, start=1):
+            print(f"Essai {i}/{len(steps)} : {step.label}, consigne {step.setpoint:.0f} RPM, "
+                  f"P={step.kp}, I={step.ki}, D={step.kd} (répétition {step.repeat + 1})")
+            self.run_step(step)
+        return self.runs
+
+    def analyse(self):
+        """
+        Calcule les indicateurs de tous les échelons enregistrés.
+
+        Les enregistrements sont rééchantillonnés sur une grille commune (période
+        de la boucle) depuis le début de l'échelon, puis traités en un seul lot.
+        Un échelon sans aucun échantillon enregistré a des indicateurs NaN.
+
+        Returns:
+            Une liste de dictionnaires (étape et indicateurs), un par échelon.
+        """
+        t = np.arange(int(round(self.duration * self.rate_hz))) / self.rate_hz
+        speeds = np.zeros((len(self.runs), len(t)))
+        commands = np.zeros_like(speeds)
+        empty = np.zeros(len(self.runs), dtype=bool)
+        for i, (_, directory) in enumerate(self.runs):
+            data = TelemetryReader(directory).read()
+            if len(data) == 0:
+                print(f"Erreur : aucun échantillon enregistré dans {directory}, indicateurs non calculés")
+                empty[i] = True
+                continue
+            elapsed = data["time"] - data["time"][0]
+            speeds[i] = np.interp(t, elapsed, data["rpm"])
+            commands[i] = np.interp(t, elapsed, data["pwm"])
+
+        setpoints = np.array([step.setpoint for step, _ in self.runs])
+        metrics = step_metrics(t, speeds, setpoints, u=commands)
+        for name in STEP_METRICS:
+            metrics[name][empty] = np.nan
+        return [dict(step._asdict(), directory=directory, **{name: float(metrics[name][i]) for name in STEP_METRICS})
+                for i, (step, directory) in enumerate(self.runs)]
+
+    def report(self, baseline=None, tolerance=0.1):
+        """
+        Écrit runs.csv (un échelon par ligne), summary.csv (moyenne et écart-type
+        par configuration) et report.txt (tableau comparatif).
+
+        Args:
+            baseline: Chemin d'un summary.csv précédent ; les configurations
+                communes sont comparées et les régressions signalées.
+            tolerance: Dégradation relative tolérée avant de signaler une régression.
+
+        Returns:
+            Le texte du rapport.
+        """
+        results = self.analyse()
+        write_csv(os.path.join(self.directory, "runs.csv"), results)
+        summary = summarize(results)
+        write_csv(os.path.join(self.directory, "summary.csv"), summary)
+
+        lines = [f"{'configuration':<28}" + "".join(f"{name:>21}" for name in STEP_METRICS)]
+        for row in summary:
+            lines.append(f"{row['label'] + ' @ ' + format(row['setpoint'], '.0f'):<28}" + "".join(
+                f"{row[name]:>12.4g} ±{row[name + '_std']:<7.2g}" for name in STEP_METRICS))
+
+        if baseline is not None:
+            lines.append("")
+            lines.extend(compare_summaries(summary, read_csv(baseline), tolerance))
+
+        text = "\n".join(lines)
+        with open(os.path.join(self.directory, "report.txt"), "w") as f:
+            f.write(text + "\n")
+        return text
+
+
+def summarize(results):
+    """
+    Moyenne et écart-type des indicateurs par configuration (label, consigne, gains).
+    """
+    groups = {}
+    for row in results:
+        key = (row["label"], row["setpoint"], row["kp"], row["ki"], row["kd"])
+        groups.setdefault(key, []).append(row)
+    summary = []
+    for (label, setpoint, kp, ki, kd), rows in groups.items():
+        entry = {"label": label, "setpoint": setpoint, "kp": kp, "ki": ki, "kd": kd, "repeats": len(rows)}
+        for name in STEP_METRICS:
+            values = np.array([r[name] for r in rows])
+            entry[name] = float(np.nanmean(values)) if not np.isnan(values).all() else float("nan")
+            entry[name + "_std"] = float(np.nanstd(values)) if not np.isnan(values).all() else float("nan")
+        summary.append(entry)
+    return summary
+
+
+def compare_summaries(current, baseline, tolerance=0.1):
+    """
+    Compare deux résumés et retourne les lignes du rapport (régressions signalées par « ! »).
+    """
+    reference = {(row["label"], float(row["setpoint"])): row for row in baseline}
+    lines = ["Comparaison avec la référence :"]
+    for row in current:
+        base = reference.get((row["label"], float(row["setpoint"])))
+        if base is None:
+            continue
+        for name in REGRESSION_METRICS:
+            old, new = float(base[name]), row[name]
+            if np.isnan(old) or np.isnan(new):
+                continue
+            change = (new - old) / abs(old) if old != 0 else 0.0
+            flag = "!" if change > tolerance else " "
+            lines.append(f"{flag} {row['label']} @ {row['setpoint']:.0f} {name:<16} "
+                         f"{old:>10.4g} -> {new:<10.4g} ({change * 100:+.1f} %)")
+    return lines
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def read_csv(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def main(simulated=None):
+    """
+    Exécute un script d'essais : python -m Class.ClassExperimentRunner script.json
+    [--baseline summary.csv] [--simulate].
+
+    Args:
+        simulated: True pour utiliser la carte simulée (voir open_board).
+    """
+    from Class.ClassMotor import Motor
+    from Class.ClassSimulatedBoard import open_board
+
+    args = [arg for arg in sys.argv[1:] if arg != "--simulate"]
+    baseline = None
+    if "--baseline" in args:
+        index = args.index("--baseline")
+        baseline = args[index + 1]
+        del args[index:index + 2]
+    if not args:
+        print("Usage : python -m Class.ClassExperimentRunner script.json [--baseline summary.csv] [--simulate]")
+        return
+    with open(args[0]) as f:
+        script = json.load(f)
+
+    board = open_board(simulated)
+    try:
+        motor = Motor(board, pwm_pin=3, dir_pin=12, encoder_pin_a=2, encoder_pin_b=7, ticks_per_revolution=12)
+        directory = os.path.join(EXPERIMENTS_DIRECTORY, time.strftime("%Y%m%d_%H%M%S"))
+        runner = ExperimentRunner(motor, directory, duration=script.get("duration", 2.0),
+                                  rest=script.get("rest", 1.0), rate_hz=script.get("rate_hz", 500))
+        runner.run(script)
+        print(runner.report(baseline))
+        print(f"Rapport enregistré dans {directory}")
+    finally:
+        board.shutdown()
+
+
+if __name__ == "__main__":
+    main(simulated=True if "--simulate" in sys.argv else None)
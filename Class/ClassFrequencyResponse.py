@@ -0,0 +1,369 @@
+import inspect
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from Class.ClassAutoTuner import PlantModel
+from Class.ClassPidController import PIDController
+
+IDENTIFICATION_DIRECTORY = "identification"  # Réponses fréquentielles mises en cache, une par moteur
+
+# Polynômes des registres à décalage (bits de rétroaction) pour les séquences PRBS
+PRBS_TAPS = {7: (7, 6), 9: (9, 5), 10: (10, 7), 11: (11, 9)}
+
+
+def log_chirp(duration, sample_rate, f_start, f_end):
+    """
+    Sinus glissant à balayage logarithmique, d'amplitude unité.
+    """
+    t = np.arange(int(round(duration * sample_rate))) / sample_rate
+    rate = np.log(f_end / f_start)
+    phase = 2 * np.pi * f_start * duration / rate * (np.exp(t * rate / duration) - 1)
+    return np.sin(phase)
+
+
+def prbs(duration, sample_rate, order=9, hold=1):
+    """
+    Séquence binaire pseudo-aléatoire (±1) de longueur maximale, répétée sur la durée.
+
+    Args:
+        duration: Durée en secondes.
+        sample_rate: Fréquence d'échantillonnage en Hz.
+        order: Ordre du registre à décalage (voir PRBS_TAPS).
+        hold: Nombre d'échantillons par bit (décale l'énergie vers les basses fréquences).
+    """
+    first, second = PRBS_TAPS[order]
+    state = (1 << order) - 1
+    bits = np.empty((1 << order) - 1, dtype=np.float64)
+    for i in range(len(bits)):
+        bit = ((state >> (first - 1)) ^ (state >> (second - 1))) & 1
+        state = ((state << 1) | bit) & ((1 << order) - 1)
+        bits[i] = 1.0 if bit else -1.0
+    sequence = np.repeat(bits, hold)
+    n = int(round(duration * sample_rate))
+    return np.resize(sequence, n)
+
+
+def tukey_window(n, taper=0.1):
+    """
+    Fenêtre plate à bords en cosinus (Hann sur `taper` de la longueur, moitié de chaque côté).
+    """
+    window = np.ones(n)
+    edge = int(taper * n / 2)
+    if edge > 0:
+        ramp = 0.5 * (1 - np.cos(np.pi * np.arange(edge) / edge))
+        window[:edge], window[-edge:] = ramp, ramp[::-1]
+    return window
+
+
+def frequency_response(u, y, sample_rate, f_min=None, f_max=None, window="hann"):
+    """
+    Réponse fréquentielle par FFT fenêtrée, moyennée sur plusieurs répétitions.
+
+    L'estimateur H1 = moyenne(Y.conj(U)) / moyenne(|U|²) réduit l'effet du bruit
+    de mesure ; la cohérence indique les fréquences où la mesure est fiable.
+
+    Args:
+        u: Entrées, tableau (répétitions, n).
+        y: Sorties, tableau (répétitions, n).
+        sample_rate: Fréquence d'échantillonnage en Hz.
+        f_min, f_max: Bande conservée (toute la bande excitée si None).
+        window: "hann" pour une excitation stationnaire (PRBS) ou "tukey" pour un
+            sinus glissant, dont les basses et hautes fréquences sont aux bords
+            de l'enregistrement et seraient effacées par une fenêtre de Hann.
+
+    Returns:
+        Un dictionnaire : frequency (Hz), response (complexe), magnitude_db,
+        phase_deg et coherence.
+    """
+    u = np.atleast_2d(np.asarray(u, dtype=np.float64))
+    y = np.atleast_2d(np.asarray(y, dtype=np.float64))
+    window = np.hanning(u.shape[1]) if window == "hann" else tukey_window(u.shape[1])
+    spectrum_u = np.fft.rfft((u - u.mean(axis=1, keepdims=True)) * window, axis=1)
+    spectrum_y = np.fft.rfft((y - y.mean(axis=1, keepdims=True)) * window, axis=1)
+    frequency = np.fft.rfftfreq(u.shape[1], 1.0 / sample_rate)
+
+    s_uu = np.mean(np.abs(spectrum_u) ** 2, axis=0)
+    s_yy = np.mean(np.abs(spectrum_y) ** 2, axis=0)
+    s_uy = np.mean(np.conj(spectrum_u) * spectrum_y, axis=0)
+
+    keep = (frequency > 0) & (s_uu > 1e-6 * s_uu.max())
+    if f_min is not None:
+        keep &= frequency >= f_min
+    if f_max is not None:
+        keep &= frequency <= f_max
+    response = s_uy[keep] / s_uu[keep]
+    coherence = np.abs(s_uy[keep]) ** 2 / (s_uu[keep] * np.where(s_yy[keep] > 0, s_yy[keep], np.inf))
+    return {"frequency": frequency[keep], "response": response,
+            "magnitude_db": 20 * np.log10(np.maximum(np.abs(response), 1e-12)),
+            "phase_deg": np.degrees(np.unwrap(np.angle(response))), "coherence": coherence}
+
+
+def fit_fopdt_frequency(response, min_coherence=0.5, theta_points=60, tau_points=60):
+    """
+    Ajuste un modèle du premier ordre avec retard sur une réponse fréquentielle
+    en boucle ouverte (même principe de grille vectorisée que fit_fopdt).
+
+    Returns:
+        Un PlantModel.
+    """
+    frequency, measured = response["frequency"], response["response"]
+    weight = np.where(response["coherence"] >= min_coherence, response["coherence"], 0.0)
+    omega = 2 * np.pi * frequency
+    thetas = np.linspace(0.0, 0.25 / frequency.min(), theta_points)
+    taus = np.geomspace(0.05 / frequency.max(), 5.0 / frequency.min(), tau_points)
+
+    for _ in range(2):
+        basis = (np.exp(-1j * omega[None, None, :] * thetas[:, None, None])
+                 / (1 + 1j * omega[None, None, :] * taus[None, :, None]))
+        norm = np.einsum("ijk,k->ij", np.abs(basis) ** 2, weight)
+        gains = np.einsum("ijk,k->ij", np.real(np.conj(basis) * measured), weight) / norm
+        residuals = np.einsum("ijk,k->ij", np.abs(basis * gains[:, :, None] - measured) ** 2, weight)
+        i, j = np.unravel_index(np.argmin(residuals), residuals.shape)
+        best = PlantModel(float(gains[i, j]), float(taus[j]), float(thetas[i]))
+
+        theta_step = thetas[1] - thetas[0]
+        thetas = np.linspace(max(best.dead_time - theta_step, 0.0), best.dead_time + theta_step, theta_points)
+        taus = np.geomspace(best.time_constant / 1.5, best.time_constant * 1.5, tau_points)
+    return best
+
+
+def motor_key(motor):
+    """
+    Identifiant du moteur pour le cache : type de carte, broche PWM et broches de l'encodeur.
+    """
+    return (f"{type(motor.board).__name__}_pwm{motor.pwm_pin}"
+            f"_enc{motor.encoder_pin_a}-{motor.encoder_pin_b}")
+
+
+def cache_path(motor, mode="open", directory=IDENTIFICATION_DIRECTORY):
+    return os.path.join(directory, f"{motor_key(motor)}_{mode}.npz")
+
+
+def save_response(path, response, **metadata):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    arrays = dict(response)
+    for key, value in metadata.items():
+        arrays[f"meta_{key}"] = np.array(value)
+    np.savez(path, **arrays)
+    return path
+
+
+def load_response(path):
+    """
+    Recharge une réponse enregistrée par save_response (None si absente).
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+class FrequencyResponseTest:
+    def __init__(self, motor, measure=None, wait=None, sample_rate=500.0):
+        """
+        Mesure de la réponse fréquentielle du moteur (diagramme de Bode).
+
+        En boucle ouverte, l'excitation s'ajoute au PWM de repos ; en boucle
+        fermée, elle s'ajoute à la consigne et un PIDController reprenant les
+        gains du moteur calcule le PWM à chaque échantillon. La vitesse est
+        mesurée à fréquence fixe, puis la réponse est calculée par FFT.
+
+        Args:
+            motor: Instance de Motor (carte réelle ou simulée).
+            measure: Fonction retournant la vitesse (RPM) ; par défaut Motor.estimate_speed.
+            wait: Fonction d'attente (durée en secondes) ; par défaut board.advance pour
+                une carte simulée en temps virtuel, sinon attente jusqu'à l'échéance suivante.
+            sample_rate: Fréquence d'échantillonnage en Hz.
+        """
+        self.motor = motor
+        self.measure = measure if measure is not None else motor.estimate_speed
+        board = motor.board
+        if wait is None and hasattr(board, "advance") and not getattr(board, "realtime", True):
+            wait = board.advance
+        self.wait = wait
+        self.sample_rate = sample_rate
+
+    def _sample(self, references, closed_loop, controller=None):
+        """
+        Applique la séquence `references` (PWM ou consigne) et mesure la vitesse à chaque période.
+        """
+        period = 1.0 / self.sample_rate
+        speeds = np.empty(len(references))
+        commands = np.empty(len(references))
+        deadline = time.perf_counter()
+        speed = self.measure()
+        for i, reference in enumerate(references):
+            command = controller.update(reference, speed, period) if closed_loop else reference
+            self.motor.apply_pwm(command)
+            commands[i] = self.motor.pwm
+            if self.wait is not None:
+                self.wait(period)
+            else:
+                # Attente jusqu'à l'échéance (pas de dérive de la période d'échantillonnage)
+                deadline += period
+                remaining = deadline - time.perf_counter()
+                if remaining > 0:
+                    time.sleep(remaining)
+            speed = self.measure()
+            speeds[i] = speed
+        return commands, speeds
+
+    def run(self, mode="open", signal="chirp", duration=10.0, repetitions=4, f_start=0.2, f_end=None,
+            bias=128, setpoint=3000.0, amplitude=None, settle_time=1.5):
+        """
+        Lance la mesure.
+
+        Args:
+            mode: "open" (PWM vers vitesse) ou "closed" (consigne vers vitesse).
+            signal: "chirp" (sinus glissant logarithmique) ou "prbs".
+            duration: Durée d'une répétition en secondes.
+            repetitions: Nombre de répétitions moyennées.
+            f_start, f_end: Bande du sinus glissant (f_end par défaut à 40 % de la
+                fréquence d'échantillonnage).
+            bias: PWM de repos en boucle ouverte.
+            setpoint: Consigne de repos en boucle fermée (RPM).
+            amplitude: Amplitude de l'excitation (40 PWM ou 300 RPM par défaut).
+            settle_time: Durée de stabilisation avant l'excitation.
+
+        Returns:
+            La réponse (voir frequency_response) complétée des paramètres de l'essai.
+        """
+        f_end = f_end if f_end is not None else 0.4 * self.sample_rate
+        closed_loop = mode == "closed"
+        if amplitude is None:
+            amplitude = 300.0 if closed_loop else 40.0
+        if signal == "chirp":
+            excitation = log_chirp(duration, self.sample_rate, f_start, f_end)
+        elif signal == "prbs":
+            excitation = prbs(duration, self.sample_rate)
+        else:
+            raise ValueError(f"Excitation inconnue : {signal}")
+
+        controller = None
+        if closed_loop:
+            pid = self.motor.pid
+            controller = PIDController(pid.kp, pid.ki, pid.kd, pid.output_min, pid.output_max,
+                                       pid.derivative_filter)
+        rest = setpoint if closed_loop else bias
+
+        self.motor.stop_control()
+        self.motor.start(0)
+        try:
+            self._sample(np.full(int(settle_time * self.sample_rate), float(rest)), closed_loop, controller)
+            references = rest + amplitude * np.tile(excitation, repetitions)
+            commands, speeds = self._sample(references, closed_loop, controller)
+        finally:
+            self.motor.stop()
+
+        n = len(excitation)
+        inputs = (references if closed_loop else commands).reshape(repetitions, n)
+        response = frequency_response(inputs, speeds.reshape(repetitions, n), self.sample_rate,
+                                      f_min=f_start if signal == "chirp" else None,
+                                      f_max=f_end if signal == "chirp" else None,
+                                      window="tukey" if signal == "chirp" else "hann")
+        response.update(sample_rate=self.sample_rate, mode=mode, signal=signal, rest=rest,
+                        amplitude=amplitude, repetitions=repetitions, measured_at=time.time())
+        return response
+
+    def parameters(self, mode="open", **kwargs):
+        """
+        Paramètres complets d'un essai (valeurs par défaut de run comprises,
+        fréquence d'échantillonnage et, en boucle fermée, réglage du
+        régulateur), tels qu'enregistrés avec la réponse en cache.
+        """
+        arguments = inspect.signature(self.run).bind(mode=mode, **kwargs)
+        arguments.apply_defaults()
+        parameters = dict(arguments.arguments, sample_rate=self.sample_rate)
+        if mode == "closed":
+            # Mêmes réglages que le régulateur de l'essai (voir run)
+            pid = self.motor.pid
+            parameters["controller"] = {"kp": pid.kp, "ki": pid.ki, "kd": pid.kd, "output_min": pid.output_min,
+                                        "output_max": pid.output_max, "derivative_filter": pid.derivative_filter}
+        return parameters
+
+    def cached(self, mode="open", refresh=False, directory=IDENTIFICATION_DIRECTORY, **kwargs):
+        """
+        Réponse du moteur en cache (fichier .npz par moteur et par mode), mesurée
+        si absente ou si elle a été mesurée avec d'autres paramètres (signal,
+        amplitude, répétitions, fréquence d'échantillonnage, gains du
+        régulateur en boucle fermée...).
+        """
+        path = cache_path(self.motor, mode, directory)
+        parameters = json.dumps(self.parameters(mode, **kwargs), sort_keys=True)
+        response = None if refresh else load_response(path)
+        if response is not None and str(response.get("meta_parameters", "")) != parameters:
+            print(f"Réponse en cache mesurée avec d'autres paramètres ({path}) : nouvelle mesure")
+            response = None
+        if response is None:
+            response = self.run(mode=mode, **kwargs)
+            save_response(path, response, parameters=parameters)
+            print(f"Réponse fréquentielle enregistrée dans {path}")
+        return response
+
+
+def bandwidth(response, level_db=-3.0):
+    """
+    Fréquence (Hz) où le gain passe `level_db` sous son niveau aux basses fréquences (None si non atteinte).
+    """
+    magnitude = response["magnitude_db"]
+    below = np.flatnonzero(magnitude < magnitude[0] + level_db)
+    return float(response["frequency"][below[0]]) if len(below) else None
+
+
+def save_bode(path, *responses):
+    """
+    Trace les diagrammes de Bode (gain et phase) des réponses données dans un PNG.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(7, 6))
+    FigureCanvasAgg(figure)
+    ax_magnitude, ax_phase = figure.subplots(2, 1, sharex=True)
+    for response in responses:
+        label = f"{response['mode']} ({response['signal']})"
+        ax_magnitude.semilogx(response["frequency"], response["magnitude_db"], label=str(label))
+        ax_phase.semilogx(response["frequency"], response["phase_deg"])
+    ax_magnitude.set_ylabel("Gain (dB)")
+    ax_magnitude.legend()
+    ax_phase.set_ylabel("Phase (°)")
+    ax_phase.set_xlabel("Fréquence (Hz)")
+    figure.savefig(path, dpi=100)
+    return path
+
+
+def main(simulated=None):
+    """
+    Mesure et met en cache les réponses en boucle ouverte et fermée, puis affiche
+    la bande passante et le modèle identifié.
+
+    Args:
+        simulated: True pour utiliser le moteur simulé en temps virtuel.
+    """
+    from Class.ClassMotor import Motor
+    from Class.ClassSimulatedBoard import SIMULATED_GAINS, SimulatedTelemetrix, open_board
+
+    board = SimulatedTelemetrix(realtime=False) if simulated else open_board(simulated)
+    try:
+        motor = Motor(board, pwm_pin=3, dir_pin=12, encoder_pin_a=2, encoder_pin_b=7, ticks_per_revolution=12)
+        motor.set_pid_parameters(*SIMULATED_GAINS)
+        test = FrequencyResponseTest(motor, sample_rate=200.0)
+        refresh = "--refresh" in sys.argv
+        open_loop = test.cached("open", refresh=refresh)
+        closed_loop = test.cached("closed", refresh=refresh)
+        model = fit_fopdt_frequency(open_loop)
+        print(f"Modèle : K={model.gain:.3f}, tau={model.time_constant:.3f} s, retard={model.dead_time:.4f} s")
+        print(f"Bande passante en boucle ouverte : {bandwidth(open_loop)} Hz, "
+              f"en boucle fermée : {bandwidth(closed_loop)} Hz")
+        print(save_bode(os.path.join(IDENTIFICATION_DIRECTORY, f"{motor_key(motor)}_bode.png"),
+                        open_loop, closed_loop))
+    finally:
+        board.shutdown()
+
+
+if __name__ == "__main__":
+    main(simulated=True if "--simulate" in sys.argv else None)
@@ -0,0 +1,215 @@
+import bisect
+import csv
+import sys
+import time
+
+import numpy as np
+
+GAIN_SCHEDULE = "gain_schedule.csv"  # Table de gains par défaut de l'interface
+SCHEDULE_VARIABLES = ("setpoint", "measurement")
+# Points de fonctionnement (PWM) des essais de remplissage de la table
+SCHEDULE_PWM_POINTS = (40, 70, 100, 130, 160, 190, 220)
+
+
+class GainSchedule:
+    def __init__(self, speeds, kp, ki, kd, variable="setpoint"):
+        """
+        Table de gains (Kp, Ki, Kd) indexée par la vitesse, interpolée linéairement.
+
+        La table est précalculée en segments (origine et pente de chaque gain) :
+        une lecture par période de régulation ne coûte qu'une recherche
+        dichotomique et trois multiplications-additions, sans allocation de
+        tableau. Au-delà des points extrêmes, les gains de l'extrémité sont
+        conservés. Le changement de gains entre deux périodes est rendu sans
+        à-coup par le PIDController (voir PIDController.update).
+
+        Args:
+            speeds: Vitesses des points de la table (RPM), strictement croissantes.
+            kp: Gains proportionnels en chaque point.
+            ki: Gains intégraux en chaque point.
+            kd: Gains dérivés en chaque point.
+            variable: Variable d'indexation : "setpoint" (consigne, par défaut :
+                le bruit de mesure ne passe pas dans les gains) ou "measurement".
+        """
+        table = np.column_stack([np.asarray(values, dtype=np.float64) for values in (speeds, kp, ki, kd)])
+        if table.shape[0] == 0:
+            raise ValueError("La table de gains est vide.")
+        if np.any(np.diff(table[:, 0]) <= 0):
+            raise ValueError("Les vitesses de la table doivent être strictement croissantes.")
+        if np.any(table[:, 1:] < 0):
+            raise ValueError("Les gains de la table doivent être positifs ou nuls.")
+        if variable not in SCHEDULE_VARIABLES:
+            raise ValueError(f"Variable d'indexation inconnue : {variable}")
+
+        self.table = table
+        self.variable = variable
+        self.on_setpoint = variable == "setpoint"
+        self.speeds = tuple(table[:, 0].tolist())
+        rows = [tuple(row) for row in table.tolist()]
+        self._first = rows[0][1:]
+        self._last = rows[-1][1:]
+        # (vitesse d'origine, gains d'origine, pentes) de chaque segment, en flottants Python
+        self._segments = []
+        for (s0, kp0, ki0, kd0), (s1, kp1, ki1, kd1) in zip(rows, rows[1:]):
+            width = s1 - s0
+            self._segments.append((s0, kp0, ki0, kd0, (kp1 - kp0) / width, (ki1 - ki0) / width,
+                                   (kd1 - kd0) / width))
+
+    def __len__(self):
+        return len(self.speeds)
+
+    def gains(self, speed):
+        """
+        Gains interpolés à la vitesse donnée (RPM) : tuple (kp, ki, kd).
+        """
+        speeds = self.speeds
+        if speed <= speeds[0]:
+            return self._first
+        if speed >= speeds[-1]:
+            return self._last
+        s0, kp, ki, kd, dkp, dki, dkd = self._segments[bisect.bisect_right(speeds, speed) - 1]
+        x = speed - s0
+        return kp + dkp * x, ki + dki * x, kd + dkd * x
+
+    def gains_array(self, speeds):
+        """
+        Gains interpolés pour un tableau de vitesses (tracés, analyse hors ligne).
+
+        Returns:
+            Tableau NumPy de forme (n, 3) : colonnes kp, ki, kd.
+        """
+        speeds = np.asarray(speeds, dtype=np.float64)
+        return np.column_stack([np.interp(speeds, self.table[:, 0], self.table[:, column])
+                                for column in (1, 2, 3)])
+
+    def save(self, path):
+        """
+        Enregistre la table en CSV (colonnes rpm, kp, ki, kd).
+        """
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["rpm", "kp", "ki", "kd"])
+            for row in self.table.tolist():
+                writer.writerow([f"{value:.6g}" for value in row])
+
+    @classmethod
+    def load(cls, path, variable="setpoint"):
+        """
+        Lit une table enregistrée par save (ou écrite à la main, lignes dans un ordre quelconque).
+        """
+        with open(path, newline="") as f:
+            rows = sorted((float(row["rpm"]), float(row["kp"]), float(row["ki"]), float(row["kd"]))
+                          for row in csv.DictReader(f))
+        if not rows:
+            raise ValueError(f"Table de gains vide : {path}")
+        return cls(*zip(*rows), variable=variable)
+
+    @classmethod
+    def from_results(cls, results, variable="setpoint"):
+        """
+        Table construite à partir de réglages faits à différentes vitesses.
+
+        Args:
+            results: Itérable de (vitesse, gains), où gains est un TuningResult
+                ou un tuple (kp, ki, kd).
+            variable: Variable d'indexation (voir SCHEDULE_VARIABLES).
+        """
+        rows = []
+        for speed, gains in results:
+            gains = tuple(gains)[:3]
+            if len(gains) != 3:
+                raise ValueError(f"Réglage incomplet à {speed} RPM : kp, ki et kd attendus.")
+            rows.append((float(speed), *(float(gain) for gain in gains)))
+        rows.sort()
+        if not rows:
+            raise ValueError("Aucun réglage pour construire la table de gains.")
+        return cls(*zip(*rows), variable=variable)
+
+
+def tune_schedule(tuner, pwm_points=SCHEDULE_PWM_POINTS, step=20, rule="imc", settle_time=1.0,
+                  duration=1.5, variable="setpoint"):
+    """
+    Remplit une table de gains par des essais indiciels autour de plusieurs points de fonctionnement.
+
+    À chaque point, un échelon de PWM de `step` est appliqué autour du PWM du
+    point (AutoTuner.step_test), un modèle du premier ordre avec retard est
+    identifié et les gains sont calculés avec la règle choisie. La vitesse du
+    point est la vitesse finale mesurée moins la moitié de la réponse à
+    l'échelon (milieu de l'essai).
+
+    Args:
+        tuner: AutoTuner (moteur réel ou simulated_tuner).
+        pwm_points: PWM des points de fonctionnement.
+        step: Amplitude des échelons de PWM.
+        rule: Règle de réglage (voir TUNING_RULES).
+        settle_time: Durée de stabilisation avant chaque échelon en secondes.
+        duration: Durée enregistrée après chaque échelon en secondes.
+        variable: Variable d'indexation de la table.
+
+    Returns:
+        (GainSchedule, liste des (vitesse, TuningResult) de chaque point).
+    """
+    from Class.ClassAutoTuner import TuningResult, compute_gains, fit_fopdt
+
+    results = []
+    try:
+        for pwm in pwm_points:
+            low, high = int(pwm - step / 2), int(pwm + step / 2)
+            t, dy, du = tuner.step_test(pwm_low=low, pwm_high=high, settle_time=settle_time, duration=duration)
+            model = fit_fopdt(t, dy, du)
+            response = float(np.mean(dy[-max(1, len(dy) // 5):]))
+            final_speed = tuner.measure()
+            if model.gain <= 0 or final_speed <= 0:
+                print(f"Point PWM {pwm} ignoré : le moteur ne répond pas à l'échelon.")
+                continue
+            kp, ki, kd = compute_gains(model, rule, min_dead_time=1.0 / tuner.sample_rate)
+            results.append((final_speed - response / 2, TuningResult(kp, ki, kd, rule, model, None, None)))
+    finally:
+        tuner.motor.stop()
+    return GainSchedule.from_results(results, variable=variable), results
+
+
+def main(simulated=None):
+    """
+    Remplit une table de gains par des essais à plusieurs vitesses, l'affiche et
+    l'enregistre : python -m Class.ClassGainSchedule [fichier.csv] [--simulate].
+    """
+    from Class.ClassAutoTuner import AutoTuner, simulated_tuner
+
+    args = [arg for arg in sys.argv[1:] if arg != "--simulate"]
+    path = args[0] if args else GAIN_SCHEDULE
+    if simulated:
+        # Carte simulée en temps virtuel : les essais s'enchaînent sans attendre
+        tuner = simulated_tuner()
+    else:
+        from Class.ClassMotor import Motor
+        from Class.ClassSimulatedBoard import open_board
+
+        board = open_board(simulated)
+        motor = Motor(board, pwm_pin=3, dir_pin=12, encoder_pin_a=2, encoder_pin_b=7, ticks_per_revolution=12)
+        tuner = AutoTuner(motor)
+
+    try:
+        start = time.perf_counter()
+        schedule, results = tune_schedule(tuner)
+        print(f"{len(results)} essais en {time.perf_counter() - start:.1f} s")
+        print(f"{'RPM':>8} {'K':>8} {'tau (ms)':>9} {'retard':>7} {'P':>8} {'I':>8} {'D':>8}")
+        for speed, result in results:
+            model = result.model
+            print(f"{speed:>8.0f} {model.gain:>8.2f} {model.time_constant * 1000:>9.0f} "
+                  f"{model.dead_time * 1000:>5.0f}ms {result.kp:>8.4f} {result.ki:>8.4f} {result.kd:>8.4f}")
+        schedule.save(path)
+        print(f"Table de gains enregistrée dans {path}")
+
+        # Coût d'une lecture de la table (chemin de la boucle de régulation)
+        speeds = np.random.default_rng(0).uniform(0, 7000, 10000).tolist()
+        start = time.perf_counter()
+        for speed in speeds:
+            schedule.gains(speed)
+        print(f"Lecture de la table : {(time.perf_counter() - start) / len(speeds) * 1e6:.2f} µs")
+    finally:
+        tuner.motor.board.shutdown()
+
+
+if __name__ == "__main__":
+    main(simulated=True if "--simulate" in sys.argv else None)
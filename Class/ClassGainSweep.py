@@ -0,0 +1,270 @@
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+from Class.ClassAutoTuner import PlantModel
+from Class.ClassStepMetrics import STEP_METRICS, step_metrics
+
+SWEEP_DTYPE = np.dtype([("kp", "<f8"), ("ki", "<f8"), ("kd", "<f8")] + [(name, "<f8") for name in STEP_METRICS])
+SWEEPS_DIRECTORY = "sweeps"  # Dossier des balayages enregistrés
+
+
+def simulate_closed_loop(model, kp, ki, kd, setpoint=3000.0, duration=2.0, dt=0.002,
+                         output_min=0.0, output_max=255.0, derivative_filter=0.01):
+    """
+    Simule la boucle fermée pour un lot de gains, vectorisé sur les jeux de gains.
+
+    Le correcteur reproduit PIDController.update (intégrale en unités de sortie,
+    intégration conditionnelle, dérivée filtrée sur la mesure) ; le procédé est
+    le modèle du premier ordre avec retard discrétisé exactement.
+
+    Args:
+        model: PlantModel (gain, constante de temps, retard).
+        kp, ki, kd: Tableaux de même taille, un jeu de gains par élément.
+        setpoint: Échelon de consigne (RPM) appliqué à t = 0.
+        duration: Durée simulée en secondes.
+        dt: Période de la boucle en secondes.
+        output_min: Borne basse de la commande.
+        output_max: Borne haute de la commande.
+        derivative_filter: Constante de temps du filtre de dérivée.
+
+    Returns:
+        (t, y, u) : instants (n,), vitesses et commandes (lots, n).
+    """
+    kp, ki, kd = (np.asarray(g, dtype=np.float64) for g in (kp, ki, kd))
+    batch = kp.shape[0]
+    steps = int(round(duration / dt))
+    decay = np.exp(-dt / model.time_constant)
+    delay = int(round(model.dead_time / dt))
+    alpha = dt / (derivative_filter + dt)
+
+    pipeline = np.zeros((delay + 1, batch))  # Commandes en transit pendant le retard
+    y = np.zeros(batch)
+    i_term = np.zeros(batch)
+    derivative = np.zeros(batch)
+    last = None
+    ys = np.empty((batch, steps))
+    us = np.empty((batch, steps))
+
+    for k in range(steps):
+        error = setpoint - y
+        if last is not None:
+            derivative += alpha * (-(y - last) / dt - derivative)
+        last = y
+
+        p_term = kp * error
+        d_term = kd * derivative
+        candidate = i_term + ki * error * dt
+        unclamped = p_term + candidate + d_term
+        hold = ((unclamped > output_max) & (error > 0)) | ((unclamped < output_min) & (error < 0))
+        i_term = np.clip(np.where(hold, i_term, candidate), output_min, output_max)
+        u = np.clip(p_term + i_term + d_term, output_min, output_max)
+
+        ys[:, k] = y
+        us[:, k] = u
+        pipeline[k % (delay + 1)] = u
+        y = decay * y + (1 - decay) * model.gain * pipeline[(k + 1) % (delay + 1)]
+
+    return np.arange(steps) * dt, ys, us
+
+
+def _sweep_chunk(gains, model, options):
+    """
+    Simule un paquet de gains et ne renvoie que les indicateurs (peu de données entre processus).
+    """
+    kp, ki, kd = gains
+    t, y, u = simulate_closed_loop(model, kp, ki, kd, **options)
+    metrics = step_metrics(t, y, options["setpoint"], u=u,
+                           output_min=options["output_min"], output_max=options["output_max"])
+    results = np.empty(len(kp), dtype=SWEEP_DTYPE)
+    results["kp"], results["ki"], results["kd"] = kp, ki, kd
+    for name in STEP_METRICS:
+        results[name] = metrics[name]
+    return results
+
+
+class GainSweep:
+    def __init__(self, model, kp_values, ki_values, kd_values=(0.0,), setpoint=3000.0, duration=2.0,
+                 dt=0.002, output_min=0.0, output_max=255.0, derivative_filter=0.01):
+        """
+        Balayage des gains PID sur un modèle identifié du moteur.
+
+        Toutes les combinaisons (Kp, Ki, Kd) de la grille sont simulées en boucle
+        fermée par lots vectorisés, répartis sur un pool de processus.
+
+        Args:
+            model: PlantModel identifié (voir ClassAutoTuner).
+            kp_values, ki_values, kd_values: Valeurs testées pour chaque gain.
+            setpoint: Échelon de consigne simulé (RPM).
+            duration: Durée de chaque simulation en secondes.
+            dt: Période de la boucle PID simulée en secondes.
+            output_min: Borne basse de la commande.
+            output_max: Borne haute de la commande.
+            derivative_filter: Constante de temps du filtre de dérivée.
+        """
+        self.model = PlantModel(*model)
+        self.kp_values = np.asarray(kp_values, dtype=np.float64)
+        self.ki_values = np.asarray(ki_values, dtype=np.float64)
+        self.kd_values = np.asarray(kd_values, dtype=np.float64)
+        self.options = dict(setpoint=setpoint, duration=duration, dt=dt, output_min=output_min,
+                            output_max=output_max, derivative_filter=derivative_filter)
+        self.results = None
+        self.elapsed = None
+
+    @property
+    def shape(self):
+        return len(self.kp_values), len(self.ki_values), len(self.kd_values)
+
+    def run(self, workers=None, chunk_size=1000):
+        """
+        Lance le balayage.
+
+        Args:
+            workers: Nombre de processus (None : un par cœur, 1 : dans ce processus).
+            chunk_size: Nombre de jeux de gains simulés ensemble.
+
+        Returns:
+            Un tableau structuré SWEEP_DTYPE, dans l'ordre de la grille (Kp, Ki, Kd).
+        """
+        start = time.perf_counter()
+        kp, ki, kd = (g.ravel() for g in np.meshgrid(self.kp_values, self.ki_values, self.kd_values,
+                                                     indexing="ij"))
+        chunks = [(kp[i:i + chunk_size], ki[i:i + chunk_size], kd[i:i + chunk_size])
+                  for i in range(0, len(kp), chunk_size)]
+
+        if workers == 1 or len(chunks) == 1:
+            parts = [_sweep_chunk(chunk, self.model, self.options) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                parts = list(executor.map(_sweep_chunk, chunks, repeat(self.model), repeat(self.options)))
+
+        self.results = np.concatenate(parts)
+        self.elapsed = time.perf_counter() - start
+        print(f"Balayage de {len(self.results)} jeux de gains en {self.elapsed:.2f} s")
+        return self.results
+
+    def ranked(self, by="itae", max_overshoot=None):
+        """
+        Résultats triés par indicateur croissant (NaN en dernier).
+
+        Args:
+            by: Indicateur de tri.
+            max_overshoot: Dépassement maximal admis (%), ou None.
+        """
+        results = self.results
+        if max_overshoot is not None:
+            results = results[results["overshoot"] <= max_overshoot]
+        return results[np.argsort(results[by], kind="stable")]
+
+    def save_csv(self, path, by="itae", max_overshoot=None):
+        """
+        Enregistre le classement au format CSV (une ligne par jeu de gains).
+        """
+        ranked = self.ranked(by, max_overshoot)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("rank",) + SWEEP_DTYPE.names)
+            for rank, row in enumerate(ranked, start=1):
+                writer.writerow([rank] + [f"{value:.6g}" for value in row.tolist()])
+        return path
+
+    def save_heatmaps(self, directory, metrics=STEP_METRICS):
+        """
+        Cartes Kp x Ki de chaque indicateur (meilleure valeur sur Kd), en PNG.
+
+        Returns:
+            La liste des fichiers écrits.
+        """
+        # Import différé : matplotlib n'est nécessaire que pour les cartes
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for name in metrics:
+            grid = self.results[name].reshape(self.shape)
+            if np.isnan(grid).all():
+                continue
+            best = np.nanmin(np.where(np.isnan(grid), np.inf, grid), axis=2)
+            best[np.isinf(best)] = np.nan
+
+            figure = Figure(figsize=(6, 5))
+            FigureCanvasAgg(figure)
+            ax = figure.add_subplot()
+            mesh = ax.pcolormesh(self.ki_values, self.kp_values, best, shading="nearest")
+            figure.colorbar(mesh, ax=ax, label=name)
+            for axis, values in ((ax.set_xscale, self.ki_values), (ax.set_yscale, self.kp_values)):
+                if values.min() > 0 and values.max() / values.min() > 100:
+                    axis("log")
+            ax.set_xlabel("Ki")
+            ax.set_ylabel("Kp")
+            ax.set_title(f"{name} (meilleur Kd)")
+            path = os.path.join(directory, f"heatmap_{name}.png")
+            figure.savefig(path, dpi=100)
+            paths.append(path)
+        return paths
+
+
+def load_ranked_gains(path, count=10):
+    """
+    Lit les `count` premiers jeux de gains d'un classement enregistré par GainSweep.save_csv.
+
+    Returns:
+        Une liste de dictionnaires (kp, ki, kd et indicateurs).
+    """
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        rows = []
+        for row in reader:
+            rows.append({name: float(row[name]) for name in SWEEP_DTYPE.names})
+            if len(rows) >= count:
+                break
+    return rows
+
+
+def main(simulated=None):
+    """
+    Identifie le moteur (essai indiciel), balaie une grille 40 x 50 x 5 et
+    enregistre le classement et les cartes dans SWEEPS_DIRECTORY.
+
+    Args:
+        simulated: True pour identifier le modèle sur le moteur simulé.
+    """
+    from Class.ClassAutoTuner import AutoTuner, fit_fopdt, simulated_tuner
+
+    if simulated:
+        tuner = simulated_tuner()
+        t, dy, du = tuner.step_test()
+        tuner.motor.stop()
+    else:
+        from Class.ClassMotor import Motor
+        from Class.ClassSimulatedBoard import open_board
+
+        board = open_board(simulated)
+        try:
+            tuner = AutoTuner(Motor(board, pwm_pin=3, dir_pin=12, encoder_pin_a=2, encoder_pin_b=7))
+            t, dy, du = tuner.step_test()
+            tuner.motor.stop()
+        finally:
+            board.shutdown()
+    model = fit_fopdt(t, dy, du)
+    print(f"Modèle : K={model.gain:.3f}, tau={model.time_constant:.3f} s, retard={model.dead_time:.3f} s")
+
+    sweep = GainSweep(model, np.geomspace(0.005, 2.0, 40), np.geomspace(0.01, 50.0, 50),
+                      np.linspace(0.0, 0.004, 5))
+    sweep.run()
+    directory = os.path.join(SWEEPS_DIRECTORY, time.strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(directory, exist_ok=True)
+    sweep.save_csv(os.path.join(directory, "ranking.csv"))
+    sweep.save_heatmaps(directory)
+    best = sweep.ranked()[0]
+    print(f"Meilleurs gains (ITAE) : P={best['kp']:.4f}, I={best['ki']:.4f}, D={best['kd']:.4f} -> {directory}")
+
+
+if __name__ == "__main__":
+    main(simulated=True if "--simulate" in sys.argv else None)
@@ -0,0 +1,328 @@
+import bisect
+import os
+import threading
+import time
+from collections import namedtuple
+
+# Bornes (s) des histogrammes de durée : de 10 µs à 1 s
+LATENCY_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2,
+                   0.1, 0.25, 1.0)
+# Bornes des histogrammes de période, en multiples de la période cible
+PERIOD_FACTORS = (0.5, 0.8, 0.9, 0.95, 0.98, 1.02, 1.05, 1.1, 1.2, 1.5, 2.0, 5.0, 10.0)
+# Bornes de l'histogramme du nombre de commandes par écriture série
+BATCH_BUCKETS = (1, 2, 3, 4, 6, 8, 12, 16)
+METRICS_PREFIX = "motor_"
+
+# État figé d'un histogramme (bornes, effectifs par intervalle, somme, nombre d'observations)
+HistogramSnapshot = namedtuple("HistogramSnapshot", ["buckets", "counts", "sum", "count"])
+
+
+def period_buckets(period):
+    """
+    Bornes d'un histogramme de périodes autour de la période cible (secondes).
+    """
+    return tuple(period * factor for factor in PERIOD_FACTORS)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        Histogramme à intervalles fixes, assez léger pour les chemins critiques.
+
+        Une observation coûte une recherche dichotomique et deux additions, sans
+        allocation ni verrou : l'histogramme est alimenté par un seul thread et
+        lu (de manière approximative) par les autres.
+
+        Args:
+            buckets: Bornes supérieures croissantes des intervalles ; un dernier
+                intervalle reçoit les valeurs au-delà de la plus grande borne.
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def reset(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def snapshot(self):
+        return HistogramSnapshot(self.buckets, tuple(self.counts), self.sum, self.count)
+
+    def quantile(self, q):
+        return snapshot_quantile(self.snapshot(), q)
+
+
+def snapshot_quantile(snapshot, q):
+    """
+    Quantile estimé d'un histogramme : borne supérieure de l'intervalle qui le
+    contient (la plus grande borne si au-delà, 0 sans observation).
+    """
+    total = sum(snapshot.counts)
+    if total == 0:
+        return 0.0
+    rank = q * total
+    cumulative = 0
+    for bound, count in zip(snapshot.buckets, snapshot.counts):
+        cumulative += count
+        if cumulative >= rank:
+            return bound
+    return snapshot.buckets[-1]
+
+
+def difference(current, previous):
+    """
+    Variation d'un compteur ou d'un histogramme entre deux relevés. Une valeur
+    en baisse signale une remise à zéro (boucle redémarrée) : la valeur
+    courante est alors la variation.
+    """
+    if previous is None:
+        return current
+    if isinstance(current, HistogramSnapshot):
+        if current.count < previous.count or current.buckets != previous.buckets:
+            return current
+        return HistogramSnapshot(current.buckets, tuple(c - p for c, p in zip(current.counts, previous.counts)),
+                                 current.sum - previous.sum, current.count - previous.count)
+    return current - previous if current >= previous else current
+
+
+class MetricsRegistry:
+    def __init__(self, prefix=METRICS_PREFIX):
+        """
+        Registre des mesures exportées.
+
+        Les objets instrumentés gardent leurs compteurs en simples attributs et
+        leurs histogrammes en objets Histogram ; le registre ne fait que les
+        lire à la collecte (export ou panneau de diagnostic), ce qui ne coûte
+        rien aux chemins critiques.
+
+        Args:
+            prefix: Préfixe ajouté au nom de chaque mesure.
+        """
+        self.prefix = prefix
+        self._metrics = []  # (nom, type, aide, étiquettes, fonction)
+        self._lock = threading.Lock()
+
+    def register(self, name, kind, help_text, function, **labels):
+        """
+        Déclare une mesure lue à la collecte.
+
+        Args:
+            name: Nom de la mesure (sans préfixe).
+            kind: "counter", "gauge" ou "histogram".
+            help_text: Description exportée.
+            function: Fonction sans argument retournant la valeur (un Histogram
+                pour un histogramme), ou None si la mesure est indisponible.
+            labels: Étiquettes de la série (moteur, sous-système...).
+        """
+        if kind not in ("counter", "gauge", "histogram"):
+            raise ValueError(f"Type de mesure inconnu : {kind}")
+        with self._lock:
+            self._metrics.append((self.prefix + name, kind, help_text, tuple(sorted(labels.items())), function))
+
+    def unregister(self, **labels):
+        """
+        Retire les séries portant toutes les étiquettes données (moteur retiré...).
+        """
+        items = tuple(labels.items())
+        with self._lock:
+            self._metrics = [metric for metric in self._metrics
+                             if not all(item in metric[3] for item in items)]
+
+    def collect(self):
+        """
+        Lit toutes les mesures.
+
+        Returns:
+            Liste de (nom, type, aide, étiquettes, valeur) ; la valeur d'un
+            histogramme est un HistogramSnapshot. Les mesures indisponibles ou
+            en erreur sont omises.
+        """
+        with self._lock:
+            metrics = list(self._metrics)
+        samples = []
+        for name, kind, help_text, labels, function in metrics:
+            try:
+                value = function()
+            except Exception as e:
+                print(f"Erreur lors de la lecture de la mesure {name} : {e}")
+                continue
+            if value is None:
+                continue
+            if kind == "histogram":
+                value = value.snapshot()
+            samples.append((name, kind, help_text, labels, value))
+        return samples
+
+    def snapshot(self):
+        """
+        Relevé des mesures : dictionnaire (nom sans préfixe, étiquettes) -> valeur.
+        """
+        start = len(self.prefix)
+        return {(name[start:], labels): value for name, _, _, labels, value in self.collect()}
+
+    def prometheus_text(self):
+        """
+        Mesures au format texte d'exposition de Prometheus.
+        """
+        lines = []
+        declared = set()
+        for name, kind, help_text, labels, value in sorted(self.collect(), key=lambda sample: sample[0]):
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {float(value):.9g}")
+                continue
+            cumulative = 0
+            for bound, count in zip(value.buckets, value.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', f'{bound:.9g}'),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {sum(value.counts)}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {value.sum:.9g}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """
+        Écrit les mesures dans un fichier (collecteur « textfile » de
+        node_exporter) ; le remplacement est atomique.
+        """
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(temporary, path)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+class MetricsExporter:
+    def __init__(self, registry, path=None, port=None, host="127.0.0.1", interval=5.0):
+        """
+        Exporte un registre vers un fichier texte réécrit périodiquement et/ou
+        un point d'accès HTTP local (http://host:port/metrics).
+
+        Args:
+            registry: MetricsRegistry exporté.
+            path: Fichier texte (None : pas d'export fichier).
+            port: Port HTTP (None : pas de serveur ; 0 : port libre choisi par le système).
+            host: Adresse d'écoute du serveur.
+            interval: Période de réécriture du fichier en secondes.
+        """
+        self.registry = registry
+        self.path = path
+        self.port = port
+        self.host = host
+        self.interval = interval
+        self._server = None
+        self._threads = []
+        self._stop_event = threading.Event()
+
+    @property
+    def url(self):
+        if self._server is None:
+            return None
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def start(self):
+        """
+        Démarre le serveur et/ou l'écriture périodique du fichier.
+        """
+        self._stop_event.clear()
+        if self.port is not None:
+            # Import différé : le module reste léger pour les classes qui n'exportent rien
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+            registry = self.registry
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] not in ("/", "/metrics"):
+                        self.send_error(404)
+                        return
+                    body = registry.prometheus_text().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+            self._server.daemon_threads = True
+            self.port = self._server.server_address[1]
+            self._threads.append(threading.Thread(target=self._server.serve_forever, name="MetricsHTTP",
+                                                  daemon=True))
+        if self.path is not None:
+            self._threads.append(threading.Thread(target=self._write_loop, name="MetricsFile", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        """
+        Arrête l'export (le fichier est écrit une dernière fois).
+        """
+        self._stop_event.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self._threads = []
+
+    def _write_loop(self):
+        while True:
+            try:
+                self.registry.write_textfile(self.path)
+            except OSError as e:
+                print(f"Erreur lors de l'écriture des mesures : {e}")
+            if self._stop_event.wait(self.interval):
+                break
+        try:
+            self.registry.write_textfile(self.path)
+        except OSError:
+            pass
+
+
+def exporter_from_env(registry, port_offset=0, file_suffix=""):
+    """
+    Exporteur configuré par l'environnement : MOTOR_METRICS_PORT (serveur HTTP)
+    et MOTOR_METRICS_FILE (fichier texte).
+
+    Args:
+        registry: MetricsRegistry exporté.
+        port_offset: Décalage du port (processus de contrôle séparé).
+        file_suffix: Suffixe inséré avant l'extension du fichier.
+
+    Returns:
+        Un MetricsExporter démarré, ou None si aucun export n'est demandé.
+    """
+    port = os.environ.get("MOTOR_METRICS_PORT", "").strip()
+    path = os.environ.get("MOTOR_METRICS_FILE", "").strip()
+    if not port and not path:
+        return None
+    if path and file_suffix:
+        root, extension = os.path.splitext(path)
+        path = f"{root}{file_suffix}{extension}"
+    try:
+        return MetricsExporter(registry, path=path or None,
+                               port=int(port) + port_offset if port else None).start()
+    except (OSError, ValueError) as e:
+        print(f"Erreur lors du démarrage de l'export des mesures : {e}")
+        return None
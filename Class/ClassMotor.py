@@ -1,8 +1,17 @@
-from telemetrix import telemetrix
+import sys
+import threading
 import time
 
+from Class.ClassEncoderIngest import EncoderEventQueue
+from Class.ClassOutputStage import OutputStage
+from Class.ClassPidController import PIDController, PIDLoop
+from Class.ClassPositionControl import PositionLoop
+from Class.ClassSimulatedBoard import SIMULATED_GAINS, SimulatedTelemetrix, open_board
+from Class.ClassTelemetryRecorder import TelemetryRecorder
+
 class Motor:
-    def __init__(self, board, pwm_pin, dir_pin, encoder_pin_a, encoder_pin_b, ticks_per_revolution=12):
+    def __init__(self, board, pwm_pin, dir_pin, encoder_pin_a, encoder_pin_b, ticks_per_revolution=12,
+                 telemetry=None, min_window_counts=4, scheduler=None, output_interval=0.02):
         """
         Initialise le moteur avec les broches et les paramètres nécessaires.
         
@@ -11,8 +20,15 @@ class Motor:
             pwm_pin: Broche PWM pour la vitesse.
             dir_pin: Broche direction.
             encoder_pin_a: Broche A de l'encodeur.
-            encoder_pin_b: Broche B de l'encodeur (optionnel pour ce cas).
+            encoder_pin_b: Broche B de l'encodeur (None si non câblée).
             ticks_per_revolution: Nombre de ticks pour un tour complet.
+            telemetry: TelemetryBuffer optionnel partagé avec l'interface et l'enregistreur.
+            min_window_counts: Nombre minimal de fronts dans la fenêtre pour utiliser
+                l'estimation par comptage plutôt que par période.
+            scheduler: ControlScheduler optionnel partagé avec les autres moteurs
+                de la carte (voir BoardManager) ; sinon la boucle a son propre thread.
+            output_interval: Intervalle minimal (s) entre deux commandes manuelles
+                (start) envoyées à la carte ; les valeurs intermédiaires sont ignorées.
         """
         self.board = board
         self.pwm_pin = pwm_pin
@@ -20,57 +36,491 @@ class Motor:
         self.encoder_pin_a = encoder_pin_a
         self.encoder_pin_b = encoder_pin_b
         self.ticks_per_revolution = ticks_per_revolution
-        self.encoder_count = 0
+        self.telemetry = telemetry
+        self.recorder = None
+
+        # Écritures vers la carte : valeurs inchangées ignorées, commandes manuelles regroupées
+        self.output = OutputStage(board, min_interval=output_interval)
+
+        # Fronts de l'encodeur mis en file puis décodés par lots (quadrature, 4 comptes par impulsion)
+        self.counts_per_revolution = 4 * ticks_per_revolution
+        self.encoder = EncoderEventQueue(encoder_pin_a, encoder_pin_b)
+
+        # Estimation de vitesse par horodatage des fronts
+        self.min_window_counts = min_window_counts
+        self.clock = getattr(board, "clock", time.time)
+        self._window_edge = (0, None)
+        self.speed_estimate = 0.0
+        self.speed_time = None  # Instant (horloge de la carte) auquel se rapporte speed_estimate
+        self.speed_mode = "count"
+
+        self.pwm = 0  # Signé en mode position (le signe est celui de la broche de direction)
+        self.setpoint = 0.0
+
+        # Régulation de vitesse (boucle fermée)
+        self.pid = PIDController(output_min=0, output_max=255)
+        self.control_loop = None
+        self.scheduler = scheduler
+        self.feedforward = None  # Commande anticipée optionnelle (voir ClassTrajectory)
+
+        # Mode position (voir ClassPositionControl) : bilan du dernier déplacement terminé
+        self.last_move = None
+        self.move_count = 0
+
+        # Observateur de vitesse optionnel (voir ClassSpeedObserver) ; None : fenêtre de comptage
+        self.observer = None
+        self.acceleration_estimate = 0.0
+        self._observer_lock = threading.Lock()
+
+        # Chien de garde optionnel (voir ClassWatchdog) : après un déclenchement,
+        # les sorties restent bloquées jusqu'à son réarmement
+        self.watchdog = None
 
         # Initialisation des broches
         self.board.set_pin_mode_digital_output(dir_pin)
         self.board.set_pin_mode_analog_output(pwm_pin)
-        self.board.set_pin_mode_digital_input(encoder_pin_a, callback=self.encoder_callback)
-        
+        # Le callback est directement l'ajout dans la file : aucun calcul par front
+        self.board.set_pin_mode_digital_input(encoder_pin_a, callback=self.encoder.push)
+        if encoder_pin_b is not None:
+            self.board.set_pin_mode_digital_input(encoder_pin_b, callback=self.encoder.push)
+
         print(f"Moteur initialisé avec PWM={pwm_pin}, DIR={dir_pin}, Encoder A={encoder_pin_a}, B={encoder_pin_b}")
 
     def encoder_callback(self, data):
         """
-        Callback pour gérer les interruptions du signal A de l'encodeur.
+        Callback pour les fronts des signaux A et B de l'encodeur.
+
+        Le front est simplement mis en file ; le décodage se fait par lots.
+
+        Args:
+            data: [type de rapport, broche, valeur, horodatage] fourni par telemetrix.
+        """
+        self.encoder.push(data)
+
+    @property
+    def encoder_count(self):
+        """
+        Nombre d'impulsions (signé) depuis la dernière remise à zéro.
+        """
+        return self.encoder.read() / 4
+
+    @encoder_count.setter
+    def encoder_count(self, value):
+        self.encoder.reset(int(round(value * 4)))
+
+    def read_and_reset_count(self):
+        """
+        Lit le nombre d'impulsions et remet le compteur à zéro de manière atomique.
+        """
+        return self.encoder.read(reset=True) / 4
+
+    @property
+    def position_counts(self):
+        """
+        Position signée continue en comptes de quadrature.
         """
-        self.encoder_count += 0.5  # Incrementer selon les fronts détectés , il faut uniquement compter les fronts montants donc +0.5 par front
+        return self.encoder.position
+
+    @property
+    def direction(self):
+        return self.encoder.direction
+
+    def counts_to_rpm(self, counts, time_interval):
+        """
+        Convertit un nombre de fronts sur une durée en vitesse (RPM).
+        """
+        return counts / self.counts_per_revolution / time_interval * 60
+
+    def estimate_speed(self):
+        """
+        Estime la vitesse (RPM signée) depuis l'appel précédent.
+
+        À vitesse élevée, les fronts reçus pendant la fenêtre sont comptés et
+        divisés par le temps exact séparant le dernier front de cette fenêtre de
+        celui de la fenêtre précédente. À basse vitesse (trop peu de fronts), la
+        vitesse est déduite de la période du dernier cycle complet de quadrature,
+        puis bornée par le temps écoulé depuis le dernier front lorsque le moteur
+        ralentit ou s'arrête.
+
+        Si un observateur est installé (set_observer), il remplace ce calcul et
+        fournit aussi l'accélération (acceleration_estimate).
+
+        Returns:
+            La vitesse estimée en RPM.
+        """
+        observer = self.observer
+        if observer is not None:
+            return self._observe_speed(observer)
+
+        _, (count, timestamp), history = self.encoder.snapshot()
+        window_count, window_timestamp = self._window_edge
+        self._window_edge = (count, timestamp)
+        counts = count - window_count
+
+        if abs(counts) >= self.min_window_counts and window_timestamp is not None and timestamp > window_timestamp:
+            self.speed_mode = "count"
+            self.speed_estimate = self.counts_to_rpm(counts, timestamp - window_timestamp)
+            self.speed_time = timestamp
+            return self.speed_estimate
+
+        self.speed_mode = "period"
+        self.speed_time = self.clock()  # Vitesse bornée par le temps écoulé jusqu'à maintenant
+        if timestamp is None or len(history) < 2:
+            self.speed_estimate = 0.0
+            return self.speed_estimate
+
+        (first_count, first_time), (last_count, last_time) = history[0], history[-1]
+        if last_time <= first_time or last_count == first_count:
+            self.speed_estimate = 0.0
+            return self.speed_estimate
+        rpm = self.counts_to_rpm(last_count - first_count, last_time - first_time)
+
+        # Si aucun front n'arrive depuis plus longtemps que la période, le moteur ralentit
+        elapsed = self.clock() - last_time
+        bound = self.counts_to_rpm(1, elapsed) if elapsed > 0 else abs(rpm)
+        if abs(rpm) > bound:
+            rpm = bound if rpm > 0 else -bound
+        if bound < self.counts_to_rpm(1, 1.0):
+            rpm = 0.0  # Moins d'un front par seconde : considéré à l'arrêt
+        self.speed_estimate = rpm
+        return rpm
+
+    def _observe_speed(self, observer):
+        # Verrou : la boucle PID et l'acquisition peuvent lire la vitesse en parallèle
+        with self._observer_lock:
+            _, (count, timestamp), _ = self.encoder.snapshot()
+            now = self.clock()
+            rpm, acceleration = observer.update(count, timestamp, now, self.pwm)
+        self.speed_mode = "observer"
+        self.speed_time = now
+        self.speed_estimate = rpm
+        self.acceleration_estimate = acceleration
+        return rpm
+
+    def set_observer(self, observer):
+        """
+        Installe un observateur de vitesse (ou None pour revenir à la fenêtre de comptage).
+        """
+        with self._observer_lock:
+            if observer is not None:
+                observer.reset()
+            self.observer = observer
+            self.acceleration_estimate = 0.0
+
+    def measurement_time(self):
+        """
+        Instant de la dernière estimation de vitesse (pour la dérivée du PID).
+        """
+        return self.speed_time
+
+    def observed_acceleration(self):
+        """
+        Accélération estimée par l'observateur (RPM/s), ou None sans observateur.
+        """
+        return self.acceleration_estimate if self.observer is not None else None
 
     def start(self, speed=255):
         """
         Démarre le moteur avec une vitesse donnée.
         """
-        if 0 <= speed <= 255:
-            self.board.digital_write(self.dir_pin, 1)
-            self.board.analog_write(self.pwm_pin, speed)
+        if self.output.inhibited:
+            print("Erreur : chien de garde déclenché, le réarmer avant de démarrer le moteur.")
+        elif 0 <= speed <= 255:
+            self.output.digital_write(self.dir_pin, 1, coalesce=True)
+            self.output.analog_write(self.pwm_pin, speed, coalesce=True)
+            self.pwm = speed
             print(f"Moteur démarré à vitesse : {speed}")
         else:
             print("Erreur : La vitesse doit être entre 0 et 255.")
 
+    def apply_pwm(self, speed):
+        """
+        Applique une commande PWM (0-255) sans message, pour la boucle de régulation.
+        """
+        speed = min(max(int(speed), 0), 255)
+        self.output.analog_write(self.pwm_pin, speed)
+        if not self.output.inhibited:
+            self.pwm = speed
+
+    def apply_drive(self, command):
+        """
+        Applique une commande signée (-255 à 255) sans message : le signe fixe la
+        broche de direction, la valeur absolue le PWM (boucle de position).
+        """
+        command = min(max(int(command), -255), 255)
+        self.output.digital_write(self.dir_pin, 1 if command >= 0 else 0)
+        self.output.analog_write(self.pwm_pin, abs(command))
+        if not self.output.inhibited:
+            self.pwm = command
+
     def stop(self):
         """
-        Arrête le moteur.
+        Arrête le moteur (écritures forcées, même si la carte est supposée déjà à 0).
         """
-        self.board.analog_write(self.pwm_pin, 0)
-        self.board.digital_write(self.dir_pin, 0)
+        self.stop_control()
+        self.output.analog_write(self.pwm_pin, 0, force=True)
+        self.pwm = 0
+        self.output.digital_write(self.dir_pin, 0, force=True)
         print("Moteur arrêté.")
 
-    def measure_speed(self, measurement_time=1):
+    def set_pid_parameters(self, kp, ki, kd):
+        """
+        Met à jour les gains du régulateur de vitesse (possible en cours de régulation).
+        """
+        self.pid.set_gains(kp, ki, kd)
+        loop = self.control_loop
+        if loop is not None and loop.controller is not self.pid:
+            loop.controller.set_gains(kp, ki, kd)  # PID de vitesse de la boucle de position
+
+    def set_gain_schedule(self, schedule):
+        """
+        Active (GainSchedule, voir ClassGainSchedule) ou désactive (None) la
+        table de gains du régulateur de vitesse, y compris en cours de régulation.
+        """
+        self.pid.set_schedule(schedule)
+        loop = self.control_loop
+        if loop is not None and loop.controller is not self.pid:
+            loop.controller.set_schedule(schedule)
+
+    @property
+    def gain_schedule(self):
+        return self.pid.schedule
+
+    def set_setpoint(self, rpm):
+        """
+        Modifie la consigne de vitesse (RPM) de la boucle de régulation.
+        """
+        self.setpoint = float(rpm)
+        if self.control_loop is not None:
+            self.control_loop.set_setpoint(rpm)
+
+    def start_control(self, measure, setpoint=None, rate_hz=500, measure_time=None):
+        """
+        Démarre la régulation de vitesse en boucle fermée.
+
+        Args:
+            measure: Fonction sans argument retournant la vitesse mesurée (RPM).
+            setpoint: Consigne initiale en RPM (la dernière consigne si None).
+            rate_hz: Fréquence de la boucle de régulation en Hz (celle du
+                scheduler commun s'il y en a un).
+            measure_time: Fonction retournant l'instant de la dernière mesure ;
+                avec estimate_speed (estimation à chaque période, horodatée par
+                les fronts), measurement_time est utilisée par défaut.
+
+        Returns:
+            L'instance de PIDLoop en cours d'exécution.
+        """
+        self.stop_control()
+        if measure_time is None and measure == self.estimate_speed:
+            measure_time = self.measurement_time
+        if self.output.inhibited:
+            raise RuntimeError("Chien de garde déclenché : le réarmer avant de démarrer la régulation.")
+        if setpoint is not None:
+            self.setpoint = float(setpoint)
+        self.output.digital_write(self.dir_pin, 1)
+        self.control_loop = PIDLoop(self, self.pid, measure, rate_hz=rate_hz, telemetry=self.telemetry,
+                                    feedforward=self.feedforward, measure_rate=self.observed_acceleration,
+                                    scheduler=self.scheduler, measure_time=measure_time)
+        self.control_loop.set_setpoint(self.setpoint)
+        self.control_loop.start()
+        print(f"Régulation démarrée à {rate_hz} Hz, consigne : {self.control_loop.setpoint} RPM")
+        return self.control_loop
+
+    def start_position_control(self, target=None, rate_hz=1000, on_complete=None, **options):
+        """
+        Démarre la régulation de position en cascade (position puis vitesse).
+
+        Le PID de vitesse de la cascade reprend les gains (et la table de gains)
+        du régulateur de vitesse, avec une sortie signée, ainsi que la commande
+        anticipée (set_feedforward) : avec le modèle identifié, la décélération
+        du profil freine activement et le dépassement disparaît. La position est
+        la position continue de l'encodeur (position_counts) ; sans cible, la
+        position courante est maintenue.
+
+        Args:
+            target: Cible initiale en comptes (None : maintien sur place).
+            rate_hz: Fréquence de la boucle en Hz (celle du scheduler commun s'il y en a un).
+            on_complete: Fonction optionnelle appelée avec le MoveResult de chaque déplacement.
+            options: Options de PositionLoop (window, max_speed, max_acceleration...).
+
+        Returns:
+            L'instance de PositionLoop en cours d'exécution.
+        """
+        self.stop_control()
+        if self.output.inhibited:
+            raise RuntimeError("Chien de garde déclenché : le réarmer avant de démarrer la régulation.")
+        pid = self.pid
+        if pid.kp == pid.ki == pid.kd == 0 and pid.schedule is None:
+            raise ValueError("Régler le PID de vitesse avant le mode position.")
+        controller = PIDController(pid.kp, pid.ki, pid.kd, output_min=-pid.output_max, output_max=pid.output_max,
+                                   derivative_filter=pid.derivative_filter)
+        controller.set_schedule(pid.schedule)
+
+        def completed(result):
+            self.last_move = result
+            self.move_count += 1
+            if on_complete is not None:
+                on_complete(result)
+
+        self.control_loop = PositionLoop(self, controller, self.estimate_speed, lambda: self.encoder.position,
+                                         self.counts_per_revolution, rate_hz=rate_hz, telemetry=self.telemetry,
+                                         scheduler=self.scheduler, on_complete=completed,
+                                         measure_time=self.measurement_time,
+                                         **{"feedforward": self.feedforward, **options})
+        self.control_loop.start()
+        if target is not None:
+            self.control_loop.move_to(target)
+        print(f"Régulation de position démarrée à {self.control_loop.rate_hz:g} Hz")
+        return self.control_loop
+
+    @property
+    def position_mode(self):
+        return isinstance(self.control_loop, PositionLoop)
+
+    def move_to(self, target, on_complete=None):
+        """
+        Déplace le moteur vers une position en comptes (mode position démarré si besoin).
+        """
+        if not self.position_mode:
+            self.start_position_control()
+        self.control_loop.move_to(target, on_complete)
+
+    def move_by(self, counts, on_complete=None):
+        """
+        Déplacement relatif en comptes, depuis la cible courante (ou la position si aucune).
+        """
+        loop = self.control_loop
+        origin = loop.target if self.position_mode and loop.target is not None else self.position_counts
+        self.move_to(origin + counts, on_complete)
+
+    def revolutions_to_counts(self, revolutions):
+        """
+        Convertit des tours (ou un angle / 360) en comptes de quadrature.
+        """
+        return int(round(revolutions * self.counts_per_revolution))
+
+    def set_feedforward(self, feedforward):
+        """
+        Active (fonction consigne, dérivée -> PWM, voir VelocityFeedforward) ou
+        désactive (None) la commande anticipée, y compris en cours de régulation.
+        """
+        self.feedforward = feedforward
+        if self.control_loop is not None:
+            self.control_loop.feedforward = feedforward
+
+    def follow_trajectory(self, trajectory, on_complete=None):
+        """
+        Fait suivre un profil de consigne (Trajectory) à la boucle de régulation en cours.
+        """
+        if self.control_loop is None:
+            raise RuntimeError("La régulation doit être démarrée pour suivre un profil.")
+        self.setpoint = trajectory.final
+        self.control_loop.follow(trajectory, on_complete)
+
+    def stop_control(self):
+        """
+        Arrête la boucle de régulation si elle tourne.
+        """
+        if self.control_loop is not None:
+            self.control_loop.stop()
+            self.control_loop = None
+
+    def start_recording(self, directory, **kwargs):
+        """
+        Démarre l'enregistrement sur disque de chaque échantillon (boucle PID ou acquisition).
+
+        Args:
+            directory: Dossier de la session.
+            kwargs: Options de TelemetryRecorder (les métadonnées fournies
+                complètent celles du moteur).
+
+        Returns:
+            L'instance de TelemetryRecorder.
+        """
+        self.stop_recording()
+        metadata = {"pwm_pin": self.pwm_pin, "dir_pin": self.dir_pin,
+                    "ticks_per_revolution": self.ticks_per_revolution}
+        metadata.update(kwargs.pop("metadata", None) or {})
+        self.recorder = TelemetryRecorder(directory, metadata=metadata, **kwargs).start()
+        return self.recorder
+
+    def stop_recording(self):
+        """
+        Arrête l'enregistrement en cours (les données restantes sont écrites).
+        """
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            recorder.close()
+
+    def register_metrics(self, registry, name=None):
+        """
+        Déclare les mesures du moteur (encodeur, boucle PID, étage de sortie)
+        dans un MetricsRegistry ; les valeurs sont lues à la collecte.
+
+        Args:
+            registry: MetricsRegistry recevant les mesures.
+            name: Étiquette « motor » des séries (nom du moteur ou M1 si None).
+        """
+        name = name or getattr(self, "name", None) or "M1"
+        encoder, output = self.encoder, self.output
+
+        def loop_value(attribute):
+            # La boucle est recréée à chaque démarrage : lue à la collecte
+            return lambda: getattr(self.control_loop, attribute, None)
+
+        registry.register("encoder_edges_total", "counter", "Fronts d'encodeur décodés.",
+                          lambda: encoder.edges_total, motor=name)
+        registry.register("encoder_dropped_edges_total", "counter", "Fronts d'encodeur manqués (estimés).",
+                          lambda: encoder.dropped_edges, motor=name)
+        registry.register("encoder_queue_depth", "gauge", "Événements d'encodeur en attente de décodage.",
+                          encoder.pending, motor=name)
+        registry.register("loop_period_seconds", "histogram", "Période mesurée de la boucle PID.",
+                          loop_value("period_histogram"), motor=name)
+        registry.register("loop_jitter_seconds", "gauge", "Écart type des dernières périodes de la boucle PID.",
+                          lambda: self.control_loop.stats()["jitter"] if self.control_loop is not None else None,
+                          motor=name)
+        registry.register("loop_overruns_total", "counter", "Dépassements d'échéance de la boucle PID.",
+                          loop_value("overruns"), motor=name)
+        for index, gain in enumerate(("kp", "ki", "kd")):
+            registry.register("pid_gain", "gauge", "Gains appliqués par le PID (table de gains comprise).",
+                              lambda index=index: self.pid.gains[index], gain=gain, motor=name)
+        registry.register("output_write_latency_seconds", "histogram",
+                          "Durée d'un appel d'écriture vers la carte (file d'écritures comprise).",
+                          lambda: output.latency_histogram, motor=name)
+        registry.register("output_pending_writes", "gauge", "Écritures regroupées en attente d'échéance.",
+                          lambda: output.stats()["pending"], motor=name)
+        registry.register("output_writes_total", "counter", "Écritures envoyées à la carte.",
+                          lambda: output.sent, motor=name)
+        registry.register("output_suppressed_writes_total", "counter", "Écritures évitées (inchangées ou regroupées).",
+                          lambda: output.suppressed + output.coalesced, motor=name)
+        registry.register("output_cancelled_writes_total", "counter",
+                          "Écritures en attente abandonnées (écriture directe ou forcée, inhibition).",
+                          lambda: output.cancelled, motor=name)
+        registry.register("cpu_seconds_total", "counter", "Temps CPU par sous-système.",
+                          loop_value("cpu_time"), subsystem="control", motor=name)
+        registry.register("cpu_seconds_total", "counter", "Temps CPU par sous-système.",
+                          lambda: encoder.cpu_time, subsystem="encoder", motor=name)
+
+    def measure_speed(self, measurement_time=1, verbose=True):
         """
         Mesure la vitesse du moteur (RPM) sur une durée donnée.
         
         Args:
             measurement_time: Durée de la mesure en secondes.
+            verbose: Si False, aucun message n'est affiché.
         
         Returns:
             La vitesse calculée en RPM.
         """
-        print(f"Mesure de la vitesse pendant {measurement_time} seconde(s)...")
-        self.encoder_count = 0
+        if verbose:
+            print(f"Mesure de la vitesse pendant {measurement_time} seconde(s)...")
+        self.encoder.reset()
         time.sleep(measurement_time)
-        impulsions = self.encoder_count
+        impulsions = self.read_and_reset_count()
         rpm = self.calculate_speed(impulsions, measurement_time)
-        print(f"Nombre d'impulsions : {impulsions}")
-        print(f"Vitesse calculée : {rpm:.2f} RPM")
+        if verbose:
+            print(f"Nombre d'impulsions : {impulsions}")
+            print(f"Vitesse calculée : {rpm:.2f} RPM")
         return rpm
 
     def calculate_speed(self, impulsions, time_interval):
@@ -86,14 +536,29 @@ class Motor:
         return rpm
 
 
-def main():
+def main(simulated=None, interactive=False):
     """
     Programme principal pour contrôler le moteur et lire les impulsions.
+
+    Par défaut, le moteur est piloté par le serveur de commandes JSON (voir
+    ClassMotorServer, options --host, --port et --unix) ; l'invite de commandes
+    reste disponible avec --interactive.
+
+    Args:
+        simulated: True pour utiliser la carte simulée (voir open_board).
+        interactive: True pour l'invite de commandes au clavier.
     """
     print("Connexion à l'Arduino...")
-    board = telemetrix.Telemetrix()
+    board = open_board(simulated)
 
     try:
+        if not interactive:
+            from Class.ClassMotorServer import serve_motor, server_options
+
+            serve_motor(board, dict(pwm_pin=3, dir_pin=12, encoder_pin_a=2, encoder_pin_b=7,
+                                    ticks_per_revolution=12), **server_options(sys.argv))
+            return
+
         motor = Motor(
             board=board,
             pwm_pin=3,
@@ -102,9 +567,14 @@ def main():
             encoder_pin_b=7,
             ticks_per_revolution=12
         )
+        if isinstance(board, SimulatedTelemetrix):
+            # Gains réglés pour le moteur simulé ; sur un vrai moteur, les régler avec 'gains'
+            motor.set_pid_parameters(*SIMULATED_GAINS)
+        # L'invite bloque sur input() : la file de l'encodeur est vidée en arrière-plan
+        motor.encoder.start_draining()
 
         while True:
-            command = input("Entrez 'start', 'stop', 'speed', ou 'quit' : ").strip().lower()
+            command = input("Entrez 'start', 'stop', 'speed', 'gains', 'position' ou 'quit' : ").strip().lower()
             if command == 'start':
                 speed = int(input("Entrez la vitesse du moteur (0-255) : "))
                 motor.start(speed=speed)
@@ -112,15 +582,33 @@ def main():
                 motor.stop()
             elif command == 'speed':
                 motor.measure_speed(measurement_time=1)
+            elif command == 'gains':
+                try:
+                    kp, ki, kd = (float(value) for value in input("Entrez les gains kp ki kd : ").split())
+                except ValueError:
+                    print("Erreur : entrer trois nombres séparés par des espaces.")
+                    continue
+                motor.set_pid_parameters(kp, ki, kd)
+            elif command == 'position':
+                if motor.pid.kp == motor.pid.ki == 0:
+                    print("Gains PID nuls : les régler d'abord avec 'gains'.")
+                    continue
+                revolutions = float(input("Entrez la position visée (tours) : "))
+                motor.move_to(motor.revolutions_to_counts(revolutions),
+                              on_complete=lambda result: print(
+                                  f"En position : {result.position} comptes (écart {result.error}), "
+                                  f"déplacement {result.move_time * 1000:.0f} ms, "
+                                  f"stabilisation {result.settle_time * 1000:.0f} ms"))
             elif command == 'quit':
                 motor.stop() #arrête le moteur avant d'arrêter le programme
                 print("Arrêt du programme.")
                 break
             else:
-                print("Commande non reconnue. Essayez 'start', 'stop', 'speed', ou 'quit'.")
+                print("Commande non reconnue. Essayez 'start', 'stop', 'speed', 'gains', 'position' ou 'quit'.")
+        motor.encoder.stop_draining()
     finally:
         board.shutdown()
         print("Connexion à l'Arduino terminée.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(simulated=True if "--simulate" in sys.argv else None, interactive="--interactive" in sys.argv)
\ No newline at end of file
@@ -0,0 +1,394 @@
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from Class.ClassPositionControl import MoveResult
+from Class.ClassTelemetryBuffer import SequenceLock, TelemetryBuffer
+
+# Bloc d'état écrit par le processus de contrôle, placé avant le tampon de télémétrie
+# (« sequence » : compteur du SequenceLock qui encadre chaque mise à jour)
+STATUS_FIELDS = ("sequence", "alive", "loop_running", "target_period", "mean_period", "jitter",
+                 "max_deviation", "overruns", "ticks", "pwm", "setpoint", "acceleration",
+                 "writes_sent", "writes_suppressed", "writes_coalesced", "writes_cancelled", "watchdog_tripped", "watchdog_trips",
+                 "position_mode", "position", "position_target", "moves")
+# Bilan du dernier déplacement du mode position, dans l'ordre des champs de MoveResult
+MOVE_FIELDS = ("move_target", "move_position", "move_error", "move_overshoot", "move_time", "move_settle_time")
+STATUS_FIELDS += MOVE_FIELDS
+STATUS_INDEX = {name: i for i, name in enumerate(STATUS_FIELDS)}
+STATUS_BYTES = len(STATUS_FIELDS) * 8
+
+
+def _write_status(status, motor):
+    with SequenceLock(status, STATUS_INDEX["sequence"]):
+        _fill_status(status, motor)
+
+
+def _fill_status(status, motor):
+    loop = motor.control_loop
+    status[STATUS_INDEX["loop_running"]] = 1.0 if loop is not None else 0.0
+    if loop is not None:
+        stats = loop.stats()
+        for name in ("target_period", "mean_period", "jitter", "max_deviation", "overruns", "ticks"):
+            status[STATUS_INDEX[name]] = stats[name]
+    status[STATUS_INDEX["pwm"]] = motor.pwm
+    status[STATUS_INDEX["setpoint"]] = motor.setpoint
+    status[STATUS_INDEX["acceleration"]] = motor.acceleration_estimate
+    output = motor.output.stats()
+    for name in ("sent", "suppressed", "coalesced", "cancelled"):
+        status[STATUS_INDEX["writes_" + name]] = output[name]
+    watchdog = motor.watchdog
+    if watchdog is not None:
+        status[STATUS_INDEX["watchdog_tripped"]] = 1.0 if watchdog.tripped else 0.0
+        status[STATUS_INDEX["watchdog_trips"]] = watchdog.trip_count
+    status[STATUS_INDEX["position_mode"]] = 1.0 if motor.position_mode else 0.0
+    status[STATUS_INDEX["position"]] = motor.position_counts
+    target = getattr(loop, "target", None)
+    status[STATUS_INDEX["position_target"]] = target if target is not None else motor.position_counts
+    result = motor.last_move
+    if result is not None:
+        for name, value in zip(MOVE_FIELDS, result):
+            status[STATUS_INDEX[name]] = value
+        status[STATUS_INDEX["moves"]] = motor.move_count
+
+
+def _worker_main(shm_name, capacity, motor_config, connection, sample_rate, simulated, watchdog_options):
+    """
+    Point d'entrée du processus de contrôle : carte, moteur, acquisition et boucle PID.
+    """
+    # Imports dans le processus fils : la carte et le moteur n'existent que de ce côté
+    from Class.ClassBoardConnection import connect_board
+    from Class.ClassMetrics import MetricsRegistry, exporter_from_env
+    from Class.ClassMotor import Motor
+    from Class.ClassSpeedAcquisition import SpeedAcquisition
+    from Class.ClassWatchdog import Watchdog
+
+    # Le processus fils partage le resource_tracker du parent : seul le parent libère le bloc
+    shm = shared_memory.SharedMemory(name=shm_name)
+    status = np.ndarray((STATUS_BYTES // 8,), dtype=np.float64, buffer=shm.buf)
+    telemetry = TelemetryBuffer(capacity, buffer=shm.buf[STATUS_BYTES:])
+
+    board = connect_board(simulated)
+    motor = Motor(board=board, telemetry=telemetry, **motor_config)
+    acquisition = SpeedAcquisition(motor, sample_rate=sample_rate)
+    acquisition.record_open_loop(telemetry)
+    acquisition.start()
+    watchdog = Watchdog(motor, **watchdog_options).start()
+
+    # Mesures du processus de contrôle : port MOTOR_METRICS_PORT + 1, fichier *.control.prom
+    metrics = MetricsRegistry()
+    motor.register_metrics(metrics)
+    acquisition.register_metrics(metrics)
+    watchdog.register_metrics(metrics)
+    exporter = exporter_from_env(metrics, port_offset=1, file_suffix=".control")
+
+    commands = {
+        "start": motor.start,
+        "stop": motor.stop,
+        "set_setpoint": motor.set_setpoint,
+        "set_pid_parameters": motor.set_pid_parameters,
+        "set_gain_schedule": motor.set_gain_schedule,
+        # La boucle estime la vitesse à chaque période (fronts horodatés ou observateur)
+        "start_control": lambda setpoint, rate_hz: motor.start_control(
+            motor.estimate_speed, setpoint=setpoint, rate_hz=rate_hz),
+        "stop_control": motor.stop_control,
+        "set_feedforward": motor.set_feedforward,
+        "follow_trajectory": motor.follow_trajectory,
+        "start_position_control": lambda rate_hz, options: motor.start_position_control(rate_hz=rate_hz, **options),
+        "move_to": motor.move_to,
+        "set_observer": motor.set_observer,
+        "set_sample_rate": acquisition.set_sample_rate,
+        "start_recording": motor.start_recording,
+        "stop_recording": motor.stop_recording,
+        "reset_watchdog": watchdog.reset,
+    }
+
+    with SequenceLock(status, STATUS_INDEX["sequence"]):
+        status[STATUS_INDEX["alive"]] = 1.0
+    try:
+        while True:
+            if connection.poll(0.02):
+                command, args = connection.recv()
+                if command == "quit":
+                    break
+                try:
+                    commands[command](*args)
+                except Exception as e:
+                    print(f"Erreur dans le processus de contrôle ({command}) : {e}")
+            _write_status(status, motor)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        watchdog.stop()
+        motor.stop()
+        motor.stop_recording()
+        acquisition.stop()
+        if exporter is not None:
+            exporter.stop()
+        board.shutdown()
+        with SequenceLock(status, STATUS_INDEX["sequence"]):
+            status[STATUS_INDEX["alive"]] = 0.0
+
+
+class RemoteLoopStatus:
+    def __init__(self, status):
+        """
+        Statistiques de la boucle PID du processus de contrôle (copie cohérente du bloc d'état).
+        """
+        self._status = status
+
+    def stats(self):
+        stats = {name: float(self._status[STATUS_INDEX[name]])
+                 for name in ("target_period", "mean_period", "jitter", "max_deviation")}
+        stats["overruns"] = int(self._status[STATUS_INDEX["overruns"]])
+        stats["ticks"] = int(self._status[STATUS_INDEX["ticks"]])
+        return stats
+
+
+class RemoteOutputStatus:
+    def __init__(self, status):
+        """
+        Compteurs de l'étage de sortie du processus de contrôle (copie cohérente du bloc d'état).
+        """
+        self._status = status
+
+    def stats(self):
+        stats = {name: int(self._status[STATUS_INDEX["writes_" + name]])
+                 for name in ("sent", "suppressed", "coalesced", "cancelled")}
+        requested = stats["sent"] + stats["suppressed"] + stats["coalesced"] + stats["cancelled"]
+        stats["pending"] = 0
+        stats["saved_ratio"] = (stats["suppressed"] + stats["coalesced"]) / requested if requested else 0.0
+        return stats
+
+
+class RemoteWatchdogStatus:
+    def __init__(self, status, send):
+        """
+        État du chien de garde du processus de contrôle (le détail des
+        déclenchements reste dans le processus fils).
+        """
+        self._status = status
+        self._send = send
+        self.trips = ()
+
+    @property
+    def tripped(self):
+        return bool(self._status[STATUS_INDEX["watchdog_tripped"]])
+
+    @property
+    def trip_count(self):
+        return int(self._status[STATUS_INDEX["watchdog_trips"]])
+
+    def reset(self):
+        self._send("reset_watchdog")
+
+
+class MotorProcess:
+    def __init__(self, motor_config, capacity=200000, rate_hz=500, sample_rate=50, simulated=None,
+                 watchdog_options=None):
+        """
+        Moteur piloté depuis un processus séparé.
+
+        Le processus fils possède la connexion à la carte, les callbacks de
+        l'encodeur, l'acquisition et la boucle PID : ni le GIL de l'interface ni un
+        rendu lourd ne peuvent retarder la régulation. La télémétrie revient par
+        un TelemetryBuffer en mémoire partagée (lecture sans copie côté interface)
+        et les commandes partent par un Pipe. Cette classe expose la même
+        interface que Motor pour les méthodes utilisées par l'interface.
+
+        Args:
+            motor_config: Arguments du constructeur de Motor (broches, ticks par tour).
+            capacity: Capacité du tampon de télémétrie partagé.
+            rate_hz: Fréquence par défaut de la boucle PID.
+            sample_rate: Fréquence de l'acquisition de vitesse.
+            simulated: Carte simulée ou non (voir open_board).
+            watchdog_options: Arguments du Watchdog du processus fils.
+        """
+        self.motor_config = dict(motor_config)
+        self.ticks_per_revolution = self.motor_config.get("ticks_per_revolution", 12)
+        self.capacity = capacity
+        self.rate_hz = rate_hz
+        self.sample_rate = sample_rate
+        self.simulated = simulated
+        self.watchdog_options = dict(watchdog_options or {})
+        self.gain_schedule = None  # Dernière table de gains envoyée au processus fils
+
+        size = STATUS_BYTES + TelemetryBuffer.required_bytes(capacity)
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._status = np.ndarray((STATUS_BYTES // 8,), dtype=np.float64, buffer=self._shm.buf)
+        self._status[:] = 0.0
+        self._status_lock = SequenceLock(self._status, STATUS_INDEX["sequence"])
+        self.telemetry = TelemetryBuffer(capacity, buffer=self._shm.buf[STATUS_BYTES:])
+        self._connection = None
+        self._process = None
+
+    def launch(self):
+        """
+        Démarre le processus de contrôle.
+        """
+        # « spawn » : un fork depuis un processus à plusieurs threads (interface,
+        # connexion en arrière-plan) peut hériter d'un verrou pris et bloquer le fils
+        context = multiprocessing.get_context("spawn")
+        parent_connection, child_connection = context.Pipe()
+        self._connection = parent_connection
+        self._process = context.Process(
+            target=_worker_main, name="MotorProcess", daemon=True,
+            args=(self._shm.name, self.capacity, self.motor_config, child_connection,
+                  self.sample_rate, self.simulated, self.watchdog_options))
+        self._process.start()
+        print(f"Processus de contrôle démarré (pid {self._process.pid}).")
+        return self
+
+    def is_alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    def _read_status(self):
+        # Copie du bloc d'état qu'aucune mise à jour du processus fils n'a coupée
+        return self._status_lock.read(self._status.copy)
+
+    def _status_value(self, name):
+        return self._read_status()[STATUS_INDEX[name]]
+
+    def _send(self, command, *args):
+        if self._connection is None:
+            raise RuntimeError("Le processus de contrôle n'est pas démarré.")
+        self._connection.send((command, args))
+
+    # === Interface équivalente à Motor ===
+
+    def start(self, speed=255):
+        self._send("start", speed)
+
+    def stop(self):
+        self._send("stop")
+
+    def set_setpoint(self, rpm):
+        self._send("set_setpoint", float(rpm))
+
+    def set_pid_parameters(self, kp, ki, kd):
+        self._send("set_pid_parameters", kp, ki, kd)
+
+    def set_gain_schedule(self, schedule):
+        """
+        Envoie la table de gains au processus fils (copiée une fois ; None la désactive).
+        """
+        self.gain_schedule = schedule
+        self._send("set_gain_schedule", schedule)
+
+    def start_control(self, measure=None, setpoint=None, rate_hz=None):
+        """
+        Démarre la régulation dans le processus fils (la mesure y est locale, `measure` est ignoré).
+        """
+        self._send("start_control", setpoint, rate_hz or self.rate_hz)
+
+    def stop_control(self):
+        self._send("stop_control")
+
+    def set_feedforward(self, feedforward):
+        self._send("set_feedforward", feedforward)
+
+    def follow_trajectory(self, trajectory, on_complete=None):
+        """
+        Envoie le profil au processus fils (les tableaux sont copiés une fois ; `on_complete` est ignoré).
+        """
+        self._send("follow_trajectory", trajectory)
+
+    def start_position_control(self, target=None, rate_hz=None, on_complete=None, **options):
+        """
+        Démarre la régulation de position dans le processus fils (`on_complete` est
+        ignoré : suivre move_count et last_move).
+        """
+        self._send("start_position_control", rate_hz or self.rate_hz, options)
+        if target is not None:
+            self.move_to(target)
+
+    def move_to(self, target, on_complete=None):
+        """
+        Déplacement vers une position en comptes (`on_complete` est ignoré : suivre move_count).
+        """
+        self._send("move_to", int(round(target)))
+
+    def move_by(self, counts, on_complete=None):
+        self.move_to(self._status_value("position_target") + counts)
+
+    def revolutions_to_counts(self, revolutions):
+        return int(round(revolutions * 4 * self.ticks_per_revolution))
+
+    def set_observer(self, observer):
+        self._send("set_observer", observer)
+
+    def set_sample_rate(self, sample_rate):
+        """
+        Fréquence de l'acquisition de vitesse du processus fils.
+        """
+        self._send("set_sample_rate", sample_rate)
+
+    def start_recording(self, directory):
+        self._send("start_recording", directory)
+
+    def stop_recording(self):
+        self._send("stop_recording")
+
+    @property
+    def control_loop(self):
+        status = self._read_status()
+        if status[STATUS_INDEX["loop_running"]]:
+            return RemoteLoopStatus(status)
+        return None
+
+    @property
+    def output(self):
+        return RemoteOutputStatus(self._read_status())
+
+    @property
+    def watchdog(self):
+        return RemoteWatchdogStatus(self._read_status(), self._send)
+
+    @property
+    def pwm(self):
+        return int(self._status_value("pwm"))
+
+    @property
+    def setpoint(self):
+        return float(self._status_value("setpoint"))
+
+    @property
+    def position_mode(self):
+        return bool(self._status_value("position_mode"))
+
+    @property
+    def position_counts(self):
+        return int(self._status_value("position"))
+
+    @property
+    def move_count(self):
+        return int(self._status_value("moves"))
+
+    @property
+    def last_move(self):
+        status = self._read_status()
+        if not status[STATUS_INDEX["moves"]]:
+            return None
+        values = [float(status[STATUS_INDEX[name]]) for name in MOVE_FIELDS]
+        return MoveResult(*(int(value) for value in values[:4]), *values[4:])
+
+    @property
+    def acceleration_estimate(self):
+        return float(self._status_value("acceleration"))
+
+    def close(self, timeout=3.0):
+        """
+        Arrête le moteur et le processus de contrôle, puis libère le bloc de mémoire partagée.
+        """
+        if self.is_alive():
+            try:
+                self._send("quit")
+            except (BrokenPipeError, OSError):
+                pass
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+        self._process = None
+        # Le nom est libéré ; la projection reste valide tant que des vues NumPy
+        # (self.telemetry, graphiques) y font référence.
+        self._shm.unlink()
@@ -0,0 +1,637 @@
+import asyncio
+import base64
+import functools
+import inspect
+import json
+import sys
+import time
+
+import numpy as np
+
+from Class.ClassMetrics import Histogram
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+STREAM_RATE = 50  # Trames de télémétrie par seconde
+MAX_CLIENT_BUFFER = 1 << 20  # Octets en attente au-delà desquels un client lent saute des trames
+TELEMETRY_CAPACITY = 200000
+# Encodage des voies dans les trames : tampon NumPy float64 en base64 (par défaut) ou liste JSON
+TELEMETRY_ENCODINGS = ("base64", "list")
+TELEMETRY_DTYPE = "<f8"
+
+
+def decode_telemetry(message):
+    """
+    Remplace, dans une trame de télémétrie, les voies encodées en base64 par des tableaux NumPy.
+    """
+    if message.get("encoding") == "base64":
+        dtype = np.dtype(message["dtype"])
+        for name in message["channels"]:
+            message[name] = np.frombuffer(base64.b64decode(message[name]), dtype=dtype)
+    return message
+
+
+class MotorServer:
+    def __init__(self, motor, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None,
+                 stream_rate=STREAM_RATE, rate_hz=500):
+        """
+        Serveur de commandes sans interface autour d'un Motor.
+
+        Les clients (TCP local ou socket Unix, plusieurs à la fois) envoient une
+        requête JSON par ligne, par exemple {"id": 1, "cmd": "setpoint", "rpm": 1500},
+        et reçoivent une réponse par ligne avec le même "id", le résultat et la
+        durée de traitement côté serveur. Les requêtes peuvent être envoyées
+        sans attendre les réponses (pipelining) : elles sont exécutées dans
+        l'ordre de réception, seules les mesures (commande "measure") et les
+        déplacements (commande "move") répondent à leur échéance sans bloquer
+        les suivantes. Les commandes qui attendent le moteur (start et stop :
+        arrêt du thread de régulation, écritures sur la carte) s'exécutent
+        dans un thread : elles ne retiennent que les requêtes suivantes du
+        même client, jamais la boucle asyncio ni les autres clients.
+
+        La télémétrie est diffusée depuis le TelemetryBuffer du moteur : à chaque
+        période de diffusion, les échantillons nouveaux sont copiés d'un bloc et
+        encodés une seule fois par jeu de voies, puis la même trame est écrite à
+        tous les abonnés. Chaque voie part en tampon NumPy (float64 en base64,
+        voir decode_telemetry) : rien n'est alloué par échantillon, ni côté
+        régulation (ni callback ni file) ni à l'encodage. Un client trop lent
+        saute des trames ; le champ "total" de chaque trame permet de détecter
+        les trous.
+
+        Commandes : ping, start (pwm), stop, setpoint (rpm, rate_hz), gains (kp,
+        ki, kd), schedule (table [[rpm, kp, ki, kd], ...] ou path d'un CSV,
+        variable ; sans table : gains fixes), measure (duration), move (counts
+        ou revolutions, relative, timeout : mode position), status,
+        subscribe (channels, encoding), unsubscribe, reset (réarme le chien de garde du
+        moteur), stats, shutdown.
+
+        Args:
+            motor: Instance de Motor pilotée (motor.telemetry est diffusé ; la
+                boucle PID mesure avec Motor.estimate_speed).
+            host: Adresse d'écoute TCP (None : pas de TCP).
+            port: Port TCP (0 : port libre choisi par le système).
+            unix_path: Chemin d'une socket Unix optionnelle.
+            stream_rate: Trames de télémétrie par seconde.
+            rate_hz: Fréquence de la boucle PID démarrée par "setpoint".
+        """
+        self.motor = motor
+        self.telemetry = motor.telemetry
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.stream_rate = stream_rate
+        self.rate_hz = rate_hz
+
+        self.requests = 0
+        self.errors = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.latency_histogram = Histogram()  # Durée de traitement des requêtes
+
+        self._clients = set()
+        self._handlers = set()  # Tâches des connexions clientes
+        self._subscribers = {}  # writer -> (voies diffusées, encodage)
+        self._tasks = set()
+        self._servers = []
+        self._shutdown = None
+        self._commands = {
+            "ping": self._ping,
+            "start": self._start,
+            "stop": self._stop,
+            "setpoint": self._setpoint,
+            "gains": self._gains,
+            "schedule": self._schedule,
+            "measure": self._measure,
+            "move": self._move,
+            "status": self._status,
+            "subscribe": self._subscribe,
+            "unsubscribe": self._unsubscribe,
+            "reset": self._reset,
+            "stats": self._stats,
+            "shutdown": self._request_shutdown,
+        }
+        # Commandes bloquantes exécutées dans un thread (voir _run_blocking)
+        self._blocking_commands = {"start", "stop"}
+
+    # === Cycle de vie ===
+
+    def run(self):
+        """
+        Exécute le serveur jusqu'à la commande "shutdown" ou Ctrl+C.
+        """
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+
+    async def serve(self, ready=None):
+        """
+        Coroutine principale : ouvre les sockets, diffuse la télémétrie et attend l'arrêt.
+
+        Args:
+            ready: Fonction optionnelle appelée (avec le serveur) une fois les sockets ouvertes.
+        """
+        self._shutdown = asyncio.Event()
+        if self.host is not None:
+            server = await asyncio.start_server(self._handle_client, self.host, self.port)
+            self.port = server.sockets[0].getsockname()[1]
+            self._servers.append(server)
+            print(f"Serveur de commandes en écoute sur {self.host}:{self.port} (JSON par ligne)")
+        if self.unix_path is not None:
+            self._servers.append(await asyncio.start_unix_server(self._handle_client, self.unix_path))
+            print(f"Serveur de commandes en écoute sur {self.unix_path}")
+        if not self._servers:
+            raise ValueError("Aucune adresse d'écoute (host ou unix_path).")
+
+        streamer = asyncio.create_task(self._stream())
+        if ready is not None:
+            ready(self)
+        try:
+            await self._shutdown.wait()
+        finally:
+            streamer.cancel()
+            for server in self._servers:
+                server.close()
+            # Les mesures en cours répondent avant la fermeture des connexions
+            if self._tasks:
+                await asyncio.wait(list(self._tasks), timeout=5)
+            for writer in list(self._clients):
+                writer.close()
+            # Chaque connexion se termine sur la fin de flux (sans annulation)
+            if self._handlers:
+                await asyncio.wait(list(self._handlers), timeout=1)
+            for server in self._servers:
+                await server.wait_closed()
+            self._servers = []
+            print("Serveur de commandes arrêté.")
+
+    def stop(self):
+        """
+        Demande l'arrêt du serveur (depuis sa boucle asyncio).
+        """
+        if self._shutdown is not None:
+            self._shutdown.set()
+
+    # === Clients ===
+
+    async def _handle_client(self, reader, writer):
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        self._clients.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    blocking = self._handle_line(line, writer)
+                    if blocking is not None:
+                        # Les requêtes suivantes de ce client attendent, pas la boucle asyncio
+                        await blocking
+                # Les réponses s'accumulent sans attente ; on ne cède que si le client ne lit plus
+                if writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._clients.discard(writer)
+            self._subscribers.pop(writer, None)
+            self._handlers.discard(handler)
+            writer.close()
+
+    def _handle_line(self, line, writer):
+        """
+        Traite une requête ; pour une commande bloquante, retourne la coroutine
+        qui l'exécute dans un thread (à attendre avant la requête suivante).
+        """
+        start = time.perf_counter()
+        self.requests += 1
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.pop("id", None)
+            command = request.pop("cmd")
+        except (ValueError, KeyError, AttributeError, TypeError) as e:
+            self._reply(writer, request_id, start, error=f"Requête invalide : {e}")
+            return
+        handler = self._commands.get(command)
+        if handler is None:
+            self._reply(writer, request_id, start, error=f"Commande inconnue : {command}")
+            return
+        if inspect.iscoroutinefunction(handler):
+            # Commande longue : répond à son échéance sans retenir les requêtes suivantes
+            task = asyncio.create_task(self._run_async(handler, writer, request, request_id, start))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return
+        if command in self._blocking_commands:
+            return self._run_blocking(handler, writer, request, request_id, command, start)
+        try:
+            result = handler(writer, **request)
+        except Exception as e:
+            self._reply(writer, request_id, start, error=f"{command} : {e}")
+            return
+        self._reply(writer, request_id, start, result)
+
+    async def _run_async(self, handler, writer, request, request_id, start):
+        try:
+            result = await handler(writer, **request)
+        except Exception as e:
+            self._reply(writer, request_id, start, error=str(e))
+            return
+        self._reply(writer, request_id, start, result)
+
+    async def _run_blocking(self, handler, writer, request, request_id, command, start):
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(None, functools.partial(handler, writer,
+                                                                                             **request))
+        except Exception as e:
+            self._reply(writer, request_id, start, error=f"{command} : {e}")
+            return
+        self._reply(writer, request_id, start, result)
+
+    def _reply(self, writer, request_id, start, result=None, error=None):
+        elapsed = time.perf_counter() - start
+        self.latency_histogram.observe(elapsed)
+        if error is None:
+            response = {"id": request_id, "ok": True, "result": result, "service_us": elapsed * 1e6}
+        else:
+            self.errors += 1
+            response = {"id": request_id, "ok": False, "error": error, "service_us": elapsed * 1e6}
+        if not writer.is_closing():
+            writer.write((json.dumps(response) + "\n").encode())
+
+    # === Télémétrie ===
+
+    async def _stream(self):
+        telemetry = self.telemetry
+        index = {name: i for i, name in enumerate(telemetry.channels)}
+        period = 1.0 / self.stream_rate
+        cursor = telemetry.total
+        while True:
+            await asyncio.sleep(period)
+            total = telemetry.total
+            new = min(total - cursor, telemetry.capacity)
+            cursor = total
+            if new <= 0 or not self._subscribers:
+                continue
+            # Copie cohérente d'un bloc : les écritures de la boucle ne peuvent pas couper la trame
+            data = telemetry.snapshot(new).astype(TELEMETRY_DTYPE, copy=False)
+            frames = {}  # (voies, encodage) -> trame encodée (une fois pour tous les abonnés)
+            for writer, key in list(self._subscribers.items()):
+                if writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                    self.frames_dropped += 1
+                    continue
+                frame = frames.get(key)
+                if frame is None:
+                    frame = frames[key] = self._encode_frame(data, index, total, *key)
+                writer.write(frame)
+                self.frames_sent += 1
+
+    @staticmethod
+    def _encode_frame(data, index, total, channels, encoding):
+        payload = {"stream": "telemetry", "total": total, "count": int(data.shape[1]),
+                   "channels": list(channels), "encoding": encoding}
+        if encoding == "base64":
+            payload["dtype"] = TELEMETRY_DTYPE
+            for name in channels:
+                payload[name] = base64.b64encode(data[index[name]].tobytes()).decode("ascii")
+        else:
+            for name in channels:
+                payload[name] = data[index[name]].tolist()
+        return (json.dumps(payload) + "\n").encode()
+
+    # === Commandes ===
+
+    def _measure_function(self):
+        # Même choix que le processus de contrôle : estimation à chaque période de la boucle
+        # (latest_speed n'est rafraîchie qu'à la fréquence d'acquisition)
+        return self.motor.estimate_speed
+
+    def _ping(self, client):
+        return {"time": time.time()}
+
+    def _start(self, client, pwm=255):
+        pwm = int(pwm)
+        if not 0 <= pwm <= 255:
+            raise ValueError("Le PWM doit être entre 0 et 255.")
+        self.motor.stop_control()
+        self.motor.start(speed=pwm)
+        return {"pwm": self.motor.pwm}
+
+    def _stop(self, client):
+        self.motor.stop()
+        return {"pwm": self.motor.pwm}
+
+    def _setpoint(self, client, rpm, rate_hz=None):
+        """
+        Change la consigne ; démarre la régulation si elle ne tourne pas.
+        """
+        motor = self.motor
+        motor.set_setpoint(float(rpm))
+        if motor.control_loop is None:
+            motor.start_control(self._measure_function(), rate_hz=rate_hz or self.rate_hz)
+        return {"setpoint": motor.setpoint}
+
+    def _gains(self, client, kp, ki, kd):
+        self.motor.set_pid_parameters(float(kp), float(ki), float(kd))
+        pid = self.motor.pid
+        return {"kp": pid.kp, "ki": pid.ki, "kd": pid.kd}
+
+    def _schedule(self, client, table=None, path=None, variable="setpoint"):
+        from Class.ClassGainSchedule import GainSchedule
+
+        schedule = None
+        if path is not None:
+            schedule = GainSchedule.load(path, variable=variable)
+        elif table:
+            schedule = GainSchedule.from_results(((row[0], row[1:]) for row in table), variable=variable)
+        self.motor.set_gain_schedule(schedule)
+        return {"points": len(schedule) if schedule is not None else 0, "variable": variable}
+
+    async def _measure(self, client, duration=1.0):
+        """
+        Vitesse moyenne sur `duration` secondes, d'après la position de l'encodeur
+        (le compteur n'est pas remis à zéro : la régulation n'est pas perturbée).
+        """
+        motor = self.motor
+        start, counts = time.perf_counter(), motor.position_counts
+        await asyncio.sleep(float(duration))
+        elapsed = time.perf_counter() - start
+        revolutions = (motor.position_counts - counts) / motor.counts_per_revolution
+        return {"rpm": revolutions / elapsed * 60, "duration": elapsed}
+
+    async def _move(self, client, counts=None, revolutions=None, relative=False, timeout=30.0):
+        """
+        Déplacement en mode position (démarré si besoin) ; répond quand le moteur
+        est en position, avec le bilan du déplacement (durées en secondes).
+        """
+        motor = self.motor
+        if (counts is None) == (revolutions is None):
+            raise ValueError("Indiquer counts ou revolutions.")
+        if counts is None:
+            counts = motor.revolutions_to_counts(float(revolutions))
+        if relative:
+            loop = motor.control_loop
+            origin = getattr(loop, "target", None)
+            counts += origin if origin is not None else motor.position_counts
+
+        event_loop = asyncio.get_running_loop()
+        done = event_loop.create_future()
+
+        def completed(result):
+            # Appelé depuis le thread de la boucle de position
+            event_loop.call_soon_threadsafe(lambda: done.done() or done.set_result(result))
+
+        if not motor.position_mode:
+            motor.start_position_control(rate_hz=self.rate_hz)
+        motor.move_to(int(counts), on_complete=completed)
+        try:
+            result = await asyncio.wait_for(done, float(timeout))
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Position {int(counts)} non atteinte après {timeout} s") from None
+        return result._asdict()
+
+    def _status(self, client):
+        motor = self.motor
+        latest = self.telemetry.latest()
+        loop = motor.control_loop
+        watchdog = motor.watchdog
+        return {"pwm": motor.pwm, "setpoint": motor.setpoint,
+                "rpm": latest["rpm"] if latest is not None else 0.0,
+                "position": motor.position_counts, "control": loop is not None,
+                "target": getattr(loop, "target", None), "moves": motor.move_count,
+                "loop": loop.stats() if loop is not None else None,
+                "gains": list(motor.pid.gains), "scheduled": motor.gain_schedule is not None,
+                "watchdog": None if watchdog is None else
+                {"tripped": watchdog.tripped, "trips": watchdog.trip_count,
+                 "last": watchdog.trips[-1]._asdict() if watchdog.trips else None}}
+
+    def _subscribe(self, client, channels=None, encoding="base64"):
+        channels = tuple(channels) if channels else self.telemetry.channels
+        unknown = [name for name in channels if name not in self.telemetry.channels]
+        if unknown:
+            raise ValueError(f"Voies inconnues : {', '.join(unknown)}")
+        if encoding not in TELEMETRY_ENCODINGS:
+            raise ValueError(f"Encodage inconnu : {encoding} (disponibles : {', '.join(TELEMETRY_ENCODINGS)})")
+        self._subscribers[client] = (channels, encoding)
+        return {"channels": list(channels), "rate": self.stream_rate, "encoding": encoding}
+
+    def _unsubscribe(self, client):
+        self._subscribers.pop(client, None)
+        return {}
+
+    def _reset(self, client):
+        if self.motor.watchdog is None:
+            raise ValueError("Aucun chien de garde sur ce moteur.")
+        self.motor.watchdog.reset()
+        return {}
+
+    def _stats(self, client):
+        return self.stats()
+
+    def _request_shutdown(self, client):
+        # Laisse partir la réponse avant la fermeture des connexions
+        asyncio.get_running_loop().call_soon(self.stop)
+        return {}
+
+    # === Mesures ===
+
+    def stats(self):
+        """
+        Compteurs du serveur et durée de traitement des requêtes (moyenne,
+        p50 et p99 en secondes).
+        """
+        histogram = self.latency_histogram
+        return {"clients": len(self._clients), "subscribers": len(self._subscribers),
+                "requests": self.requests, "errors": self.errors,
+                "frames_sent": self.frames_sent, "frames_dropped": self.frames_dropped,
+                "mean_service": histogram.sum / histogram.count if histogram.count else 0.0,
+                "p50_service": histogram.quantile(0.5), "p99_service": histogram.quantile(0.99)}
+
+    def register_metrics(self, registry):
+        """
+        Déclare les mesures du serveur dans un MetricsRegistry.
+        """
+        registry.register("server_request_seconds", "histogram", "Durée de traitement d'une requête.",
+                          lambda: self.latency_histogram)
+        registry.register("server_requests_total", "counter", "Requêtes reçues.", lambda: self.requests)
+        registry.register("server_clients", "gauge", "Clients connectés.", lambda: len(self._clients))
+        registry.register("server_frames_dropped_total", "counter",
+                          "Trames de télémétrie sautées (clients lents).", lambda: self.frames_dropped)
+
+
+class MotorClient:
+    def __init__(self):
+        """
+        Client asyncio du MotorServer : requêtes en parallèle (pipelining),
+        réception de la télémétrie et mesure du temps aller-retour.
+        """
+        self.round_trips = Histogram()
+        self.on_telemetry = None  # Fonction appelée avec chaque trame de télémétrie (voies en tableaux NumPy)
+        self._reader = None
+        self._writer = None
+        self._pending = {}
+        self._next_id = 0
+        self._receiver = None
+
+    async def connect(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        if unix_path is not None:
+            self._reader, self._writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(host, port)
+        self._receiver = asyncio.create_task(self._receive())
+        return self
+
+    async def request(self, command, **args):
+        """
+        Envoie une requête et attend sa réponse.
+
+        Returns:
+            Le champ "result" de la réponse.
+
+        Raises:
+            RuntimeError: Si le serveur signale une erreur.
+        """
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        start = time.perf_counter()
+        self._writer.write((json.dumps(dict(args, id=request_id, cmd=command)) + "\n").encode())
+        response = await future
+        self.round_trips.observe(time.perf_counter() - start)
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+        return response["result"]
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._receiver is not None:
+            self._receiver.cancel()
+
+    async def _receive(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if "stream" in message:
+                    if self.on_telemetry is not None:
+                        self.on_telemetry(decode_telemetry(message))
+                    continue
+                future = self._pending.pop(message.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connexion au serveur fermée."))
+            self._pending.clear()
+
+
+async def measure_latency(count=2000, pipeline=1, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+    """
+    Mesure le temps aller-retour des commandes sur un serveur en cours d'exécution.
+
+    Args:
+        count: Nombre de requêtes "ping".
+        pipeline: Requêtes envoyées sans attendre les réponses (1 : une à la fois).
+        host, port, unix_path: Adresse du serveur.
+
+    Returns:
+        Un dictionnaire : temps aller-retour moyen, médian, p99 et maximal
+        (secondes) et requêtes par seconde.
+    """
+    client = await MotorClient().connect(host, port, unix_path)
+    round_trips = []
+    try:
+        async def timed_ping():
+            start = time.perf_counter()
+            await client.request("ping")
+            round_trips.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(0, count, pipeline):
+            await asyncio.gather(*(timed_ping() for _ in range(pipeline)))
+        elapsed = time.perf_counter() - start
+    finally:
+        await client.close()
+    round_trips.sort()
+    return {"mean": sum(round_trips) / len(round_trips), "p50": round_trips[len(round_trips) // 2],
+            "p99": round_trips[int(len(round_trips) * 0.99)], "max": round_trips[-1],
+            "requests_per_second": len(round_trips) / elapsed}
+
+
+def server_options(argv):
+    """
+    Options du serveur lues sur la ligne de commande : --host, --port et --unix.
+    """
+    options = {}
+    for flag, key, convert in (("--host", "host", str), ("--port", "port", int), ("--unix", "unix_path", str)):
+        if flag in argv[:-1]:
+            options[key] = convert(argv[argv.index(flag) + 1])
+    return options
+
+
+def serve_motor(board, motor_config, **options):
+    """
+    Crée le moteur, sa télémétrie, l'acquisition de vitesse (télémétrie hors
+    régulation) et le chien de garde sur la carte, puis exécute un MotorServer jusqu'à son arrêt (le moteur est alors arrêté).
+
+    Args:
+        board: Carte ouverte (Telemetrix ou SimulatedTelemetrix).
+        motor_config: Arguments du constructeur de Motor (broches, ticks par tour).
+        options: Arguments de MotorServer (host, port, unix_path, stream_rate...).
+    """
+    from Class.ClassMotor import Motor
+    from Class.ClassSpeedAcquisition import SpeedAcquisition
+    from Class.ClassTelemetryBuffer import TelemetryBuffer
+    from Class.ClassWatchdog import Watchdog
+
+    telemetry = TelemetryBuffer(capacity=TELEMETRY_CAPACITY)
+    motor = Motor(board=board, telemetry=telemetry, **motor_config)
+    acquisition = SpeedAcquisition(motor, sample_rate=50)
+    acquisition.record_open_loop(telemetry)
+    acquisition.start()
+    watchdog = Watchdog(motor).start()
+    try:
+        MotorServer(motor, **options).run()
+    finally:
+        watchdog.stop()
+        motor.stop()
+        acquisition.stop()
+
+
+def main(simulated=None):
+    """
+    python -m Class.ClassMotorServer [--simulate] [--host H] [--port N] [--unix chemin]
+    python -m Class.ClassMotorServer --bench [requêtes] [--pipeline N] [--port N] [--unix chemin]
+    """
+    args = sys.argv[1:]
+    options = server_options(args)
+    if "--bench" in args:
+        pipeline = int(args[args.index("--pipeline") + 1]) if "--pipeline" in args[:-1] else 1
+        count = next((int(arg) for arg in args[args.index("--bench") + 1:][:1] if arg.isdigit()), 2000)
+        results = asyncio.run(measure_latency(count, pipeline, **options))
+        print(f"{count} requêtes (pipeline {pipeline}) : moyenne {results['mean'] * 1e6:.0f} µs, "
+              f"médiane {results['p50'] * 1e6:.0f} µs, p99 {results['p99'] * 1e6:.0f} µs, "
+              f"max {results['max'] * 1e6:.0f} µs, {results['requests_per_second']:.0f} requêtes/s")
+        return
+
+    from Class.ClassSimulatedBoard import open_board
+
+    print("Connexion à l'Arduino...")
+    board = open_board(simulated)
+    try:
+        serve_motor(board, dict(pwm_pin=3, dir_pin=12, encoder_pin_a=2, encoder_pin_b=7, ticks_per_revolution=12),
+                    **options)
+    finally:
+        board.shutdown()
+        print("Connexion à l'Arduino terminée.")
+
+
+if __name__ == "__main__":
+    main(simulated=True if "--simulate" in sys.argv else None)
@@ -0,0 +1,227 @@
+import threading
+import time
+
+from Class.ClassMetrics import Histogram
+
+# Codes de commande telemetrix (PrivateConstants.ANALOG_WRITE et DIGITAL_WRITE)
+TELEMETRIX_COMMANDS = {"analog": 3, "digital": 2}
+
+
+def telemetrix_frame(kind, pin, value):
+    """
+    Trame telemetrix d'une écriture (octet de longueur, code, broche, valeur),
+    identique à celle produite par Telemetrix.analog_write / digital_write.
+    """
+    value = int(value)
+    if kind == "analog":
+        command = [TELEMETRIX_COMMANDS[kind], pin, value >> 8, value & 0xFF]
+    else:
+        command = [TELEMETRIX_COMMANDS[kind], pin, value]
+    return bytes([len(command)] + command)
+
+
+def emergency_write(board, commands):
+    """
+    Écriture d'arrêt d'urgence de commandes (type, broche, valeur) sur une
+    carte, sans passer par les verrous d'écriture : elle n'attend pas une
+    écriture bloquée en cours sur la même liaison.
+
+    La carte (BoardManager, SimulatedTelemetrix) fournit sa propre méthode
+    emergency_write ; sur une carte telemetrix, les trames sont écrites
+    directement sur le port série.
+    """
+    write = getattr(board, "emergency_write", None)
+    if write is not None:
+        write(commands)
+        return
+    port = getattr(board, "serial_port", None)
+    if port is not None:
+        port.write(b"".join(telemetrix_frame(kind, pin, value) for kind, pin, value in commands))
+        return
+    for kind, pin, value in commands:
+        getattr(board, f"{kind}_write")(pin, value)
+
+
+class OutputStage:
+    def __init__(self, board, min_interval=0.02):
+        """
+        Étage de sortie entre un Motor et la carte : évite les écritures inutiles.
+
+        La dernière valeur envoyée sur chaque broche est conservée et une
+        écriture identique n'est pas transmise. Les écritures « regroupables »
+        (commandes manuelles, rafales d'événements de l'interface) sont limitées
+        à une par `min_interval` et par broche : pendant l'intervalle seule la
+        dernière valeur est gardée, puis envoyée à son échéance. Les écritures
+        forcées (arrêt) partent toujours immédiatement.
+
+        Args:
+            board: Carte (Telemetrix, SimulatedTelemetrix ou BoardManager).
+            min_interval: Intervalle minimal entre deux écritures regroupables
+                sur une même broche, en secondes (0 : pas de regroupement).
+        """
+        self.board = board
+        self.min_interval = min_interval
+        self.sent = 0        # Écritures transmises à la carte
+        self.suppressed = 0  # Écritures ignorées car identiques à la valeur en place
+        self.coalesced = 0   # Écritures remplacées par une plus récente avant envoi
+        self.cancelled = 0   # Écritures en attente abandonnées (écriture directe ou forcée, inhibition)
+        self.latency_histogram = Histogram()  # Durée des appels d'écriture sur la carte
+        self.inhibited = False     # True : seules les écritures forcées partent (chien de garde)
+        self.blocked = 0           # Écritures refusées pendant l'inhibition
+        self.write_started = None  # Début de l'écriture en cours sur la carte (None si aucune)
+        self.emergency_writes = 0  # Écritures d'arrêt d'urgence (hors verrou, voir emergency_write)
+
+        self._values = {}     # broche -> dernière valeur envoyée
+        self._last_sent = {}  # broche -> instant du dernier envoi
+        self._pending = {}    # broche -> (type, valeur) en attente d'échéance
+        self._timers = {}
+        self._lock = threading.RLock()
+
+    def digital_write(self, pin, value, force=False, coalesce=False):
+        self.write("digital", pin, value, force, coalesce)
+
+    def analog_write(self, pin, value, force=False, coalesce=False):
+        self.write("analog", pin, value, force, coalesce)
+
+    def write(self, kind, pin, value, force=False, coalesce=False):
+        """
+        Écrit une valeur sur une broche si nécessaire.
+
+        Args:
+            kind: "analog" ou "digital".
+            pin: Numéro de la broche.
+            value: Valeur à écrire.
+            force: True pour envoyer même si la valeur n'a pas changé (annule
+                toute écriture en attente sur la broche).
+            coalesce: True pour limiter la fréquence des écritures sur la broche
+                (voir min_interval).
+        """
+        with self._lock:
+            if force:
+                self._cancel(pin)
+                self._send(kind, pin, value)
+                return
+            if self.inhibited:
+                self.blocked += 1
+                return
+            if coalesce and pin in self._pending:
+                # Une écriture attend déjà son échéance : elle prend la nouvelle valeur
+                self._pending[pin] = (kind, value)
+                self.coalesced += 1
+                return
+            self._cancel(pin)
+            if self._values.get(pin) == value:
+                self.suppressed += 1
+                return
+            if coalesce and self.min_interval > 0 and pin in self._last_sent:
+                wait = self._last_sent[pin] + self.min_interval - time.perf_counter()
+                if wait > 0:
+                    self._pending[pin] = (kind, value)
+                    timer = threading.Timer(wait, self._flush_pin, args=(pin,))
+                    timer.daemon = True
+                    self._timers[pin] = timer
+                    timer.start()
+                    return
+            self._send(kind, pin, value)
+
+    def flush(self):
+        """
+        Envoie immédiatement toutes les écritures en attente.
+        """
+        with self._lock:
+            for pin in list(self._pending):
+                self._flush_pin(pin)
+
+    def inhibit(self, inhibited=True):
+        """
+        Bloque (ou débloque) toutes les écritures non forcées ; les écritures en
+        attente sont abandonnées. L'arrêt d'urgence ne peut ainsi pas être
+        écrasé par une boucle encore en cours.
+
+        N'attend pas le verrou de l'étage (tenu par une écriture peut-être
+        bloquée) : si elle est occupée, les écritures en attente sont
+        abandonnées à leur échéance.
+        """
+        self.inhibited = inhibited
+        if inhibited and self._lock.acquire(blocking=False):
+            try:
+                for pin in list(self._pending):
+                    self._cancel(pin)
+            finally:
+                self._lock.release()
+
+    def emergency_write(self, commands):
+        """
+        Arrêt d'urgence : écrit les commandes (type, broche, valeur) sans
+        attendre le verrou de l'étage ni l'écriture en cours (voir la fonction
+        emergency_write). Les valeurs en place ne sont pas mises à jour :
+        appeler invalidate une fois l'écriture bloquée terminée.
+        """
+        emergency_write(self.board, commands)
+        self.emergency_writes += 1
+
+    def invalidate(self, pin=None):
+        """
+        Oublie la valeur en place (une broche ou toutes) quand l'état de la
+        carte n'est plus connu (écriture en échec, arrêt d'urgence, réarmement) :
+        la prochaine écriture sera envoyée.
+        """
+        with self._lock:
+            if pin is None:
+                self._values.clear()
+            else:
+                self._values.pop(pin, None)
+
+    def stats(self):
+        """
+        Compteurs des écritures : envoyées, ignorées (valeur inchangée),
+        remplacées avant envoi, abandonnées en attente, en attente, et part des
+        écritures économisées (ignorées ou remplacées).
+        """
+        requested = self.sent + self.suppressed + self.coalesced + self.cancelled
+        return {"sent": self.sent, "suppressed": self.suppressed, "coalesced": self.coalesced,
+                "cancelled": self.cancelled, "pending": len(self._pending),
+                "saved_ratio": (self.suppressed + self.coalesced) / requested if requested else 0.0}
+
+    def _flush_pin(self, pin):
+        with self._lock:
+            timer = self._timers.pop(pin, None)
+            if timer is not None:
+                timer.cancel()
+            pending = self._pending.pop(pin, None)
+            if pending is None:
+                return
+            if self.inhibited:
+                self.cancelled += 1
+                return
+            kind, value = pending
+            if self._values.get(pin) == value:
+                self.suppressed += 1
+                return
+            self._send(kind, pin, value)
+
+    def _cancel(self, pin):
+        timer = self._timers.pop(pin, None)
+        if timer is not None:
+            timer.cancel()
+        if self._pending.pop(pin, None) is not None:
+            self.cancelled += 1
+
+    def _send(self, kind, pin, value):
+        start = self.write_started = time.perf_counter()
+        try:
+            if kind == "analog":
+                self.board.analog_write(pin, value)
+            else:
+                self.board.digital_write(pin, value)
+        except Exception:
+            # Écriture peut-être partielle : valeur en place inconnue
+            self._values.pop(pin, None)
+            raise
+        finally:
+            self.write_started = None
+        now = time.perf_counter()
+        self.latency_histogram.observe(now - start)
+        self._values[pin] = value
+        self._last_sent[pin] = now
+        self.sent += 1
@@ -0,0 +1,513 @@
+import math
+import threading
+import time
+from collections import deque
+
+from Class.ClassMetrics import Histogram, period_buckets
+
+
+class PIDController:
+    def __init__(self, kp=0.0, ki=0.0, kd=0.0, output_min=0.0, output_max=255.0,
+                 derivative_filter=0.01):
+        """
+        Correcteur PID discret avec anti-windup et dérivée filtrée.
+
+        L'intégrale est stockée directement en unités de sortie (Ki déjà appliqué),
+        ce qui permet de modifier les gains en cours de fonctionnement sans saut
+        de la commande. La dérivée porte sur la mesure (pas de « coup de dérivée »
+        lors d'un changement de consigne) et passe par un filtre passe-bas du
+        premier ordre.
+
+        Avec une table de gains (schedule, voir ClassGainSchedule), les gains
+        sont relus à chaque calcul selon la consigne ou la mesure. Tout
+        changement de Kp ou de Kd (table, réglage manuel) est compensé dans
+        l'intégrale pour que la commande reste continue (transfert sans à-coup).
+
+        Args:
+            kp: Gain proportionnel.
+            ki: Gain intégral (par seconde).
+            kd: Gain dérivé (en secondes).
+            output_min: Borne basse de la commande (PWM).
+            output_max: Borne haute de la commande (PWM).
+            derivative_filter: Constante de temps du filtre de dérivée en secondes.
+        """
+        if output_min >= output_max:
+            raise ValueError("output_min doit être strictement inférieur à output_max.")
+
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.output_min = output_min
+        self.output_max = output_max
+        self.derivative_filter = derivative_filter
+        self.schedule = None  # GainSchedule optionnel, prioritaire sur kp, ki et kd
+        self._lock = threading.Lock()
+        self.reset()
+
+    def set_gains(self, kp, ki, kd):
+        """
+        Met à jour les gains, y compris pendant que la boucle tourne.
+        """
+        with self._lock:
+            self.kp = kp
+            self.ki = ki
+            self.kd = kd
+
+    def set_schedule(self, schedule):
+        """
+        Active (GainSchedule) ou désactive (None) la table de gains, y compris
+        pendant que la boucle tourne ; sans table, les gains fixes s'appliquent.
+        """
+        self.schedule = schedule
+
+    def reset(self):
+        """
+        Remet à zéro les états internes (intégrale, dérivée, dernière mesure).
+        """
+        self.p_term = 0.0
+        self.i_term = 0.0
+        self.d_term = 0.0
+        self.error = 0.0
+        self.output = 0.0
+        self.saturated = False
+        self.gains = (self.kp, self.ki, self.kd)  # Gains appliqués au dernier calcul
+        self._applied = None
+        self._last_measurement = None
+        self._last_measurement_time = None
+        self._derivative = 0.0
+
+    def update(self, setpoint, measurement, dt, feedforward=0.0, measurement_rate=None, measurement_time=None):
+        """
+        Calcule la nouvelle commande.
+
+        Args:
+            setpoint: Consigne (RPM).
+            measurement: Mesure courante (RPM).
+            dt: Temps écoulé depuis le calcul précédent en secondes.
+            feedforward: Commande anticipée (PWM) ajoutée à la sortie du PID.
+            measurement_rate: Dérivée de la mesure déjà filtrée (par exemple
+                l'accélération d'un observateur) ; remplace la dérivée calculée.
+            measurement_time: Instant (s) auquel se rapporte la mesure. S'il est
+                fourni, la dérivée est calculée sur l'intervalle réel entre deux
+                mesures, et seulement quand une nouvelle mesure arrive (une mesure
+                répétée ne crée ni dérivée nulle ni pic au changement suivant).
+
+        Returns:
+            La commande bornée entre output_min et output_max.
+        """
+        with self._lock:
+            kp, ki, kd = self.kp, self.ki, self.kd
+        schedule = self.schedule
+        if schedule is not None:
+            kp, ki, kd = schedule.gains(setpoint if schedule.on_setpoint else measurement)
+
+        error = setpoint - measurement
+
+        # Dérivée de la mesure filtrée par un passe-bas du premier ordre
+        if measurement_rate is not None:
+            self._derivative = -measurement_rate
+            self._last_measurement = measurement
+        elif measurement_time is not None:
+            last_time = self._last_measurement_time
+            if last_time is None or measurement_time > last_time:
+                if last_time is not None and self._last_measurement is not None:
+                    interval = measurement_time - last_time
+                    raw_derivative = -(measurement - self._last_measurement) / interval
+                    alpha = interval / (self.derivative_filter + interval)
+                    self._derivative += alpha * (raw_derivative - self._derivative)
+                self._last_measurement = measurement
+                self._last_measurement_time = measurement_time
+        else:
+            if self._last_measurement is not None and dt > 0:
+                raw_derivative = -(measurement - self._last_measurement) / dt
+                alpha = dt / (self.derivative_filter + dt)
+                self._derivative += alpha * (raw_derivative - self._derivative)
+            self._last_measurement = measurement
+
+        # Transfert sans à-coup : l'intégrale absorbe la variation de P et D due
+        # au changement de gains (sans action intégrale, l'écart resterait figé)
+        applied = self._applied
+        if applied is not None and ki > 0 and (applied[0] != kp or applied[1] != kd):
+            self.i_term += (applied[0] - kp) * error + (applied[1] - kd) * self._derivative
+        self._applied = (kp, kd)
+        self.gains = (kp, ki, kd)
+
+        p_term = kp * error
+        d_term = kd * self._derivative
+
+        # Anti-windup par intégration conditionnelle : on n'intègre pas si la
+        # commande est saturée et que l'erreur pousserait encore plus loin.
+        i_term = self.i_term + ki * error * dt
+        unclamped = p_term + i_term + d_term + feedforward
+        if (unclamped > self.output_max and error > 0) or (unclamped < self.output_min and error < 0):
+            i_term = self.i_term
+        # Avec anticipation, l'intégrale ne corrige que l'écart au modèle (elle peut être négative)
+        i_term = min(max(i_term, self.output_min - feedforward), self.output_max - feedforward)
+
+        output = p_term + i_term + d_term + feedforward
+        self.saturated = output > self.output_max or output < self.output_min
+        output = min(max(output, self.output_min), self.output_max)
+
+        self.p_term, self.i_term, self.d_term = p_term, i_term, d_term
+        self.error = error
+        self.output = output
+        return output
+
+
+class PIDLoop:
+    def __init__(self, motor, controller, measure, rate_hz=500.0, spin_time=0.0005,
+                 history=1000, telemetry=None, feedforward=None, measure_rate=None, scheduler=None,
+                 measure_time=None):
+        """
+        Boucle de régulation à fréquence fixe exécutée dans son propre thread.
+
+        À chaque période, la mesure est lue via `measure`, le PID calcule la
+        commande et le moteur reçoit le nouveau PWM. Les périodes réellement
+        obtenues sont conservées pour évaluer la gigue (et cumulées dans
+        period_histogram avec le temps CPU, voir ClassMetrics). Si le moteur a un
+        enregistreur actif (motor.recorder), chaque période y est enregistrée
+        avec les termes P, I et D.
+
+        Args:
+            motor: Instance de Motor pilotée.
+            controller: Instance de PIDController.
+            measure: Fonction sans argument retournant la vitesse mesurée (RPM).
+            rate_hz: Fréquence de la boucle en Hz (typiquement 200 à 1000).
+            spin_time: Durée d'attente active avant chaque échéance, en secondes,
+                pour compenser l'imprécision de time.sleep.
+            history: Nombre de périodes conservées pour les statistiques.
+            telemetry: TelemetryBuffer optionnel recevant (temps, consigne, RPM,
+                PWM, erreur) à chaque période.
+            feedforward: Fonction optionnelle (consigne, dérivée de la consigne) ->
+                PWM anticipé (voir VelocityFeedforward).
+            measure_rate: Fonction optionnelle retournant la dérivée de la mesure
+                (RPM/s) pour le terme dérivé, ou None pour la dériver.
+            scheduler: ControlScheduler optionnel : la boucle est alors cadencée
+                par le thread commun (à sa fréquence) au lieu du sien.
+            measure_time: Fonction optionnelle retournant l'instant de la dernière
+                mesure (voir PIDController.update) : indispensable si `measure`
+                n'est pas renouvelée à chaque période.
+        """
+        if rate_hz <= 0:
+            raise ValueError("La fréquence de la boucle doit être positive.")
+
+        self.motor = motor
+        self.controller = controller
+        self.measure = measure
+        self.scheduler = scheduler
+        if scheduler is not None:
+            rate_hz = scheduler.rate_hz
+        self.rate_hz = rate_hz
+        self.period = 1.0 / rate_hz
+        self.spin_time = spin_time
+        self.telemetry = telemetry
+        self.setpoint = 0.0
+        self.setpoint_rate = 0.0
+        self.measurement = 0.0
+        self.feedforward = feedforward
+        self.measure_rate = measure_rate
+        self.measure_time = measure_time
+        self.trajectory = None
+        self._trajectory_start = None
+        self._on_complete = None
+        self.tick_count = 0
+        self.overruns = 0
+        self.cpu_time = 0.0  # Temps CPU cumulé des périodes (secondes)
+        self.errors = 0  # Exceptions interceptées dans les périodes
+        self.last_tick = None  # Instant de la dernière période (time.perf_counter)
+        self.period_histogram = Histogram(period_buckets(self.period))
+
+        self._periods = deque(maxlen=history)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Démarre la boucle (sans effet si elle tourne déjà).
+        """
+        if self.is_running():
+            return
+        self.controller.reset()
+        self._periods.clear()
+        self.period_histogram.reset()
+        self.tick_count = 0
+        self.overruns = 0
+        self.cpu_time = 0.0
+        self.errors = 0
+        self.last_tick = time.perf_counter()
+        if self.scheduler is not None:
+            self.scheduler.add(self)
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="PIDLoop", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Arrête la boucle et attend la fin du thread.
+        """
+        if self.scheduler is not None:
+            self.scheduler.remove(self)
+            return
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    def is_running(self):
+        if self.scheduler is not None:
+            return self.scheduler.is_scheduled(self)
+        return self._thread is not None and self._thread.is_alive()
+
+    def set_setpoint(self, setpoint):
+        """
+        Consigne fixe (interrompt le profil en cours).
+        """
+        self.trajectory = None
+        self.setpoint = float(setpoint)
+        self.setpoint_rate = 0.0
+
+    def follow(self, trajectory, on_complete=None):
+        """
+        Suit un profil de consigne (Trajectory) à partir de la prochaine période.
+
+        Args:
+            trajectory: Profil précalculé.
+            on_complete: Fonction optionnelle appelée (depuis le thread de la
+                boucle) à la fin du profil.
+        """
+        self._on_complete = on_complete
+        self._trajectory_start = None
+        self.trajectory = trajectory
+
+    def _next_setpoint(self, now):
+        trajectory = self.trajectory
+        if trajectory is None:
+            return
+        if self._trajectory_start is None:
+            self._trajectory_start = now
+        self.setpoint, self.setpoint_rate, done = trajectory.sample(now - self._trajectory_start)
+        if done and self.trajectory is trajectory:
+            self.trajectory = None
+            if self._on_complete is not None:
+                self._on_complete()
+
+    def stats(self):
+        """
+        Statistiques sur les périodes mesurées de la boucle.
+
+        Returns:
+            Un dictionnaire avec la période cible, la période moyenne, la gigue
+            (écart type) et l'écart maximal en secondes, ainsi que le nombre de
+            dépassements d'échéance.
+        """
+        periods = list(self._periods)
+        if not periods:
+            return {"target_period": self.period, "mean_period": 0.0, "jitter": 0.0,
+                    "max_deviation": 0.0, "overruns": self.overruns, "ticks": self.tick_count}
+        mean = sum(periods) / len(periods)
+        variance = sum((p - mean) ** 2 for p in periods) / len(periods)
+        max_deviation = max(abs(p - self.period) for p in periods)
+        return {"target_period": self.period, "mean_period": mean, "jitter": math.sqrt(variance),
+                "max_deviation": max_deviation, "overruns": self.overruns, "ticks": self.tick_count}
+
+    def _sleep_until(self, deadline):
+        sleep_until(deadline, self._stop_event, self.spin_time)
+
+    def step(self, now, dt):
+        """
+        Exécute une période : mesure, calcul du PID et application du PWM.
+
+        Args:
+            now: Instant de la période (time.perf_counter).
+            dt: Temps écoulé depuis la période précédente en secondes.
+        """
+        cpu_start = time.thread_time()
+        self.last_tick = now
+        self._periods.append(dt)
+        self.period_histogram.observe(dt)
+        try:
+            self._next_setpoint(now)
+            self.measurement = self.measure()
+            feedforward = self.feedforward
+            anticipated = feedforward(self.setpoint, self.setpoint_rate) if feedforward is not None else 0.0
+            rate = self.measure_rate() if self.measure_rate is not None else None
+            measured_at = self.measure_time() if self.measure_time is not None else None
+            output = self.controller.update(self.setpoint, self.measurement, dt, anticipated, rate, measured_at)
+            pwm = int(round(output))
+            self.motor.apply_pwm(pwm)
+            if self.telemetry is not None:
+                self.telemetry.append(now, self.setpoint, self.measurement, pwm,
+                                      self.controller.error)
+            recorder = self.motor.recorder
+            if recorder is not None:
+                controller = self.controller
+                recorder.record(now, self.setpoint, self.measurement, pwm, controller.error,
+                                controller.p_term, controller.i_term, controller.d_term)
+        except Exception as e:
+            self.errors += 1
+            print(f"Erreur dans la boucle PID : {e}")
+        self.tick_count += 1
+        self.cpu_time += time.thread_time() - cpu_start
+
+    def _run(self):
+        last_tick = time.perf_counter()
+        next_deadline = last_tick + self.period
+
+        while not self._stop_event.is_set():
+            self._sleep_until(next_deadline)
+            if self._stop_event.is_set():
+                break
+
+            now = time.perf_counter()
+            dt = now - last_tick
+            last_tick = now
+            self.step(now, dt)
+
+            # Échéances sur une grille fixe ; si le calcul a débordé, on repart de maintenant
+            next_deadline += self.period
+            if time.perf_counter() > next_deadline:
+                self.overruns += 1
+                next_deadline = time.perf_counter() + self.period
+
+
+def sleep_until(deadline, stop_event, spin_time):
+    """
+    Attend jusqu'à l'échéance (time.perf_counter) : sommeil interruptible par
+    `stop_event`, puis attente active sur les `spin_time` dernières secondes.
+    """
+    remaining = deadline - time.perf_counter()
+    if remaining > spin_time:
+        stop_event.wait(remaining - spin_time)
+    while time.perf_counter() < deadline:
+        pass
+
+
+class ControlScheduler:
+    def __init__(self, rate_hz=500.0, spin_time=0.0005, history=1000, batch=None):
+        """
+        Thread de régulation commun à plusieurs PIDLoop (plusieurs moteurs d'une même carte).
+
+        À chaque période, toutes les boucles inscrites sont exécutées l'une après
+        l'autre avec le même instant ; si `batch` est fourni, les écritures de
+        toutes les boucles sont regroupées dans ce contexte (une seule écriture
+        série par période, voir BoardManager.batch). Le thread démarre avec la
+        première boucle inscrite et s'arrête avec la dernière.
+
+        Args:
+            rate_hz: Fréquence commune des boucles en Hz.
+            spin_time: Durée d'attente active avant chaque échéance en secondes.
+            history: Nombre de périodes conservées pour les statistiques.
+            batch: Fonction optionnelle retournant un gestionnaire de contexte
+                encadrant chaque période.
+        """
+        if rate_hz <= 0:
+            raise ValueError("La fréquence de la boucle doit être positive.")
+
+        self.rate_hz = rate_hz
+        self.period = 1.0 / rate_hz
+        self.spin_time = spin_time
+        self.batch = batch
+        self.tick_count = 0
+        self.overruns = 0
+
+        self._loops = ()
+        self._periods = deque(maxlen=history)
+        self._compute_times = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add(self, loop):
+        """
+        Inscrit une boucle (exécutée dès la prochaine période).
+        """
+        with self._lock:
+            if loop not in self._loops:
+                self._loops = self._loops + (loop,)
+            if self._thread is None or not self._thread.is_alive():
+                self._periods.clear()
+                self._compute_times.clear()
+                self.tick_count = 0
+                self.overruns = 0
+                # Nouvel événement par thread : un ancien thread en cours d'arrêt ne repart pas
+                self._stop_event = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(self._stop_event,),
+                                                name="ControlScheduler", daemon=True)
+                self._thread.start()
+
+    def remove(self, loop):
+        """
+        Retire une boucle ; le thread s'arrête quand il n'en reste aucune.
+        """
+        with self._lock:
+            self._loops = tuple(other for other in self._loops if other is not loop)
+            if self._loops:
+                return
+            self._stop_event.set()
+            thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=1)
+
+    def is_scheduled(self, loop):
+        return loop in self._loops
+
+    @property
+    def loops(self):
+        return self._loops
+
+    def stats(self):
+        """
+        Statistiques des périodes communes, comme PIDLoop.stats, plus le temps
+        de calcul moyen et maximal d'une période (toutes boucles et écriture).
+        """
+        periods = list(self._periods)
+        compute = list(self._compute_times)
+        stats = {"target_period": self.period, "mean_period": 0.0, "jitter": 0.0, "max_deviation": 0.0,
+                 "overruns": self.overruns, "ticks": self.tick_count, "loops": len(self._loops),
+                 "mean_compute": sum(compute) / len(compute) if compute else 0.0,
+                 "max_compute": max(compute) if compute else 0.0}
+        if periods:
+            mean = sum(periods) / len(periods)
+            stats["mean_period"] = mean
+            stats["jitter"] = math.sqrt(sum((p - mean) ** 2 for p in periods) / len(periods))
+            stats["max_deviation"] = max(abs(p - self.period) for p in periods)
+        return stats
+
+    def _tick(self, now, dt):
+        for loop in self._loops:
+            loop.step(now, dt)
+
+    def _run(self, stop_event):
+        last_tick = time.perf_counter()
+        next_deadline = last_tick + self.period
+
+        while not stop_event.is_set():
+            sleep_until(next_deadline, stop_event, self.spin_time)
+            if stop_event.is_set():
+                break
+
+            now = time.perf_counter()
+            dt = now - last_tick
+            last_tick = now
+            self._periods.append(dt)
+            try:
+                if self.batch is not None:
+                    with self.batch():
+                        self._tick(now, dt)
+                else:
+                    self._tick(now, dt)
+            except Exception as e:
+                # Écriture groupée en échec : comptée sur chaque boucle (visible du chien de garde)
+                for loop in self._loops:
+                    loop.errors += 1
+                print(f"Erreur dans le scheduler de régulation : {e}")
+            self._compute_times.append(time.perf_counter() - now)
+            self.tick_count += 1
+
+            next_deadline += self.period
+            if time.perf_counter() > next_deadline:
+                self.overruns += 1
+                for loop in self._loops:
+                    loop.overruns += 1
+                next_deadline = time.perf_counter() + self.period
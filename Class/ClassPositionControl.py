@@ -0,0 +1,358 @@
+import math
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+
+from Class.ClassPidController import PIDLoop
+
+# Bilan d'un déplacement : cible, position et écart finals (comptes), dépassement
+# maximal au-delà de la cible (comptes), durée jusqu'à la première entrée dans la
+# fenêtre de position (move_time) puis jusqu'à la stabilisation (settle_time), en secondes
+MoveResult = namedtuple("MoveResult", ["target", "position", "error", "overshoot", "move_time", "settle_time"])
+
+
+class PositionLoop(PIDLoop):
+    def __init__(self, motor, controller, measure, position, counts_per_revolution, rate_hz=1000.0,
+                 position_gain=25.0, max_speed=3000.0, max_acceleration=2500.0, window=4, settle_speed=20.0,
+                 dwell=0.05, on_complete=None, history=100, **kwargs):
+        """
+        Régulation de position en cascade : boucle de position externe au-dessus
+        de la boucle de vitesse, exécutées à chaque période d'une même boucle à
+        fréquence fixe.
+
+        Chaque déplacement suit un profil trapézoïdal planifié à son départ
+        (accélération et décélération à `max_acceleration`, palier à
+        `max_speed`) : le profil arrive sur la cible à vitesse nulle, au lieu
+        de laisser la boucle de vitesse rattraper une décélération qu'elle ne
+        peut pas suivre. À chaque période, la consigne de vitesse est la vitesse
+        du profil plus `position_gain` fois l'écart à la position du profil
+        (comptes de quadrature signés, jamais remis à zéro) ; le PID de vitesse
+        (sortie signée) calcule alors la commande, dont le signe fixe la broche
+        de direction (Motor.apply_drive). Avec une commande anticipée
+        (`feedforward`, voir VelocityFeedforward), celle-ci porte sur la vitesse
+        de régime visée par le modèle (v + tau a), signée : en fin de
+        décélération elle freine au lieu de laisser le moteur en roue libre.
+
+        Maintien : une fois le profil terminé, dès que la position est à moins
+        d'une demi-fenêtre de la cible et que le moteur est arrêté, la commande est
+        mise à 0 et l'intégrale du PID de vitesse est remise à zéro (zone morte) ;
+        la régulation ne reprend que si la position sort de la fenêtre. Sans
+        cela, l'intégrale et les frottements secs entretiennent un cycle limite
+        autour de la cible.
+
+        Un déplacement est terminé quand la position reste dans la fenêtre
+        pendant `dwell` secondes, moteur arrêté et maintien engagé. Le moteur est
+        considéré arrêté quand aucun front n'est arrivé depuis la période des
+        fronts à `settle_speed` : près de zéro, l'estimation de vitesse retarde
+        et ne suffit pas (le moteur continuerait sur son élan hors de la fenêtre). La consigne et
+        l'erreur de la télémétrie sont la consigne de vitesse (RPM) et l'écart
+        de position à la cible (comptes).
+
+        Args:
+            motor: Instance de Motor pilotée.
+            controller: PIDController de vitesse, à sortie signée (-255 à 255).
+            measure: Fonction sans argument retournant la vitesse signée (RPM).
+            position: Fonction sans argument retournant la position (comptes).
+            counts_per_revolution: Comptes de quadrature par tour.
+            rate_hz: Fréquence de la boucle en Hz.
+            position_gain: Gain de la boucle de position (consigne de vitesse en
+                comptes/s par compte d'écart au profil, soit 1/s).
+            max_speed: Vitesse maximale des déplacements (RPM).
+            max_acceleration: Accélération et décélération du profil (RPM/s),
+                à garder en deçà de ce que la boucle de vitesse suit sans retard.
+            window: Demi-largeur de la fenêtre de position (comptes).
+            settle_speed: Vitesse sous laquelle le moteur est considéré arrêté (RPM) ;
+                l'élan restant doit tenir dans la fenêtre.
+            dwell: Durée pendant laquelle la position doit rester dans la fenêtre (s).
+            on_complete: Fonction optionnelle appelée avec le MoveResult de chaque
+                déplacement (depuis le thread de la boucle).
+            history: Nombre de bilans de déplacement conservés.
+            kwargs: Autres options de PIDLoop (spin_time, telemetry, scheduler, feedforward...).
+        """
+        super().__init__(motor, controller, measure, rate_hz=rate_hz, **kwargs)
+        self.position = position
+        self.counts_per_revolution = counts_per_revolution
+        self.position_gain = position_gain
+        self.max_speed = max_speed
+        self.max_acceleration = max_acceleration
+        self.window = window
+        self.settle_speed = settle_speed
+        self.dwell = dwell
+        self.on_complete = on_complete
+
+        self.target = None  # Cible courante (comptes) ; None : position au démarrage
+        self.position_error = 0
+        self.moving = False
+        self.holding = False  # Zone morte : commande nulle dans la fenêtre
+        self.moves = deque(maxlen=history)
+        self._move_callback = None
+        self._pending = None  # (cible, rappel) en attente de la prochaine période
+        self._pending_lock = threading.Lock()
+        self._move_start = None
+        self._first_entry = None
+        self._last_entry = None
+        self._last_position = None
+        self._last_edge = None  # Instant du dernier changement de position
+        self._overshoot = 0
+        self._direction = 0
+        self._profile = None  # (origine, sens, durées et vitesse de palier du trapèze)
+
+    def move_to(self, target, on_complete=None):
+        """
+        Démarre un déplacement vers `target` (comptes) à la prochaine période.
+
+        Args:
+            target: Position visée en comptes de quadrature.
+            on_complete: Fonction optionnelle appelée avec le MoveResult de ce
+                déplacement, en plus de celle de la boucle.
+        """
+        with self._pending_lock:
+            self._pending = (int(round(target)), on_complete)
+        self.moving = True
+
+    @property
+    def in_position(self):
+        return self.target is not None and not self.moving and abs(self.position_error) <= self.window
+
+    def _plan(self, start, target):
+        # Trapèze (ou triangle si la distance est trop courte pour atteindre max_speed), en comptes et secondes
+        counts_per_rpm = self.counts_per_revolution / 60.0
+        distance = abs(target - start)
+        acceleration = self.max_acceleration * counts_per_rpm
+        speed = min(self.max_speed * counts_per_rpm, math.sqrt(distance * acceleration))
+        ramp = speed / acceleration if speed > 0 else 0.0
+        cruise = (distance - speed * ramp) / speed if speed > 0 else 0.0
+        return start, 1 if target >= start else -1, speed, acceleration, ramp, cruise
+
+    def _reference(self, elapsed):
+        """
+        Position (comptes), vitesse (comptes/s) et accélération (comptes/s²) du
+        profil, et fin du profil.
+        """
+        start, direction, speed, acceleration, ramp, cruise = self._profile
+        if elapsed < ramp:
+            travelled, velocity, rate = 0.5 * acceleration * elapsed ** 2, acceleration * elapsed, acceleration
+        elif elapsed < ramp + cruise:
+            travelled, velocity, rate = speed * (elapsed - 0.5 * ramp), speed, 0.0
+        elif elapsed < 2 * ramp + cruise:
+            remaining = 2 * ramp + cruise - elapsed
+            travelled = speed * (ramp + cruise) - 0.5 * acceleration * remaining ** 2
+            velocity, rate = acceleration * remaining, -acceleration
+        else:
+            return self.target, 0.0, 0.0, True
+        return start + direction * travelled, direction * velocity, direction * rate, False
+
+    def _start_move(self, now, position, target, on_complete):
+        # Le profil part de la position mesurée, à vitesse nulle
+        self._profile = self._plan(position, target)
+        self.holding = False
+        self.target = target
+        self._move_callback = on_complete
+        self._move_start = now
+        self._first_entry = self._last_entry = None
+        self._overshoot = 0
+        self._direction = 1 if target >= position else -1
+        self.moving = True
+
+    def _stopped(self, now, position):
+        # Aucun front depuis l'intervalle entre fronts à settle_speed
+        if position != self._last_position:
+            self._last_position, self._last_edge = position, now
+            return False
+        return now - self._last_edge >= 60.0 / (self.settle_speed * self.counts_per_revolution)
+
+    def _track_move(self, now, position, error, stopped):
+        inside = abs(error) <= self.window
+        # Dépassement : position au-delà de la cible dans le sens du déplacement
+        self._overshoot = max(self._overshoot, -error * self._direction)
+        if not inside:
+            self._last_entry = None
+            return
+        if self._last_entry is None:
+            self._last_entry = now
+            if self._first_entry is None:
+                self._first_entry = now
+        if not self.holding or not stopped or now - self._last_entry < self.dwell:
+            return
+
+        result = MoveResult(self.target, position, error, self._overshoot, self._first_entry - self._move_start,
+                            self._last_entry - self._first_entry)
+        self.moves.append(result)
+        with self._pending_lock:
+            if self._pending is None:
+                self.moving = False
+        for callback in (self._move_callback, self.on_complete):
+            if callback is not None:
+                callback(result)
+
+    def step(self, now, dt):
+        """
+        Exécute une période : boucle de position puis boucle de vitesse et application de la commande signée.
+
+        Args:
+            now: Instant de la période (time.perf_counter).
+            dt: Temps écoulé depuis la période précédente en secondes.
+        """
+        cpu_start = time.thread_time()
+        self.last_tick = now
+        self._periods.append(dt)
+        self.period_histogram.observe(dt)
+        try:
+            position = self.position()
+            with self._pending_lock:
+                pending, self._pending = self._pending, None
+            if pending is not None:
+                self._start_move(now, position, *pending)
+            elif self.target is None:
+                self.target = position  # Maintien de la position au démarrage
+
+            if self._profile is not None:
+                reference, velocity, rate, finished = self._reference(now - self._move_start)
+            else:
+                reference, velocity, rate, finished = self.target, 0.0, 0.0, True
+
+            error = self.target - position
+            self.measurement = self.measure()
+            stopped = self._stopped(now, position)
+            if self.holding:
+                self.holding = abs(error) <= self.window
+            elif finished and abs(error) <= self.window / 2 and stopped:
+                self.holding = True
+                self.controller.reset()  # L'intégrale ne doit pas pousser contre les frottements à l'arrêt
+
+            if self.holding:
+                self.setpoint = 0.0
+                command = 0
+            else:
+                to_rpm = 60.0 / self.counts_per_revolution
+                self.setpoint = (velocity + self.position_gain * (reference - position)) * to_rpm
+                anticipated = 0.0
+                feedforward = self.feedforward
+                if feedforward is not None and (velocity != 0.0 or rate != 0.0):
+                    # Vitesse de régime visée par le modèle (v + tau a) : négative en fin de
+                    # décélération, la commande freine au lieu de laisser le moteur en roue libre
+                    drive = (velocity + getattr(feedforward, "time_constant", 0.0) * rate) * to_rpm
+                    anticipated = math.copysign(feedforward(abs(drive)), drive)
+                measured_at = self.measure_time() if self.measure_time is not None else None
+                command = int(round(self.controller.update(self.setpoint, self.measurement, dt, anticipated,
+                                                           measurement_time=measured_at)))
+            self.motor.apply_drive(command)
+            self.position_error = error
+            if self.moving and self._move_start is not None:
+                self._track_move(now, position, error, stopped)
+
+            if self.telemetry is not None:
+                self.telemetry.append(now, self.setpoint, self.measurement, command, error)
+            recorder = self.motor.recorder
+            if recorder is not None:
+                controller = self.controller
+                recorder.record(now, self.setpoint, self.measurement, command, error,
+                                controller.p_term, controller.i_term, controller.d_term)
+        except Exception as e:
+            self.errors += 1
+            print(f"Erreur dans la boucle de position : {e}")
+        self.tick_count += 1
+        self.cpu_time += time.thread_time() - cpu_start
+
+
+def check_moves(feedforward=False, targets=(240, -144, 960, 984, 480, 0), hold_time=1.0, max_overshoot=None,
+                **options):
+    """
+    Vérifie le mode position sur le moteur simulé en temps virtuel (gains SIMULATED_GAINS).
+
+    Pour chaque cible : le déplacement doit se terminer, le dépassement rester
+    sous `max_overshoot` comptes, puis pendant `hold_time` secondes la commande
+    doit rester nulle, la position dans la fenêtre et in_position vrai ; sur la
+    seconde moitié du maintien, le moteur doit être immobile.
+
+    Args:
+        feedforward: True pour la commande anticipée tirée du modèle simulé.
+        targets: Cibles successives en comptes.
+        hold_time: Durée de maintien vérifiée après chaque déplacement (s).
+        max_overshoot: Dépassement toléré (comptes ; par défaut deux fenêtres avec
+            anticipation, quatre sans).
+        options: Options de PositionLoop.
+
+    Returns:
+        (liste des MoveResult, liste des défauts constatés).
+    """
+    from Class.ClassMotor import Motor
+    from Class.ClassPidController import PIDController
+    from Class.ClassSimulatedBoard import SIMULATED_GAINS, SimulatedTelemetrix
+    from Class.ClassTrajectory import VelocityFeedforward
+
+    board = SimulatedTelemetrix(realtime=False)
+    motor = Motor(board, pwm_pin=board.pwm_pin, dir_pin=board.dir_pin, encoder_pin_a=board.encoder_pin_a,
+                  encoder_pin_b=board.encoder_pin_b, ticks_per_revolution=board.ticks_per_revolution)
+    if feedforward:
+        model = board.model
+        options.setdefault("feedforward", VelocityFeedforward(model.gain, model.tau_mechanical,
+                                                              offset=model.deadband))
+    loop = PositionLoop(motor, PIDController(*SIMULATED_GAINS, output_min=-255, output_max=255),
+                        motor.estimate_speed, lambda: motor.encoder.position, motor.counts_per_revolution,
+                        **options)
+    if max_overshoot is None:
+        max_overshoot = loop.window * (2 if feedforward else 4)
+    dt = 1.0 / loop.rate_hz
+
+    def run(duration):
+        for _ in range(int(round(duration / dt))):
+            board.advance(dt)
+            loop.step(board.clock(), dt)
+            yield motor.position_counts
+
+    results, failures = [], []
+    try:
+        for target in targets:
+            loop.move_to(target)
+            for _ in run(5.0):
+                if not loop.moving:
+                    break
+            if loop.moving:
+                failures.append(f"{target} : déplacement non terminé en 5 s")
+                continue
+            result = loop.moves[-1]
+            results.append(result)
+            if result.overshoot > max_overshoot:
+                failures.append(f"{target} : dépassement de {result.overshoot} comptes (> {max_overshoot})")
+            positions, commands, inside = [], set(), True
+            for position in run(hold_time):
+                positions.append(position)
+                commands.add(motor.pwm)
+                inside = inside and loop.in_position
+            settled = positions[len(positions) // 2:]
+            if commands != {0} or not inside or min(settled) != max(settled):
+                failures.append(f"{target} : maintien instable (positions {min(positions)} à {max(positions)}, "
+                                f"PWM {min(commands)} à {max(commands)})")
+    finally:
+        motor.stop()
+        board.shutdown()
+    return results, failures
+
+
+def main():
+    """
+    Contrôle du mode position sur le moteur simulé, sans puis avec commande
+    anticipée : python -m Class.ClassPositionControl. Code de sortie 1 si un
+    dépassement ou un maintien est hors tolérance.
+
+    L'essai avance la simulation pas à pas (temps virtuel, voir check_moves) :
+    il ne s'exécute pas sur la carte réelle.
+    """
+    failed = False
+    for feedforward in (False, True):
+        results, failures = check_moves(feedforward=feedforward)
+        print(f"Commande anticipée : {'oui' if feedforward else 'non'}")
+        print(f"{'cible':>7} {'position':>9} {'dépassement':>12} {'déplacement':>12} {'stabilisation':>14}")
+        for result in results:
+            print(f"{result.target:>7} {result.position:>9} {result.overshoot:>12} "
+                  f"{result.move_time * 1000:>9.0f} ms {result.settle_time * 1000:>11.0f} ms")
+        for failure in failures:
+            print(f"ÉCHEC {failure}")
+        failed = failed or bool(failures)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+import os
+import time
+
+import numpy as np
+
+from Class.ClassTelemetryRecorder import TelemetryReader
+
+LOD_CACHE_FILE = "lod_cache.npz"
+REPLAY_SPEEDS = (1, 2, 5, 10, 20, 50, 100)
+# Décimation de l'affichage : enveloppe min/max de la pyramide ou LTTB
+DECIMATION_MODES = ("minmax", "lttb")
+# En LTTB, niveau le plus fin d'au plus LTTB_OVERSAMPLING x max_points points, réduit par lttb
+LTTB_OVERSAMPLING = 8
+
+
+def lttb(t, y, n_out, max_passes=8):
+    """
+    Décimation « Largest Triangle Three Buckets » : conserve la forme visuelle
+    d'une courbe avec n_out points.
+
+    Vectorisée : chaque point retenu forme le plus grand triangle avec le
+    point moyen de l'intervalle suivant et un point d'ancrage de l'intervalle
+    précédent. Le premier passage ancre sur le point moyen de l'intervalle
+    précédent, les suivants sur le point retenu au passage d'avant (l'ancre
+    de l'algorithme séquentiel), jusqu'à ce que la sélection ne change plus
+    (au plus `max_passes` passages).
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return t, y
+    t = np.asarray(t, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Intervalles [edges[i], edges[i + 1]) entre le premier et le dernier point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, sizes = edges[:-1], np.diff(edges)
+    mean_t = np.add.reduceat(t[:n - 1], starts) / sizes
+    mean_y = np.add.reduceat(y[:n - 1], starts) / sizes
+    next_t, next_y = np.append(mean_t[1:], t[-1]), np.append(mean_y[1:], y[-1])
+    anchor_t, anchor_y = np.append(t[0], mean_t[:-1]), np.append(y[0], mean_y[:-1])
+
+    buckets = np.repeat(np.arange(len(starts)), sizes)
+    inner_t, inner_y = t[1:n - 1], y[1:n - 1]
+    chosen = None
+    for _ in range(max_passes):
+        at, ay = anchor_t[buckets], anchor_y[buckets]
+        area = np.abs((at - next_t[buckets]) * (inner_y - ay) - (at - inner_t) * (next_y[buckets] - ay))
+        # Premier maximum de chaque intervalle
+        best = np.flatnonzero(area == np.maximum.reduceat(area, starts - 1)[buckets])
+        _, first = np.unique(buckets[best], return_index=True)
+        previous, chosen = chosen, best[first] + 1
+        if previous is not None and np.array_equal(previous, chosen):
+            break
+        anchor_t, anchor_y = np.append(t[0], t[chosen[:-1]]), np.append(y[0], y[chosen[:-1]])
+
+    selected = np.concatenate(([0], chosen, [n - 1]))
+    return t[selected], y[selected]
+
+
+class DecimationPyramid:
+    def __init__(self, reader, channels, base_bucket=16, factor=4, min_buckets=256, build=True):
+        """
+        Pyramide de niveaux de détail min/max pour de très longues séries.
+
+        Les données brutes restent dans les segments de la session, projetés en
+        mémoire par le TelemetryReader : seules celles de la plage demandée sont
+        lues. Le niveau 1 regroupe `base_bucket` échantillons bruts par
+        intervalle et se calcule segment par segment ; chaque niveau suivant
+        regroupe `factor` intervalles du précédent, jusqu'à moins de
+        `min_buckets` intervalles. Une requête choisit le niveau le plus fin qui
+        tient dans le nombre de points demandé.
+
+        Args:
+            reader: TelemetryReader de la session.
+            channels: Noms des voies.
+            base_bucket: Taille des intervalles du premier niveau.
+            factor: Facteur de réduction entre deux niveaux.
+            min_buckets: Taille en dessous de laquelle on arrête la pyramide.
+            build: False pour une pyramide vide (voir load).
+        """
+        self.reader = reader
+        self.channels = tuple(channels)
+        self.base_bucket = base_bucket
+        self.levels = []
+        if not build or len(reader) <= min_buckets:
+            return
+
+        # Niveau 1 : un segment projeté en mémoire à la fois
+        times, minima, maxima = [], {name: [] for name in self.channels}, {name: [] for name in self.channels}
+        for info in reader.segments:
+            data = reader.segment(info)
+            starts = np.arange(0, len(data), base_bucket)
+            times.append(np.asarray(data["time"][starts]))
+            for name in self.channels:
+                values = data[name]
+                minima[name].append(np.minimum.reduceat(values, starts))
+                maxima[name].append(np.maximum.reduceat(values, starts))
+        level_time = np.concatenate(times)
+        level_min = {name: np.concatenate(parts) for name, parts in minima.items()}
+        level_max = {name: np.concatenate(parts) for name, parts in maxima.items()}
+        self.levels.append({"time": level_time, "min": level_min, "max": level_max})
+
+        while len(level_time) > min_buckets:
+            starts = np.arange(0, len(level_time), factor)
+            level_time = level_time[starts]
+            level_min = {name: np.minimum.reduceat(values, starts) for name, values in level_min.items()}
+            level_max = {name: np.maximum.reduceat(values, starts) for name, values in level_max.items()}
+            self.levels.append({"time": level_time, "min": level_min, "max": level_max})
+
+    def save(self, path, **metadata):
+        arrays = {"meta_levels": np.array(len(self.levels)), "meta_base_bucket": np.array(self.base_bucket)}
+        for key, value in metadata.items():
+            arrays[f"meta_{key}"] = np.array(value)
+        for k, level in enumerate(self.levels):
+            arrays[f"L{k}_time"] = level["time"]
+            for name in level["min"]:
+                arrays[f"L{k}_{name}_min"] = level["min"][name]
+                arrays[f"L{k}_{name}_max"] = level["max"][name]
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path, reader, channels):
+        """
+        Recharge une pyramide sauvegardée, associée aux segments de la session.
+        """
+        with np.load(path) as cache:
+            pyramid = cls(reader, channels, base_bucket=int(cache["meta_base_bucket"]), build=False)
+            for k in range(int(cache["meta_levels"])):
+                pyramid.levels.append({
+                    "time": cache[f"L{k}_time"],
+                    "min": {name: cache[f"L{k}_{name}_min"] for name in pyramid.channels},
+                    "max": {name: cache[f"L{k}_{name}_max"] for name in pyramid.channels},
+                })
+        return pyramid
+
+    def raw_count(self, t_start, t_end):
+        """
+        Nombre d'échantillons bruts de la plage (majoré d'après le niveau 1,
+        sans lire les segments).
+        """
+        if not self.levels:
+            return len(self.reader)
+        first, last = np.searchsorted(self.levels[0]["time"], (t_start, t_end))
+        return (last - first + 1) * self.base_bucket
+
+    def query(self, t_start, t_end, max_points=2000, mode="minmax"):
+        """
+        Données à tracer pour une plage de temps, au niveau de détail adapté.
+
+        Args:
+            t_start, t_end: Plage de temps.
+            max_points: Nombre maximal de points par voie.
+            mode: "minmax" (enveloppe du niveau le plus fin qui tient dans
+                max_points) ou "lttb" (niveau le plus fin d'au plus
+                LTTB_OVERSAMPLING x max_points points, réduit par lttb).
+
+        Returns:
+            Un dictionnaire {nom: (t, y)}.
+        """
+        if mode not in DECIMATION_MODES:
+            raise ValueError(f"Décimation inconnue : {mode}")
+        budget = max_points if mode == "minmax" else LTTB_OVERSAMPLING * max_points
+        if self.raw_count(t_start, t_end) <= budget:
+            data = self.reader.read(t_start, t_end)
+            series = {name: (data["time"], data[name]) for name in self.channels}
+        else:
+            for level in self.levels:
+                first, last = np.searchsorted(level["time"], (t_start, t_end))
+                first = max(first - 1, 0)
+                if 2 * (last - first) <= budget or level is self.levels[-1]:
+                    break
+            t = np.repeat(level["time"][first:last], 2)
+            series = {name: (t, np.column_stack((level["min"][name][first:last],
+                                                 level["max"][name][first:last])).ravel())
+                      for name in self.channels}
+        if mode == "lttb":
+            series = {name: lttb(t, y, max_points) for name, (t, y) in series.items()}
+        return series
+
+
+class SessionReplay:
+    def __init__(self, directory, channels=("rpm", "setpoint")):
+        """
+        Relecture d'une session enregistrée : lecture accélérée, déplacement et
+        niveaux de détail pour l'affichage.
+
+        La session n'est pas chargée en mémoire : les fenêtres affichées sont
+        lues dans les segments projetés en mémoire ou dans la pyramide de
+        décimation. Celle-ci est mise en cache dans le dossier de la session ;
+        elle est reconstruite seulement si la session a changé. La décimation
+        (DECIMATION_MODES) se choisit avec l'attribut `decimation`.
+
+        Args:
+            directory: Dossier de la session (voir TelemetryRecorder).
+            channels: Voies affichées.
+        """
+        self.directory = directory
+        self.reader = TelemetryReader(directory)
+        self.samples = len(self.reader)
+        if self.samples == 0:
+            raise ValueError(f"Session vide : {directory}")
+        self.t_start, self.t_end = self.reader.time_range()
+        self.decimation = "minmax"
+
+        start = time.perf_counter()
+        cache_path = os.path.join(directory, LOD_CACHE_FILE)
+        self.pyramid = None
+        if os.path.exists(cache_path):
+            try:
+                with np.load(cache_path) as cache:
+                    valid = int(cache["meta_samples"]) == self.samples
+                if valid:
+                    self.pyramid = DecimationPyramid.load(cache_path, self.reader, channels)
+            except (KeyError, ValueError, OSError):
+                self.pyramid = None
+        if self.pyramid is None:
+            self.pyramid = DecimationPyramid(self.reader, channels)
+            self.pyramid.save(cache_path, samples=self.samples)
+        self.load_time = time.perf_counter() - start
+
+        self.cursor = self.t_start
+        self.speed = 1
+        self.playing = False
+
+    @property
+    def duration(self):
+        return self.t_end - self.t_start
+
+    def advance(self, wall_dt):
+        """
+        Avance le curseur de wall_dt secondes réelles multipliées par la vitesse.
+        """
+        if self.playing:
+            self.cursor = min(self.cursor + wall_dt * self.speed, self.t_end)
+            if self.cursor >= self.t_end:
+                self.playing = False
+
+    def seek(self, fraction):
+        """
+        Place le curseur à une fraction (0 à 1) de la session.
+        """
+        self.cursor = self.t_start + min(max(fraction, 0.0), 1.0) * self.duration
+
+    def position(self):
+        return (self.cursor - self.t_start) / self.duration if self.duration > 0 else 0.0
+
+    def window(self, duration, max_points=2000):
+        """
+        Données de la fenêtre [curseur - duration, curseur], temps relatif au curseur.
+
+        Returns:
+            Un dictionnaire {nom: (t, y)} avec t <= 0.
+        """
+        data = self.pyramid.query(self.cursor - duration, self.cursor, max_points, self.decimation)
+        return {name: (t - self.cursor, y) for name, (t, y) in data.items()}
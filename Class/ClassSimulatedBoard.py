@@ -0,0 +1,375 @@
+import math
+import os
+import random
+import threading
+import time
+
+# Type de rapport utilisé par telemetrix pour les entrées numériques
+DIGITAL_REPORT = 2
+# Gains PID (kp, ki, kd) réglés pour le moteur simulé par défaut (DCMotorModel), pas pour un moteur réel
+SIMULATED_GAINS = (0.066, 0.43, 0.0)
+
+
+class DCMotorModel:
+    def __init__(self, max_rpm=7000.0, deadband=15, tau_mechanical=0.15, tau_electrical=0.0,
+                 load_rpm=0.0, noise_rpm=0.0):
+        """
+        Modèle de moteur à courant continu piloté en PWM.
+
+        Premier ordre (constante de temps mécanique) ou second ordre si une
+        constante de temps électrique est donnée. Les équations sont discrétisées
+        de manière exacte, ce qui reste stable quel que soit le pas de calcul.
+
+        Args:
+            max_rpm: Vitesse atteinte en régime permanent à PWM = 255.
+            deadband: PWM en dessous duquel le moteur ne tourne pas (frottements).
+            tau_mechanical: Constante de temps mécanique en secondes.
+            tau_electrical: Constante de temps électrique en secondes (0 = premier ordre).
+            load_rpm: Perte de vitesse due à la charge en régime permanent.
+            noise_rpm: Écart type du bruit ajouté sur la vitesse.
+        """
+        self.max_rpm = max_rpm
+        self.deadband = deadband
+        self.gain = max_rpm / (255 - deadband)
+        self.tau_mechanical = tau_mechanical
+        self.tau_electrical = tau_electrical
+        self.load_rpm = load_rpm
+        self.noise_rpm = noise_rpm
+        self.reset()
+
+    @classmethod
+    def from_plant_model(cls, plant, deadband=15, **kwargs):
+        """
+        Modèle réglé sur un PlantModel identifié (gain en RPM/PWM et constante de temps).
+
+        Le retard identifié n'est pas reproduit ; il vient en pratique de la
+        mesure de vitesse, qui est elle aussi simulée.
+        """
+        return cls(max_rpm=plant.gain * (255 - deadband), deadband=deadband,
+                   tau_mechanical=plant.time_constant, **kwargs)
+
+    def reset(self):
+        self.pwm = 0
+        self.direction = 1
+        self.drive = 0.0       # PWM effectif après la dynamique électrique
+        self.rpm = 0.0         # Vitesse de rotation (signée)
+        self.position = 0.0    # Position en tours (signée)
+
+    def steady_state_rpm(self, pwm):
+        """
+        Vitesse en régime permanent pour un PWM donné (sans charge ni bruit).
+        """
+        return self.gain * max(abs(pwm) - self.deadband, 0)
+
+    def step(self, dt):
+        """
+        Fait avancer le modèle de dt secondes.
+
+        Returns:
+            Le déplacement angulaire en tours pendant le pas.
+        """
+        target = self.direction * self.pwm
+        if self.tau_electrical > 0:
+            self.drive += (1 - math.exp(-dt / self.tau_electrical)) * (target - self.drive)
+        else:
+            self.drive = target
+
+        steady = max(self.steady_state_rpm(self.drive) - self.load_rpm, 0.0)
+        steady = math.copysign(steady, self.drive)
+        previous = self.rpm
+        self.rpm += (1 - math.exp(-dt / self.tau_mechanical)) * (steady - self.rpm)
+        if self.noise_rpm > 0:
+            self.rpm += random.gauss(0.0, self.noise_rpm)
+
+        displacement = (previous + self.rpm) / 2 / 60 * dt
+        self.position += displacement
+        return displacement
+
+
+class SimulatedAxis:
+    def __init__(self, model, pwm_pin, dir_pin, encoder_pins, ticks_per_revolution):
+        """
+        Moteur simulé relié à la carte : modèle, broches et compteur de l'encodeur.
+        """
+        self.model = model
+        self.pwm_pin = pwm_pin
+        self.dir_pin = dir_pin
+        self.encoder_pin_a, self.encoder_pin_b = encoder_pins
+        self.counts_per_revolution = 4 * ticks_per_revolution
+        self.counts = 0
+        self.encoder_connected = True  # False : fil d'encodeur coupé (aucun front transmis)
+
+
+class SimulatedTelemetrix:
+    def __init__(self, model=None, pwm_pin=3, dir_pin=12, encoder_pins=(2, 7),
+                 ticks_per_revolution=12, step_time=0.0005, realtime=True):
+        """
+        Carte Arduino simulée, utilisable à la place de telemetrix.Telemetrix.
+
+        Elle reproduit les appels utilisés par le projet et déclenche les
+        callbacks d'encodeur (canaux A et B en quadrature) avec le même format de
+        données que telemetrix : [DIGITAL_REPORT, broche, valeur, horodatage].
+        D'autres moteurs peuvent être branchés sur la même carte (simulate_motor).
+
+        Args:
+            model: Instance de DCMotorModel (un modèle par défaut si None).
+            pwm_pin: Broche PWM du moteur simulé.
+            dir_pin: Broche de direction du moteur simulé.
+            encoder_pins: Broches (A, B) de l'encodeur.
+            ticks_per_revolution: Impulsions par tour sur chaque canal.
+            step_time: Pas d'intégration du modèle en secondes.
+            realtime: Si True, un thread fait avancer le modèle au rythme réel.
+                Sinon le temps est virtuel et avance uniquement via `advance`,
+                aussi vite que le calcul le permet.
+        """
+        self.model = model if model is not None else DCMotorModel()
+        self.pwm_pin = pwm_pin
+        self.dir_pin = dir_pin
+        self.encoder_pin_a, self.encoder_pin_b = encoder_pins
+        self.ticks_per_revolution = ticks_per_revolution
+        self.step_time = step_time
+        self.realtime = realtime
+        self.serial_port = None
+
+        self.axes = [SimulatedAxis(self.model, pwm_pin, dir_pin, encoder_pins, ticks_per_revolution)]
+        self.pin_modes = {}
+        self.pin_values = {}
+        self.digital_callbacks = {}
+        self.sim_time = 0.0
+        self.edge_count = 0
+        self.serial_writes = 0  # Écritures sur la liaison série (une par commande ou par lot)
+        self.loop_back_callback = None
+        self._loop_backs = []  # Caractères à renvoyer au prochain pas de simulation
+        self._stalled_until = 0.0  # Liaison bloquée jusqu'à cet instant (time.perf_counter)
+        self._reports_blocked = False
+        self._lock = threading.RLock()
+        self._epoch = time.time()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        print("Carte simulée initialisée.")
+        if realtime:
+            self._thread = threading.Thread(target=self._run, name="SimulatedTelemetrix", daemon=True)
+            self._thread.start()
+
+    def simulate_motor(self, pwm_pin, dir_pin, encoder_pins, ticks_per_revolution=12, model=None):
+        """
+        Branche un moteur simulé supplémentaire (sans effet si la broche PWM est déjà simulée).
+
+        Returns:
+            Le DCMotorModel du moteur branché sur `pwm_pin`.
+        """
+        with self._lock:
+            for axis in self.axes:
+                if axis.pwm_pin == pwm_pin:
+                    return axis.model
+            axis = SimulatedAxis(model if model is not None else DCMotorModel(), pwm_pin, dir_pin,
+                                 encoder_pins, ticks_per_revolution)
+            self.axes.append(axis)
+            return axis.model
+
+    # === API telemetrix ===
+
+    def set_pin_mode_digital_output(self, pin_number):
+        self.pin_modes[pin_number] = "digital_output"
+        self.pin_values[pin_number] = 0
+
+    def set_pin_mode_analog_output(self, pin_number):
+        self.pin_modes[pin_number] = "analog_output"
+        self.pin_values[pin_number] = 0
+
+    def set_pin_mode_digital_input(self, pin_number, callback=None):
+        self.pin_modes[pin_number] = "digital_input"
+        self.digital_callbacks[pin_number] = callback
+
+    def digital_write(self, pin, value):
+        self._wait_link()
+        with self._lock:
+            self.serial_writes += 1
+            self._digital_write(pin, value)
+
+    def analog_write(self, pin, value):
+        self._wait_link()
+        with self._lock:
+            self.serial_writes += 1
+            self._analog_write(pin, value)
+
+    def loop_back(self, start_character, callback=None):
+        """
+        Renvoie un caractère par la liaison (au pas de simulation suivant), comme
+        la commande de test de telemetrix.
+        """
+        self._wait_link()
+        with self._lock:
+            self.loop_back_callback = callback
+            self._loop_backs.append(start_character)
+
+    def write_batch(self, commands):
+        """
+        Applique plusieurs commandes en une seule écriture, comme un lot envoyé sur la liaison série.
+
+        Args:
+            commands: Suite de (type, broche, valeur), type valant "analog" ou "digital".
+        """
+        self._wait_link()
+        with self._lock:
+            self.serial_writes += 1
+            for kind, pin, value in commands:
+                if kind == "analog":
+                    self._analog_write(pin, value)
+                else:
+                    self._digital_write(pin, value)
+
+    def emergency_write(self, commands):
+        """
+        Écriture d'arrêt d'urgence (suite de (type, broche, valeur)) : elle ne
+        fait pas la queue derrière une écriture bloquée (voir stall_link) et
+        part même pendant le blocage.
+        """
+        with self._lock:
+            self.serial_writes += 1
+            for kind, pin, value in commands:
+                if kind == "analog":
+                    self._analog_write(pin, value)
+                else:
+                    self._digital_write(pin, value)
+
+    def _digital_write(self, pin, value):
+        self.pin_values[pin] = value
+        for axis in self.axes:
+            if pin == axis.dir_pin:
+                axis.model.direction = 1 if value else -1
+
+    def _analog_write(self, pin, value):
+        self.pin_values[pin] = value
+        for axis in self.axes:
+            if pin == axis.pwm_pin:
+                axis.model.pwm = min(max(int(value), 0), 255)
+
+    def shutdown(self):
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._thread = None
+        print("Carte simulée arrêtée.")
+
+    # === Simulation ===
+
+    def stall_link(self, duration):
+        """
+        Simule une liaison série bloquée pendant `duration` secondes : les
+        écritures ordinaires attendent la fin du blocage (seule
+        emergency_write passe) et aucun rapport (fronts, renvois) ne parvient
+        à l'hôte.
+        """
+        self._stalled_until = time.perf_counter() + duration
+
+    def link_stalled(self):
+        return time.perf_counter() < self._stalled_until
+
+    def _wait_link(self):
+        while self.link_stalled():
+            time.sleep(0.001)
+
+    def clock(self):
+        """
+        Horloge de la simulation, dans la même base que les horodatages des callbacks.
+        """
+        return self._epoch + self.sim_time
+
+    def advance(self, duration):
+        """
+        Fait avancer la simulation de `duration` secondes (temps virtuel).
+        """
+        steps = max(1, int(round(duration / self.step_time)))
+        for _ in range(steps):
+            self._step(self.step_time)
+
+    def _step(self, dt):
+        with self._lock:
+            start_time = self.sim_time
+            self.sim_time += dt
+            moves = []
+            for axis in self.axes:
+                start_position = axis.model.position
+                axis.model.step(dt)
+                moves.append((axis, start_position, axis.model.position))
+            loop_backs, self._loop_backs = self._loop_backs, []
+        stalled = self._reports_blocked = self.link_stalled()
+        if stalled:
+            loop_backs = []  # Renvois perdus avec la liaison
+        callback = self.loop_back_callback
+        if callback is not None:
+            for character in loop_backs:
+                callback(character)
+
+        for axis, start_position, end_position in moves:
+            counts_per_revolution = axis.counts_per_revolution
+            new_counts = math.floor(end_position * counts_per_revolution)
+            if new_counts == axis.counts:
+                continue
+
+            # Un front par changement de compte, horodaté par interpolation dans le pas
+            direction = 1 if new_counts > axis.counts else -1
+            for boundary in range(axis.counts + (direction > 0), new_counts + (direction > 0), direction):
+                fraction = (boundary / counts_per_revolution - start_position) / (end_position - start_position)
+                timestamp = self._epoch + start_time + min(max(fraction, 0.0), 1.0) * dt
+                count = boundary if direction > 0 else boundary - 1
+                self._emit_edge(axis, boundary, count, timestamp)
+            axis.counts = new_counts
+
+    def _emit_edge(self, axis, boundary, count, timestamp):
+        """
+        Déclenche le callback de la broche qui change entre les comptes boundary - 1 et boundary.
+        """
+        phase = count % 4
+        if boundary % 4 in (1, 3):
+            pin, value = axis.encoder_pin_a, 1 if phase in (1, 2) else 0
+        else:
+            pin, value = axis.encoder_pin_b, 1 if phase in (2, 3) else 0
+        self.pin_values[pin] = value
+        self.edge_count += 1
+        callback = self.digital_callbacks.get(pin)
+        if callback is not None and axis.encoder_connected and not self._reports_blocked:
+            callback([DIGITAL_REPORT, pin, value, timestamp])
+
+    def _run(self):
+        """
+        Fait avancer le modèle pour suivre le temps réel.
+        """
+        start = time.perf_counter()
+        self._epoch = time.time() - self.sim_time
+        while not self._stop_event.is_set():
+            elapsed = time.perf_counter() - start
+            while self.sim_time + self.step_time <= elapsed:
+                self._step(self.step_time)
+            self._stop_event.wait(self.step_time)
+
+
+def simulation_requested(simulated=None):
+    """
+    Choix de la carte simulée : `simulated` s'il est donné, sinon la variable
+    d'environnement MOTOR_SIMULATION (1, true ou yes).
+    """
+    if simulated is None:
+        return os.environ.get("MOTOR_SIMULATION", "").strip().lower() in ("1", "true", "yes")
+    return bool(simulated)
+
+
+def open_board(simulated=None, **kwargs):
+    """
+    Ouvre la connexion à la carte : réelle (telemetrix) ou simulée.
+
+    Args:
+        simulated: True pour la carte simulée, False pour l'Arduino. Si None, la
+            variable d'environnement MOTOR_SIMULATION décide (1, true ou yes).
+        kwargs: Arguments transmis au constructeur de la carte.
+
+    Returns:
+        Une instance de Telemetrix ou de SimulatedTelemetrix.
+    """
+    if simulation_requested(simulated):
+        return SimulatedTelemetrix(**kwargs)
+
+    from telemetrix import telemetrix
+    return telemetrix.Telemetrix(**kwargs)
@@ -0,0 +1,191 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+
+# Échantillon de vitesse horodaté publié par le moteur d'acquisition
+SpeedSample = namedtuple("SpeedSample", ["timestamp", "rpm", "impulsions", "interval"])
+
+
+class SpeedAcquisition:
+    def __init__(self, motor, sample_rate=10.0):
+        """
+        Moteur d'acquisition de vitesse tournant dans un thread dédié.
+
+        Le compteur de l'encodeur est échantillonné à fréquence fixe sans jamais
+        être remis à zéro, ce qui ne bloque ni l'interface ni le contrôleur. La
+        vitesse est fournie par Motor.estimate_speed (comptage ou période entre
+        fronts selon la vitesse), ce qui permet des fenêtres courtes.
+
+        Args:
+            motor: Instance de Motor dont on lit le compteur d'encodeur.
+            sample_rate: Fréquence d'échantillonnage en Hz.
+        """
+        if sample_rate <= 0:
+            raise ValueError("La fréquence d'échantillonnage doit être positive.")
+
+        self.motor = motor
+        self.sample_rate = sample_rate
+        self.period = 1.0 / sample_rate
+        self.start_time = None
+        self.cpu_time = 0.0  # Temps CPU cumulé des échantillonnages (secondes)
+
+        self._latest = None
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Démarre le thread d'acquisition (sans effet s'il tourne déjà).
+        """
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self.start_time = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="SpeedAcquisition", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Arrête le thread d'acquisition et attend sa fin.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2 * self.period + 1)
+            self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def set_sample_rate(self, sample_rate):
+        """
+        Change la fréquence d'échantillonnage, y compris pendant l'acquisition.
+        """
+        if sample_rate <= 0:
+            raise ValueError("La fréquence d'échantillonnage doit être positive.")
+        self.sample_rate = sample_rate
+        self.period = 1.0 / sample_rate
+
+    def latest(self):
+        """
+        Retourne le dernier échantillon publié (ou None avant la première mesure).
+        """
+        return self._latest
+
+    def latest_speed(self):
+        """
+        Retourne la dernière vitesse mesurée en RPM (0 avant la première mesure).
+        """
+        sample = self._latest
+        return sample.rpm if sample is not None else 0.0
+
+    def subscribe(self, callback):
+        """
+        Abonne une fonction appelée à chaque nouvel échantillon.
+
+        Le callback est exécuté dans le thread d'acquisition : il doit être court
+        et ne pas manipuler directement des widgets Qt.
+        """
+        with self._lock:
+            self._subscribers = self._subscribers + [callback]
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers = [cb for cb in self._subscribers if cb is not callback]
+
+    def stream(self, maxsize=1000):
+        """
+        Retourne une file recevant les échantillons au fil de l'eau.
+
+        Si le consommateur ne suit pas, les nouveaux échantillons sont ignorés
+        plutôt que de bloquer l'acquisition.
+
+        Args:
+            maxsize: Taille maximale de la file.
+
+        Returns:
+            Une instance de queue.Queue alimentée par le thread d'acquisition.
+        """
+        samples = queue.Queue(maxsize=maxsize)
+
+        def _push(sample):
+            try:
+                samples.put_nowait(sample)
+            except queue.Full:
+                pass
+
+        samples.callback = self.subscribe(_push)
+        return samples
+
+    def record_open_loop(self, telemetry):
+        """
+        Enregistre les échantillons dans un TelemetryBuffer (et dans l'enregistreur
+        du moteur s'il est actif) tant que la boucle PID du moteur ne tourne pas ;
+        en boucle fermée, c'est la boucle qui les alimente.
+
+        Args:
+            telemetry: TelemetryBuffer recevant (temps, consigne, RPM, PWM, erreur).
+        """
+        motor = self.motor
+
+        def _record(sample):
+            if motor.control_loop is None:
+                error = motor.setpoint - sample.rpm
+                telemetry.append(sample.timestamp, motor.setpoint, sample.rpm, motor.pwm, error)
+                recorder = motor.recorder
+                if recorder is not None:
+                    recorder.record(sample.timestamp, motor.setpoint, sample.rpm, motor.pwm, error)
+
+        return self.subscribe(_record)
+
+    def register_metrics(self, registry, name=None):
+        """
+        Déclare le temps CPU de l'acquisition dans un MetricsRegistry.
+        """
+        name = name or getattr(self.motor, "name", None) or "M1"
+        registry.register("cpu_seconds_total", "counter", "Temps CPU par sous-système.",
+                          lambda: self.cpu_time, subsystem="acquisition", motor=name)
+
+    def _run(self):
+        """
+        Boucle d'acquisition : lit le compteur à intervalles réguliers.
+        """
+        last_time = time.perf_counter()
+        last_count = self.motor.encoder_count
+        next_deadline = last_time + self.period
+
+        while not self._stop_event.is_set():
+            delay = next_deadline - time.perf_counter()
+            if delay > 0 and self._stop_event.wait(delay):
+                break
+
+            now = time.perf_counter()
+            cpu_start = time.thread_time()
+            count = self.motor.encoder_count
+            interval = now - last_time
+            impulsions = count - last_count
+            loop = self.motor.control_loop
+            if loop is not None and loop.measure == self.motor.estimate_speed:
+                # La boucle estime déjà la vitesse à chaque période : une estimation
+                # ici couperait ses fenêtres de comptage
+                rpm = self.motor.speed_estimate
+            else:
+                rpm = self.motor.estimate_speed()
+            last_time, last_count = now, count
+
+            sample = SpeedSample(now, rpm, impulsions, interval)
+            self._latest = sample
+            for callback in self._subscribers:
+                try:
+                    callback(sample)
+                except Exception as e:
+                    print(f"Erreur dans un abonné de l'acquisition : {e}")
+            self.cpu_time += time.thread_time() - cpu_start
+
+            # Échéance suivante calée sur la grille fixe (rattrape un retard éventuel)
+            next_deadline += self.period
+            if next_deadline < now:
+                next_deadline = now + self.period
@@ -0,0 +1,287 @@
+import math
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# Observateurs disponibles (nom affiché -> classe), voir make_observer
+OBSERVERS = ("alpha-beta", "kalman", "model-kalman")
+
+# Pas relatif des intervalles entre corrections pour lesquels le gain stationnaire est calculé
+GAIN_DT_STEP = 1.05
+
+
+class SpeedObserver(ABC):
+    def __init__(self, counts_per_revolution=48, edge_latency=0.01):
+        """
+        Observateur de vitesse alimenté par les fronts de l'encodeur.
+
+        L'état (position en comptes, vitesse en comptes/s et troisième état propre
+        à chaque filtre) est corrigé à l'instant exact du dernier front reçu, où
+        la position est connue sans erreur de quantification, puis extrapolé à
+        l'instant de la lecture. Sans nouveau front, la vitesse est bornée par
+        le temps écoulé depuis le dernier (ralentissement, arrêt).
+
+        Classe abstraite : chaque filtre fournit _predict, _correct et _extrapolate.
+
+        Args:
+            counts_per_revolution: Comptes de quadrature par tour.
+            edge_latency: Retard de livraison des fronts toléré (s) avant de
+                considérer que le moteur ralentit ; les fronts arrivent par
+                paquets (liaison série, threads).
+        """
+        self.counts_per_revolution = counts_per_revolution
+        self.edge_latency = edge_latency
+        self.reset()
+
+    def reset(self):
+        self.x = np.zeros(3)
+        self._time = None
+        self._edge_time = None
+        self.speed = 0.0          # RPM
+        self.acceleration = 0.0   # RPM/s
+
+    def _to_rpm(self, counts_per_second):
+        return counts_per_second * 60.0 / self.counts_per_revolution
+
+    def update(self, edge_count, edge_time, now, pwm=0.0):
+        """
+        Met à jour l'observateur.
+
+        Args:
+            edge_count: Position (comptes) au dernier front.
+            edge_time: Horodatage du dernier front (None si aucun front).
+            now: Instant de la lecture (même horloge que les fronts).
+            pwm: Commande appliquée (utilisée par les observateurs à modèle).
+
+        Returns:
+            (vitesse en RPM, accélération en RPM/s).
+        """
+        if edge_time is None:
+            return self.speed, self.acceleration
+        if self._time is None:
+            self.x[:] = (edge_count, 0.0, 0.0)
+            self._time = self._edge_time = edge_time
+        elif edge_time > self._edge_time:
+            dt = edge_time - self._time
+            self._predict(dt, pwm)
+            self._correct(edge_count - self.x[0], dt)
+            self._time = self._edge_time = edge_time
+
+        velocity, acceleration = self._extrapolate(max(now - self._time, 0.0), pwm)
+
+        # Aucun front depuis plus de deux périodes attendues (au-delà du retard de
+        # livraison) : la vitesse est au plus 1 compte / temps écoulé
+        elapsed = now - self._edge_time
+        if elapsed > self.edge_latency and abs(velocity) * elapsed > 2.0:
+            bound = 1.0 / elapsed if elapsed < 1.0 else 0.0
+            velocity = math.copysign(bound, velocity)
+            acceleration = 0.0
+            self._limit(velocity)
+
+        self.speed = self._to_rpm(velocity)
+        self.acceleration = self._to_rpm(acceleration)
+        return self.speed, self.acceleration
+
+    @abstractmethod
+    def _predict(self, dt, pwm):
+        """
+        Propage l'état de `dt` secondes (jusqu'au nouveau front).
+        """
+
+    @abstractmethod
+    def _correct(self, residual, dt):
+        """
+        Corrige l'état avec l'écart de position au front, `dt` secondes après la correction précédente.
+        """
+
+    @abstractmethod
+    def _extrapolate(self, dt, pwm):
+        """
+        (vitesse, accélération) en comptes/s, `dt` secondes après le dernier front.
+        """
+
+    def _limit(self, velocity):
+        self.x[1] = velocity
+        self.x[2] = 0.0
+
+
+class AlphaBetaObserver(SpeedObserver):
+    def __init__(self, alpha=0.5, beta=0.1, gamma=0.005, counts_per_revolution=48, edge_latency=0.01):
+        """
+        Filtre alpha-bêta (alpha-bêta-gamma si gamma > 0, ce qui donne aussi l'accélération).
+
+        Args:
+            alpha: Gain de correction de la position.
+            beta: Gain de correction de la vitesse.
+            gamma: Gain de correction de l'accélération (0 : accélération nulle).
+            counts_per_revolution: Comptes de quadrature par tour.
+            edge_latency: Voir SpeedObserver.
+        """
+        self.alpha, self.beta, self.gamma = alpha, beta, gamma
+        super().__init__(counts_per_revolution, edge_latency)
+
+    def _predict(self, dt, pwm):
+        x = self.x
+        x[0] += x[1] * dt + 0.5 * x[2] * dt * dt
+        x[1] += x[2] * dt
+
+    def _correct(self, residual, dt):
+        if dt <= 0:
+            return
+        self.x[0] += self.alpha * residual
+        self.x[1] += self.beta * residual / dt
+        self.x[2] += 2 * self.gamma * residual / (dt * dt)
+
+    def _extrapolate(self, dt, pwm):
+        return self.x[1] + self.x[2] * dt, self.x[2]
+
+
+def steady_state_gains(dt, jerk_noise, measurement_noise, iterations=2000):
+    """
+    Gain de Kalman stationnaire d'un modèle à accélération constante (jerk blanc).
+
+    Args:
+        dt: Période nominale entre deux corrections (s).
+        jerk_noise: Densité spectrale du jerk (comptes²/s⁵).
+        measurement_noise: Variance de la position mesurée (comptes²).
+
+    Returns:
+        Le gain (3,) sur (position, vitesse, accélération).
+    """
+    f = np.array([[1.0, dt, dt * dt / 2], [0.0, 1.0, dt], [0.0, 0.0, 1.0]])
+    q = jerk_noise * np.array([[dt ** 5 / 20, dt ** 4 / 8, dt ** 3 / 6],
+                               [dt ** 4 / 8, dt ** 3 / 3, dt ** 2 / 2],
+                               [dt ** 3 / 6, dt ** 2 / 2, dt]])
+    p = np.eye(3) * 1e6
+    gain = np.zeros(3)
+    for _ in range(iterations):
+        p = f @ p @ f.T + q
+        new_gain = p[:, 0] / (p[0, 0] + measurement_noise)
+        p = p - np.outer(new_gain, p[0, :])
+        if np.allclose(new_gain, gain, rtol=1e-10, atol=1e-14):
+            break
+        gain = new_gain
+    return gain
+
+
+class SteadyStateKalmanObserver(AlphaBetaObserver):
+    def __init__(self, rate_hz=500.0, jerk_noise=1e9, measurement_noise=0.05, counts_per_revolution=48,
+                 edge_latency=0.01):
+        """
+        Filtre de Kalman stationnaire à accélération constante.
+
+        Les corrections ont lieu aux fronts, donc à intervalles irréguliers : le
+        gain stationnaire est celui de l'intervalle écoulé depuis la correction
+        précédente. Il est calculé une fois par classe d'intervalles (pas
+        relatif GAIN_DT_STEP) puis réutilisé ; à l'exécution le filtre coûte
+        alors autant qu'un alpha-bêta-gamma.
+
+        Args:
+            rate_hz: Fréquence nominale des corrections (gains alpha, beta et
+                gamma exposés, premier gain mis en cache).
+            jerk_noise: Densité spectrale du jerk (comptes²/s⁵) : plus elle est
+                grande, plus le filtre suit vite les variations de vitesse.
+            measurement_noise: Variance de la position au front (comptes²),
+                due aux défauts de l'encodeur et à la gigue des horodatages.
+            counts_per_revolution: Comptes de quadrature par tour.
+            edge_latency: Voir SpeedObserver.
+        """
+        self.jerk_noise = jerk_noise
+        self.measurement_noise = measurement_noise
+        self._gains = {}  # classe d'intervalle -> gain (3,)
+        dt = 1.0 / rate_hz
+        gain = self._gain(dt)
+        super().__init__(alpha=gain[0], beta=gain[1] * dt, gamma=gain[2] * dt * dt / 2,
+                         counts_per_revolution=counts_per_revolution, edge_latency=edge_latency)
+
+    def _gain(self, dt):
+        key = round(math.log(dt) / math.log(GAIN_DT_STEP))
+        gain = self._gains.get(key)
+        if gain is None:
+            gain = self._gains[key] = steady_state_gains(GAIN_DT_STEP ** key, self.jerk_noise,
+                                                         self.measurement_noise)
+        return gain
+
+    def _correct(self, residual, dt):
+        if dt <= 0:
+            return
+        self.x += self._gain(dt) * residual
+
+
+class ModelKalmanObserver(SpeedObserver):
+    def __init__(self, model, offset=0.0, speed_noise=1e5, disturbance_noise=1e4, measurement_noise=0.05,
+                 counts_per_revolution=48, edge_latency=0.01):
+        """
+        Filtre de Kalman fondé sur le modèle du moteur (premier ordre piloté par le PWM).
+
+        État : position, vitesse et perturbation en vitesse (charge, erreur de
+        gain ou de zone morte), cette dernière étant estimée en continu. La
+        commande permet d'anticiper les variations de vitesse avant que les
+        fronts ne les confirment, d'où un retard très faible.
+
+        Args:
+            model: PlantModel identifié (gain en RPM/PWM, constante de temps).
+            offset: PWM en dessous duquel le moteur ne tourne pas.
+            speed_noise: Densité du bruit de processus sur la vitesse (comptes²/s³).
+            disturbance_noise: Densité du bruit sur la perturbation (comptes²/s³).
+            measurement_noise: Variance de la position au front (comptes²).
+            counts_per_revolution: Comptes de quadrature par tour.
+            edge_latency: Voir SpeedObserver.
+        """
+        self.gain = model.gain * counts_per_revolution / 60.0  # (comptes/s) par unité de PWM
+        self.time_constant = model.time_constant
+        self.offset = offset
+        self.speed_noise = speed_noise
+        self.disturbance_noise = disturbance_noise
+        self.measurement_noise = measurement_noise
+        super().__init__(counts_per_revolution, edge_latency)
+
+    def reset(self):
+        super().reset()
+        self.p = np.diag([1.0, 1e6, 1e6])
+
+    def _drive(self, pwm):
+        return math.copysign(self.gain * max(abs(pwm) - self.offset, 0.0), pwm)
+
+    def _transition(self, dt):
+        decay = math.exp(-dt / self.time_constant)
+        lag = self.time_constant * (1 - decay)
+        return np.array([[1.0, lag, dt - lag], [0.0, decay, 1 - decay], [0.0, 0.0, 1.0]]), lag, decay
+
+    def _predict(self, dt, pwm):
+        f, lag, decay = self._transition(dt)
+        drive = self._drive(pwm)
+        self.x = f @ self.x + np.array([dt - lag, 1 - decay, 0.0]) * drive
+        self.p = f @ self.p @ f.T + np.diag([0.0, self.speed_noise * dt, self.disturbance_noise * dt])
+
+    def _correct(self, residual, dt):
+        gain = self.p[:, 0] / (self.p[0, 0] + self.measurement_noise)
+        self.x = self.x + gain * residual
+        self.p = self.p - np.outer(gain, self.p[0, :])
+
+    def _extrapolate(self, dt, pwm):
+        drive = self._drive(pwm)
+        velocity, disturbance = self.x[1], self.x[2]
+        decay = math.exp(-dt / self.time_constant)
+        velocity = decay * velocity + (1 - decay) * (drive + disturbance)
+        return velocity, (drive + disturbance - velocity) / self.time_constant
+
+    def _limit(self, velocity):
+        self.x[1] = velocity
+
+
+def make_observer(name, counts_per_revolution=48, model=None, rate_hz=500.0, **kwargs):
+    """
+    Crée un observateur par son nom (voir OBSERVERS) ; None pour l'estimation par fenêtre.
+    """
+    if name is None:
+        return None
+    if name == "alpha-beta":
+        return AlphaBetaObserver(counts_per_revolution=counts_per_revolution, **kwargs)
+    if name == "kalman":
+        return SteadyStateKalmanObserver(rate_hz, counts_per_revolution=counts_per_revolution, **kwargs)
+    if name == "model-kalman":
+        if model is None:
+            raise ValueError("L'observateur à modèle nécessite un modèle identifié du moteur.")
+        return ModelKalmanObserver(model, counts_per_revolution=counts_per_revolution, **kwargs)
+    raise ValueError(f"Observateur inconnu : {name}")
@@ -0,0 +1,71 @@
+import numpy as np
+
+# Indicateurs calculés sur une réponse indicielle
+STEP_METRICS = ("rise_time", "overshoot", "settling_time", "steady_state_error", "iae", "itae", "saturation")
+
+
+def step_metrics(t, y, setpoint, initial=0.0, u=None, output_min=0.0, output_max=255.0,
+                 settle_band=0.02, steady_fraction=0.1):
+    """
+    Indicateurs d'une ou plusieurs réponses indicielles, calculés par lot.
+
+    Chaque ligne de `y` est une réponse échantillonnée aux instants `t` (temps
+    depuis l'échelon). Les indicateurs non définis (réponse qui n'atteint pas
+    90 % de l'échelon, qui ne se stabilise pas) valent NaN.
+
+    Args:
+        t: Instants (s), tableau de taille n.
+        y: Réponses (RPM), tableau (n,) ou (lots, n).
+        setpoint: Consigne finale (scalaire ou une valeur par lot).
+        initial: Valeur avant l'échelon (scalaire ou une valeur par lot).
+        u: Commandes PWM de même forme que y, pour la fraction de saturation.
+        output_min: Borne basse de la commande.
+        output_max: Borne haute de la commande.
+        settle_band: Bande de stabilisation relative à l'échelon (2 % par défaut).
+        steady_fraction: Fraction finale de l'essai servant à l'erreur statique.
+
+    Returns:
+        Un dictionnaire {nom: tableau (lots,)} ; temps de montée 10-90 % (s),
+        dépassement (%), temps de stabilisation (s), erreur statique (RPM),
+        IAE (RPM.s), ITAE (RPM.s²) et fraction de saturation de la commande.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    y = np.atleast_2d(np.asarray(y, dtype=np.float64))
+    setpoint = np.broadcast_to(np.asarray(setpoint, dtype=np.float64), y.shape[:1])[:, None]
+    initial = np.broadcast_to(np.asarray(initial, dtype=np.float64), y.shape[:1])[:, None]
+    n = y.shape[1]
+    rows = np.arange(y.shape[0])
+
+    span = setpoint - initial
+    span = np.where(span == 0, np.nan, span)
+    progress = (y - initial) / span
+
+    # Premiers passages à 10 % et 90 % de l'échelon
+    reached_10, reached_90 = progress >= 0.1, progress >= 0.9
+    i10, i90 = reached_10.argmax(axis=1), reached_90.argmax(axis=1)
+    rise_time = np.where(reached_90[rows, i90], t[i90] - t[i10], np.nan)
+
+    overshoot = np.maximum(np.nanmax(progress, axis=1) - 1.0, 0.0) * 100
+
+    # Dernier échantillon hors de la bande : la stabilisation commence juste après
+    outside = np.abs(progress - 1.0) > settle_band
+    last_outside = n - 1 - outside[:, ::-1].argmax(axis=1)
+    settling_time = np.where(~outside.any(axis=1), t[0],
+                             np.where(last_outside < n - 1, t[np.minimum(last_outside + 1, n - 1)], np.nan))
+
+    error = setpoint - y
+    steady = max(1, int(round(n * steady_fraction)))
+    steady_state_error = error[:, -steady:].mean(axis=1)
+
+    dt = np.diff(t, prepend=t[0] - (t[1] - t[0] if n > 1 else 0.0))
+    iae = (np.abs(error) * dt).sum(axis=1)
+    itae = (np.abs(error) * (t - t[0]) * dt).sum(axis=1)
+
+    if u is not None:
+        u = np.atleast_2d(np.asarray(u, dtype=np.float64))
+        saturation = ((u >= output_max) | (u <= output_min)).mean(axis=1)
+    else:
+        saturation = np.full(y.shape[0], np.nan)
+
+    return {"rise_time": rise_time, "overshoot": overshoot, "settling_time": settling_time,
+            "steady_state_error": steady_state_error, "iae": iae, "itae": itae, "saturation": saturation}
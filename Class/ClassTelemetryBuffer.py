@@ -0,0 +1,239 @@
+import threading
+import time
+
+import numpy as np
+
+# Voies enregistrées par défaut : temps, consigne, vitesse mesurée, PWM et erreur
+TELEMETRY_CHANNELS = ("time", "setpoint", "rpm", "pwm", "error")
+
+# En-tête (indice d'écriture, nombre d'échantillons, total écrit, compteur de
+# séquence) placé avant les données
+HEADER_FIELDS = 4
+HEADER_BYTES = HEADER_FIELDS * 8
+
+# Nombre de tentatives d'une lecture cohérente avant d'abandonner
+READ_RETRIES = 1000
+
+
+class SequenceLock:
+    def __init__(self, counter, index):
+        """
+        Verrou à séquence (seqlock) placé dans une mémoire partagée entre processus.
+
+        Un threading.Lock ne protège que les threads d'un même processus. Ici
+        l'écrivain incrémente le compteur avant et après chaque écriture (il est
+        impair pendant l'écriture) ; un lecteur recommence sa lecture si le
+        compteur était impair ou a changé entre le début et la fin. L'écrivain
+        n'attend donc jamais un lecteur (la boucle de régulation n'est pas
+        ralentie par l'interface). Un seul écrivain à la fois : plusieurs threads
+        écrivains doivent être sérialisés par ailleurs.
+
+        Args:
+            counter: Tableau NumPy en mémoire partagée contenant le compteur.
+            index: Indice du compteur dans ce tableau.
+        """
+        self._counter = counter
+        self._index = index
+
+    def __enter__(self):
+        self._counter[self._index] += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._counter[self._index] += 1
+        return False
+
+    def read(self, function, retries=READ_RETRIES):
+        """
+        Appelle `function` jusqu'à obtenir un résultat qu'aucune écriture n'a coupé.
+
+        Si l'écrivain reste bloqué au milieu d'une écriture (processus tué),
+        la dernière lecture est renvoyée après `retries` tentatives.
+        """
+        value = None
+        for _ in range(retries):
+            before = int(self._counter[self._index])
+            if before % 2 == 0:
+                value = function()
+                if int(self._counter[self._index]) == before:
+                    return value
+            time.sleep(0)  # Laisse l'écrivain terminer
+        return value if value is not None else function()
+
+
+class TelemetryBuffer:
+    def __init__(self, capacity=100000, channels=TELEMETRY_CHANNELS, dtype=np.float64, buffer=None):
+        """
+        Tampon circulaire multivoie de capacité fixe, préalloué avec NumPy.
+
+        Chaque échantillon est écrit deux fois (à l'indice i et i + capacity) : les
+        `capacity` derniers échantillons forment donc toujours une tranche contiguë,
+        ce qui permet de renvoyer des vues ordonnées sans aucune copie.
+
+        Le tampon peut être placé dans une mémoire externe (par exemple un bloc
+        multiprocessing.shared_memory) : l'en-tête d'indices y est alors stocké
+        aussi, et un autre processus peut lire les données pendant qu'un seul
+        processus écrit. Les écritures sont encadrées par un SequenceLock de
+        l'en-tête : `snapshot` et `latest` renvoient des copies cohérentes, et
+        les vues partent d'un couple (indice, taille) cohérent.
+
+        Args:
+            capacity: Nombre maximal d'échantillons conservés.
+            channels: Noms des voies enregistrées.
+            dtype: Type NumPy des données.
+            buffer: Mémoire externe d'au moins `required_bytes` octets (None :
+                allocation privée).
+        """
+        if capacity <= 0:
+            raise ValueError("La capacité doit être positive.")
+
+        self.capacity = int(capacity)
+        self.channels = tuple(channels)
+        self._index = {name: i for i, name in enumerate(self.channels)}
+        shape = (len(self.channels), 2 * self.capacity)
+        if buffer is None:
+            self._header = np.zeros(HEADER_FIELDS, dtype=np.int64)
+            self._data = np.zeros(shape, dtype=dtype)
+        else:
+            self._header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=buffer)
+            self._data = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=HEADER_BYTES)
+        # Le verrou sérialise les écrivains du processus ; la séquence protège les lecteurs de tout processus
+        self._lock = threading.Lock()
+        self._sequence = SequenceLock(self._header, 3)
+
+    @staticmethod
+    def required_bytes(capacity, channels=TELEMETRY_CHANNELS, dtype=np.float64):
+        """
+        Taille en octets nécessaire pour placer le tampon dans une mémoire externe.
+        """
+        return HEADER_BYTES + len(channels) * 2 * int(capacity) * np.dtype(dtype).itemsize
+
+    # L'en-tête est lu et écrit via ces propriétés pour rester valable en mémoire partagée
+    @property
+    def _head(self):
+        return int(self._header[0])
+
+    @_head.setter
+    def _head(self, value):
+        self._header[0] = value
+
+    @property
+    def _size(self):
+        return int(self._header[1])
+
+    @_size.setter
+    def _size(self, value):
+        self._header[1] = value
+
+    @property
+    def total(self):
+        """
+        Nombre total d'échantillons écrits depuis la création.
+        """
+        return int(self._header[2])
+
+    @total.setter
+    def total(self, value):
+        self._header[2] = value
+
+    def __len__(self):
+        return self._size
+
+    def append(self, *values):
+        """
+        Ajoute un échantillon en O(1).
+
+        Args:
+            values: Une valeur par voie, dans l'ordre de `channels`.
+        """
+        with self._lock, self._sequence:
+            head = self._head
+            self._data[:, head] = values
+            self._data[:, head + self.capacity] = values
+            self._head = head + 1 if head + 1 < self.capacity else 0
+            if self._size < self.capacity:
+                self._size += 1
+            self.total += 1
+
+    def extend(self, block):
+        """
+        Ajoute un bloc d'échantillons de forme (nombre de voies, n).
+        """
+        block = np.asarray(block, dtype=self._data.dtype)
+        n = block.shape[1]
+        if n > self.capacity:
+            block = block[:, -self.capacity:]
+            skipped, n = n - self.capacity, self.capacity
+        else:
+            skipped = 0
+
+        with self._lock, self._sequence:
+            positions = (self._head + np.arange(n)) % self.capacity
+            self._data[:, positions] = block
+            self._data[:, positions + self.capacity] = block
+            self._head = (self._head + n) % self.capacity
+            self._size = min(self._size + n, self.capacity)
+            self.total += n + skipped
+
+    def clear(self):
+        with self._lock, self._sequence:
+            self._head = 0
+            self._size = 0
+
+    def _bounds(self, last):
+        n = self._size if last is None else min(int(last), self._size)
+        start = (self._head - n) % self.capacity
+        return start, n
+
+    def _window(self, last):
+        return self._sequence.read(lambda: self._bounds(last))
+
+    def view(self, last=None):
+        """
+        Vue ordonnée (sans copie) sur les derniers échantillons.
+
+        La vue reflète le tampon : elle peut être écrasée par des ajouts
+        ultérieurs (au-delà de `capacity - n` échantillons). Utiliser `snapshot`
+        pour conserver une copie cohérente.
+
+        Args:
+            last: Nombre d'échantillons voulus (tous si None).
+
+        Returns:
+            Un tableau de forme (nombre de voies, n), du plus ancien au plus récent.
+        """
+        start, n = self._window(last)
+        return self._data[:, start:start + n]
+
+    def channel(self, name, last=None):
+        """
+        Vue ordonnée (sans copie) sur une seule voie.
+        """
+        start, n = self._window(last)
+        return self._data[self._index[name], start:start + n]
+
+    def arrays(self, last=None):
+        """
+        Dictionnaire {nom de voie: vue} pour les derniers échantillons.
+        """
+        data = self.view(last)
+        return {name: data[i] for i, name in enumerate(self.channels)}
+
+    def snapshot(self, last=None):
+        """
+        Copie des derniers échantillons, indépendante des écritures suivantes.
+        """
+        def copy():
+            start, n = self._bounds(last)
+            return self._data[:, start:start + n].copy()
+
+        return self._sequence.read(copy)
+
+    def latest(self):
+        """
+        Dernier échantillon sous forme de dictionnaire (None si le tampon est vide).
+        """
+        data = self.snapshot(1)
+        if data.shape[1] == 0:
+            return None
+        return {name: float(data[i, 0]) for i, name in enumerate(self.channels)}
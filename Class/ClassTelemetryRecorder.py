@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Format d'un enregistrement : lisible directement par NumPy (fichiers .npy projetés en mémoire)
+RECORD_DTYPE = np.dtype([("time", "<f8"), ("setpoint", "<f8"), ("rpm", "<f8"), ("pwm", "<f8"),
+                         ("error", "<f8"), ("p_term", "<f8"), ("i_term", "<f8"), ("d_term", "<f8")])
+INDEX_FILE = "index.json"
+
+
+class TelemetryRecorder:
+    def __init__(self, directory, segment_records=1000000, queue_size=200000, flush_period=0.05,
+                 index_period=1.0, metadata=None):
+        """
+        Enregistreur de télémétrie sur disque, en ajout seul et projeté en mémoire.
+
+        `record` ne fait qu'un ajout dans une file bornée : la boucle de régulation
+        n'est jamais bloquée par le disque. Un thread d'écriture vide la file par
+        lots dans des segments .npy préalloués (np.lib.format.open_memmap), change
+        de segment lorsqu'il est plein et tient à jour un petit index JSON avec la
+        plage de temps de chaque segment.
+
+        Args:
+            directory: Dossier de la session (créé si besoin).
+            segment_records: Nombre d'enregistrements par segment.
+            queue_size: Taille maximale de la file en mémoire (au-delà, les
+                échantillons sont comptés comme perdus).
+            flush_period: Période d'écriture des lots en secondes.
+            index_period: Période de mise à jour de l'index en secondes.
+            metadata: Dictionnaire optionnel enregistré dans l'index.
+        """
+        self.directory = directory
+        self.segment_records = int(segment_records)
+        self.queue_size = queue_size
+        self.flush_period = flush_period
+        self.index_period = index_period
+        self.metadata = dict(metadata or {})
+
+        self.recorded = 0
+        self.dropped = 0
+        self.segments = []
+        self._queue = deque()
+        self._segment = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="TelemetryRecorder", daemon=True)
+            self._thread.start()
+            print(f"Enregistrement de la télémétrie dans {self.directory}")
+        return self
+
+    def close(self):
+        """
+        Écrit les échantillons restants, ferme le segment courant et met à jour l'index.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._flush()
+        if self._segment is not None:
+            self._segment.flush()
+            self._segment = None
+        self._write_index()
+        print(f"Enregistrement terminé : {self.recorded} échantillons, {self.dropped} perdus.")
+
+    def record(self, timestamp, setpoint, rpm, pwm, error, p_term=0.0, i_term=0.0, d_term=0.0):
+        """
+        Ajoute un échantillon à la file d'écriture (non bloquant).
+        """
+        if len(self._queue) >= self.queue_size:
+            self.dropped += 1
+            return
+        self._queue.append((timestamp, setpoint, rpm, pwm, error, p_term, i_term, d_term))
+
+    def _open_segment(self):
+        name = f"segment_{len(self.segments):05d}.npy"
+        self._segment = np.lib.format.open_memmap(os.path.join(self.directory, name), mode="w+",
+                                                  dtype=RECORD_DTYPE, shape=(self.segment_records,))
+        self.segments.append({"file": name, "count": 0, "t_start": None, "t_end": None})
+
+    def _flush(self):
+        """
+        Copie les échantillons en attente dans les segments (changement de segment si plein).
+        """
+        n = len(self._queue)
+        if n == 0:
+            return
+        popleft = self._queue.popleft
+        block = np.array([popleft() for _ in range(n)], dtype=RECORD_DTYPE)
+
+        while len(block):
+            if self._segment is None or self.segments[-1]["count"] == self.segment_records:
+                if self._segment is not None:
+                    self._segment.flush()
+                    self._write_index()
+                self._open_segment()
+            info = self.segments[-1]
+            room = self.segment_records - info["count"]
+            part, block = block[:room], block[room:]
+            self._segment[info["count"]:info["count"] + len(part)] = part
+            if info["t_start"] is None:
+                info["t_start"] = float(part["time"][0])
+            info["t_end"] = float(part["time"][-1])
+            info["count"] += len(part)
+            self.recorded += len(part)
+
+    def _write_index(self):
+        index = {"dtype": RECORD_DTYPE.descr, "segment_records": self.segment_records,
+                 "recorded": self.recorded, "dropped": self.dropped,
+                 "metadata": self.metadata, "segments": self.segments}
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(index, f, indent=1)
+        os.replace(path + ".tmp", path)
+
+    def _run(self):
+        last_index = time.perf_counter()
+        while not self._stop_event.wait(self.flush_period):
+            self._flush()
+            if time.perf_counter() - last_index >= self.index_period:
+                self._write_index()
+                last_index = time.perf_counter()
+
+
+class TelemetryReader:
+    def __init__(self, directory):
+        """
+        Lecture d'une session enregistrée par TelemetryRecorder.
+
+        Les segments sont ouverts en projection mémoire ; l'index permet de ne
+        lire que les segments couvrant la plage de temps demandée.
+
+        Args:
+            directory: Dossier de la session.
+        """
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        self.segments = [s for s in self.index["segments"] if s["count"] > 0]
+        self.metadata = self.index.get("metadata", {})
+
+    def __len__(self):
+        return sum(s["count"] for s in self.segments)
+
+    def time_range(self):
+        if not self.segments:
+            return None
+        return self.segments[0]["t_start"], self.segments[-1]["t_end"]
+
+    def segment(self, info):
+        """
+        Vue en projection mémoire sur les enregistrements valides d'un segment.
+        """
+        data = np.load(os.path.join(self.directory, info["file"]), mmap_mode="r")
+        return data[:info["count"]]
+
+    def read(self, t_start=None, t_end=None):
+        """
+        Lit les enregistrements dont le temps est compris dans [t_start, t_end].
+
+        Args:
+            t_start: Début de la plage (début de la session si None).
+            t_end: Fin de la plage (fin de la session si None).
+
+        Returns:
+            Un tableau structuré de type RECORD_DTYPE.
+        """
+        parts = []
+        for info in self.segments:
+            if t_start is not None and info["t_end"] < t_start:
+                continue
+            if t_end is not None and info["t_start"] > t_end:
+                break
+            data = self.segment(info)
+            first = 0 if t_start is None else np.searchsorted(data["time"], t_start, side="left")
+            last = len(data) if t_end is None else np.searchsorted(data["time"], t_end, side="right")
+            parts.append(data[first:last])
+        if not parts:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
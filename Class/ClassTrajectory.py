@@ -0,0 +1,180 @@
+import numpy as np
+
+# Fréquence d'échantillonnage par défaut des profils précalculés
+TRAJECTORY_RATE = 1000.0
+
+
+class Trajectory:
+    def __init__(self, setpoints, sample_rate=TRAJECTORY_RATE, rates=None):
+        """
+        Profil de consigne précalculé, lu échantillon par échantillon par la boucle PID.
+
+        Args:
+            setpoints: Consignes successives (RPM).
+            sample_rate: Fréquence d'échantillonnage du profil en Hz.
+            rates: Dérivée de la consigne (RPM/s) ; calculée par différences finies si None.
+        """
+        self.setpoints = np.asarray(setpoints, dtype=np.float64)
+        self.sample_rate = float(sample_rate)
+        if rates is None:
+            rates = (np.gradient(self.setpoints, 1.0 / self.sample_rate) if len(self.setpoints) > 1
+                     else np.zeros_like(self.setpoints))
+        self.rates = np.asarray(rates, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.setpoints)
+
+    @property
+    def duration(self):
+        return len(self.setpoints) / self.sample_rate
+
+    @property
+    def final(self):
+        return float(self.setpoints[-1])
+
+    def sample(self, elapsed):
+        """
+        Consigne à un instant donné depuis le début du profil.
+
+        Returns:
+            (consigne, dérivée, terminé) ; après la fin, la dernière consigne est
+            maintenue avec une dérivée nulle.
+        """
+        index = int(elapsed * self.sample_rate)
+        if index >= len(self.setpoints):
+            return self.final, 0.0, True
+        return float(self.setpoints[index]), float(self.rates[index]), False
+
+    def then(self, other):
+        """
+        Enchaîne un autre profil à la même fréquence d'échantillonnage.
+        """
+        if other.sample_rate != self.sample_rate:
+            raise ValueError("Les profils enchaînés doivent avoir la même fréquence d'échantillonnage.")
+        return Trajectory(np.concatenate((self.setpoints, other.setpoints)), self.sample_rate,
+                          np.concatenate((self.rates, other.rates)))
+
+
+def ramp(start, end, rate, sample_rate=TRAJECTORY_RATE):
+    """
+    Rampe de `start` à `end` à pente constante `rate` (RPM/s).
+    """
+    n = max(int(np.ceil(abs(end - start) / rate * sample_rate)), 1)
+    setpoints = np.linspace(start, end, n + 1)[1:]
+    rates = np.full(n, np.sign(end - start) * rate)
+    rates[-1] = 0.0
+    return Trajectory(setpoints, sample_rate, rates)
+
+
+def s_curve(start, end, max_acceleration, max_jerk, sample_rate=TRAJECTORY_RATE):
+    """
+    Changement de vitesse à jerk limité (profil en S) : l'accélération suit un
+    trapèze (ou un triangle si l'écart est trop faible pour atteindre max_acceleration).
+
+    Args:
+        start: Consigne initiale (RPM).
+        end: Consigne finale (RPM).
+        max_acceleration: Pente maximale de la consigne (RPM/s).
+        max_jerk: Variation maximale de la pente (RPM/s²).
+        sample_rate: Fréquence d'échantillonnage du profil en Hz.
+    """
+    delta = abs(end - start)
+    sign = 1.0 if end >= start else -1.0
+    jerk_time = max_acceleration / max_jerk
+    if delta >= max_acceleration * jerk_time:
+        peak = max_acceleration
+        constant_time = (delta - peak * jerk_time) / peak
+    else:
+        peak = np.sqrt(delta * max_jerk)
+        jerk_time = peak / max_jerk
+        constant_time = 0.0
+    total = 2 * jerk_time + constant_time
+    if total <= 0:
+        return Trajectory([end], sample_rate, [0.0])
+
+    t = np.arange(1, int(np.ceil(total * sample_rate)) + 1) / sample_rate
+    acceleration = peak * np.clip(np.minimum(t, total - t) / jerk_time, 0.0, 1.0)
+    # Intégration par trapèzes (exacte pour une accélération affine par morceaux)
+    previous = np.concatenate(([0.0], acceleration[:-1]))
+    setpoints = start + sign * np.cumsum((acceleration + previous) / 2) / sample_rate
+    setpoints[-1] = end
+    return Trajectory(setpoints, sample_rate, sign * acceleration)
+
+
+def sine(offset, amplitude, frequency, duration, sample_rate=TRAJECTORY_RATE):
+    """
+    Consigne sinusoïdale autour de `offset`.
+    """
+    t = np.arange(int(round(duration * sample_rate))) / sample_rate
+    omega = 2 * np.pi * frequency
+    return Trajectory(offset + amplitude * np.sin(omega * t), sample_rate,
+                      amplitude * omega * np.cos(omega * t))
+
+
+def step_sequence(points, sample_rate=TRAJECTORY_RATE):
+    """
+    Suite de paliers.
+
+    Args:
+        points: Liste de (durée en secondes, consigne en RPM).
+    """
+    setpoints = np.concatenate([np.full(max(int(round(hold * sample_rate)), 1), float(value))
+                                for hold, value in points])
+    return Trajectory(setpoints, sample_rate, np.zeros_like(setpoints))
+
+
+def load_csv(path, sample_rate=TRAJECTORY_RATE, interpolate=False):
+    """
+    Profil lu dans un fichier CSV à deux colonnes (temps en s, consigne en RPM).
+
+    Args:
+        path: Chemin du fichier (une ligne d'en-tête non numérique est ignorée).
+        sample_rate: Fréquence d'échantillonnage du profil en Hz.
+        interpolate: True pour relier les points par des segments, sinon chaque
+            consigne est maintenue jusqu'au point suivant.
+    """
+    with open(path) as f:
+        first = f.readline()
+    skip = 0 if first.strip().replace(",", "").replace(".", "").replace("-", "").replace(" ", "").isdigit() else 1
+    data = np.loadtxt(path, delimiter=",", skiprows=skip, ndmin=2)
+    times, values = data[:, 0] - data[0, 0], data[:, 1]
+    grid = np.arange(int(round(times[-1] * sample_rate)) + 1) / sample_rate
+    if interpolate:
+        return Trajectory(np.interp(grid, times, values), sample_rate)
+    index = np.searchsorted(times, grid, side="right") - 1
+    setpoints = values[index]
+    return Trajectory(setpoints, sample_rate, np.zeros_like(setpoints))
+
+
+class VelocityFeedforward:
+    def __init__(self, gain, time_constant=0.0, offset=0.0, output_max=255.0):
+        """
+        Commande anticipée déduite du modèle identifié du moteur (premier ordre).
+
+        PWM = offset + (consigne + constante de temps x dérivée de la consigne) / gain ;
+        le PID ne corrige plus que l'écart au modèle.
+
+        Args:
+            gain: Gain statique du moteur (RPM par unité de PWM).
+            time_constant: Constante de temps (s) ; 0 pour une anticipation en vitesse seule.
+            offset: PWM de démarrage (zone morte) ajouté dès que la consigne est positive.
+            output_max: Borne haute de la commande anticipée.
+        """
+        if gain <= 0:
+            raise ValueError("Le gain du moteur doit être positif.")
+        self.gain = gain
+        self.time_constant = time_constant
+        self.offset = offset
+        self.output_max = output_max
+
+    @classmethod
+    def from_model(cls, model, acceleration=True, **kwargs):
+        """
+        Anticipation à partir d'un PlantModel (voir ClassAutoTuner).
+        """
+        return cls(model.gain, model.time_constant if acceleration else 0.0, **kwargs)
+
+    def __call__(self, setpoint, rate=0.0):
+        if setpoint <= 0:
+            return 0.0
+        return min(self.offset + (setpoint + self.time_constant * rate) / self.gain, self.output_max)
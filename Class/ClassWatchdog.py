@@ -0,0 +1,438 @@
+import json
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+
+from Class.ClassMetrics import Histogram
+
+# Déclenchement du chien de garde : instant (time.time), cause, détail, délai
+# entre le début du défaut et sa détection, délai entre la détection et l'écriture
+# du PWM nul, PWM au moment du défaut, erreur éventuelle de l'écriture d'arrêt
+TripRecord = namedtuple("TripRecord", ["timestamp", "reason", "detail", "detection_delay", "stop_latency",
+                                       "pwm", "error"])
+TRIP_REASONS = ("loop", "loop_error", "encoder", "serial")
+
+
+class Watchdog:
+    def __init__(self, motor, check_rate=200.0, loop_timeout=0.05, encoder_timeout=0.25, min_pwm=30,
+                 ack_interval=0.05, ack_timeout=0.25, stop_timeout=0.02, history=100, log_path=None):
+        """
+        Chien de garde d'un Motor : surveille les échéances de la boucle PID, la
+        fraîcheur de l'encodeur et les acquittements de la liaison série, et
+        force le PWM à 0 dès qu'une limite est dépassée.
+
+        Il tourne dans son propre thread, indépendant de l'interface et de la
+        boucle : une boucle bloquée, une exception interceptée à chaque période,
+        un encodeur muet alors que le moteur est commandé ou une liaison série
+        qui ne renvoie plus les caractères de test (loop_back) provoquent un
+        déclenchement ; une boucle bloquée dans une écriture sur la carte est
+        attribuée à la liaison série. L'étage de sortie est alors inhibé (la
+        boucle ne peut plus réécrire le PWM) et le PWM nul et la direction
+        partent par l'écriture d'arrêt d'urgence, qui n'attend ni le verrou de
+        l'étage ni l'écriture bloquée. La boucle est ensuite arrêtée et l'arrêt
+        répété par le chemin ordinaire, après l'écriture bloquée. Les sorties
+        restent bloquées jusqu'à `reset`.
+
+        Chaque déclenchement est conservé (TripRecord) avec le délai de
+        détection et la latence d'arrêt mesurée ; le délai total est borné par
+        la période de surveillance, la limite franchie et `stop_timeout`. Une
+        écriture d'arrêt plus longue est enregistrée comme un échec.
+
+        Args:
+            motor: Instance de Motor surveillée.
+            check_rate: Fréquence de surveillance en Hz.
+            loop_timeout: Durée maximale sans période de la boucle PID (s).
+            encoder_timeout: Durée maximale sans front d'encodeur alors que le
+                PWM dépasse `min_pwm` (s).
+            min_pwm: PWM à partir duquel le moteur doit tourner.
+            ack_interval: Période des caractères de test envoyés à la carte (s).
+            ack_timeout: Durée maximale sans renvoi de la carte (s).
+            stop_timeout: Durée maximale d'attente de l'écriture d'arrêt (s).
+            history: Nombre de déclenchements conservés.
+            log_path: Fichier JSON (une ligne par déclenchement) optionnel.
+        """
+        self.motor = motor
+        self.check_rate = check_rate
+        self.loop_timeout = loop_timeout
+        self.encoder_timeout = encoder_timeout
+        self.min_pwm = min_pwm
+        self.ack_interval = ack_interval
+        self.ack_timeout = ack_timeout
+        self.stop_timeout = stop_timeout
+        self.log_path = log_path
+
+        self.tripped = False
+        self.trips = deque(maxlen=history)
+        self.trip_count = 0
+        self.stop_histogram = Histogram()  # Détection -> PWM nul écrit
+        self.on_trip = []  # Fonctions appelées (depuis le thread du chien de garde) avec le TripRecord
+
+        # Accès à la carte pour les acquittements (None si la carte ne sait pas renvoyer)
+        self._loop_back = getattr(motor.board, "loop_back", None)
+        self._last_ack = None
+        self._last_probe = None
+        self._probe_thread = None
+        self._loop_errors = 0
+        self._edges = None
+        self._last_edge = None
+        self._driven_since = None
+        self._trip_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Démarre la surveillance (sans effet si elle tourne déjà).
+        """
+        if self.is_running():
+            return self
+        self.motor.watchdog = self
+        self._rearm()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="Watchdog", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def reset(self):
+        """
+        Réarme le chien de garde et débloque les sorties du moteur.
+        """
+        with self._trip_lock:
+            self._rearm()
+            self.tripped = False
+            self.motor.output.invalidate()
+            self.motor.output.inhibit(False)
+        print("Chien de garde réarmé.")
+
+    def _rearm(self):
+        now = time.perf_counter()
+        loop = self.motor.control_loop
+        self._loop_errors = loop.errors if loop is not None else 0
+        self._edges = None
+        self._last_edge = now
+        self._driven_since = None
+        self._last_ack = now if self._loop_back is not None else None
+        self._last_probe = None
+
+    def _acknowledge(self, data=None):
+        self._last_ack = time.perf_counter()
+
+    # === Surveillance ===
+
+    def _run(self):
+        period = 1.0 / self.check_rate
+        next_deadline = time.perf_counter()
+        while not self._stop_event.is_set():
+            next_deadline += period
+            delay = next_deadline - time.perf_counter()
+            if delay > 0:
+                if self._stop_event.wait(delay):
+                    break
+            else:
+                next_deadline = time.perf_counter()
+            if not self.tripped:
+                try:
+                    self.check(time.perf_counter())
+                except Exception as e:
+                    print(f"Erreur dans le chien de garde : {e}")
+
+    def check(self, now):
+        """
+        Une vérification ; déclenche l'arrêt si une limite est dépassée.
+
+        Args:
+            now: Instant de la vérification (time.perf_counter).
+        """
+        motor = self.motor
+
+        # Liaison série d'abord : écriture bloquée (celle de l'étage de sortie ou
+        # l'écriture groupée du BoardManager)
+        started = [t for t in (motor.output.write_started, getattr(motor.board, "write_started", None))
+                   if t is not None]
+        write_started = min(started) if started else None
+        if write_started is not None and now - write_started > self.ack_timeout:
+            self.trip("serial", f"écriture bloquée depuis {(now - write_started) * 1000:.0f} ms", write_started)
+            return
+
+        # Échéances et erreurs de la boucle PID
+        loop = motor.control_loop
+        if loop is not None and loop.is_running():
+            last_tick = loop.last_tick
+            if last_tick is not None and now - last_tick > self.loop_timeout:
+                if write_started is not None and write_started <= last_tick + loop.period:
+                    # La boucle attend une écriture commencée pendant sa dernière période
+                    self.trip("serial", f"écriture bloquée depuis {(now - write_started) * 1000:.0f} ms "
+                                        f"(boucle PID en attente)", write_started)
+                else:
+                    self.trip("loop", f"aucune période depuis {(now - last_tick) * 1000:.0f} ms",
+                              last_tick + loop.period)
+                return
+            if loop.errors > self._loop_errors:
+                self.trip("loop_error", f"{loop.errors - self._loop_errors} exception(s) dans la boucle", now)
+                return
+        else:
+            self._loop_errors = 0
+
+        # Fraîcheur de l'encodeur tant que le moteur est commandé
+        encoder = motor.encoder
+        edges = encoder.edges_total + encoder.pending()
+        if edges != self._edges:
+            self._edges = edges
+            self._last_edge = now
+        if abs(motor.pwm) >= self.min_pwm:
+            if self._driven_since is None:
+                self._driven_since = now
+            silent_since = max(self._last_edge, self._driven_since)
+            if now - silent_since > self.encoder_timeout:
+                self.trip("encoder", f"aucun front depuis {(now - silent_since) * 1000:.0f} ms avec PWM {motor.pwm}",
+                          silent_since)
+                return
+        else:
+            self._driven_since = None
+
+        # Liaison série : caractères de test sans réponse
+        if self._loop_back is not None:
+            if now - self._last_ack > self.ack_timeout:
+                self.trip("serial", f"aucun renvoi de la carte depuis {(now - self._last_ack) * 1000:.0f} ms",
+                          self._last_ack)
+                return
+            probing = self._probe_thread is not None and self._probe_thread.is_alive()
+            if not probing and (self._last_probe is None or now - self._last_probe >= self.ack_interval):
+                self._last_probe = now
+                # Envoi dans un thread : une liaison bloquée ne doit pas bloquer la surveillance
+                self._probe_thread = threading.Thread(target=self._probe, name="WatchdogProbe", daemon=True)
+                self._probe_thread.start()
+
+    def _probe(self):
+        try:
+            self._loop_back("W", self._acknowledge)
+        except Exception as e:
+            print(f"Erreur lors de l'envoi du caractère de test : {e}")
+
+    # === Arrêt d'urgence ===
+
+    def trip(self, reason, detail="", fault_time=None):
+        """
+        Force le PWM à 0, bloque les sorties et enregistre le déclenchement.
+
+        Args:
+            reason: Cause (voir TRIP_REASONS).
+            detail: Description lisible.
+            fault_time: Début estimé du défaut (time.perf_counter), pour le délai de détection.
+
+        Returns:
+            Le TripRecord, ou None si le chien de garde était déjà déclenché.
+        """
+        detected = time.perf_counter()
+        with self._trip_lock:
+            if self.tripped:
+                return None
+            self.tripped = True
+        motor = self.motor
+        output = motor.output
+        pwm = motor.pwm
+        output.inhibit(True)
+        commands = [("analog", motor.pwm_pin, 0), ("digital", motor.dir_pin, 0)]
+        errors = []
+
+        def emergency_stop():
+            try:
+                output.emergency_write(commands)
+                errors.append(None)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+
+        # Dans un thread : la surveillance n'attend pas plus de stop_timeout une carte qui ne répond pas
+        writer = threading.Thread(target=emergency_stop, name="WatchdogTrip", daemon=True)
+        writer.start()
+        writer.join(self.stop_timeout)
+        stop_latency = time.perf_counter() - detected
+        if errors:
+            error = errors[0]
+        else:
+            error = f"TimeoutError: écriture d'arrêt non terminée après {self.stop_timeout * 1000:.0f} ms"
+        if error is None:
+            motor.pwm = 0
+        self.stop_histogram.observe(stop_latency)
+
+        record = TripRecord(time.time(), reason, detail,
+                            detected - fault_time if fault_time is not None else 0.0, stop_latency, pwm, error)
+        self.trips.append(record)
+        self.trip_count += 1
+        if error is None:
+            print(f"Chien de garde déclenché ({reason}) : {detail} ; PWM {pwm} -> 0 en "
+                  f"{stop_latency * 1000:.2f} ms (détection {record.detection_delay * 1000:.1f} ms)")
+        else:
+            print(f"Erreur : chien de garde déclenché ({reason}) : {detail} ; "
+                  f"l'arrêt du moteur (PWM {pwm} -> 0) a échoué : {error}")
+        if self.log_path is not None:
+            try:
+                with open(self.log_path, "a") as f:
+                    f.write(json.dumps(record._asdict()) + "\n")
+            except OSError as e:
+                print(f"Erreur lors de l'enregistrement du déclenchement : {e}")
+
+        # La boucle est arrêtée à part : une boucle bloquée ne retarde pas la surveillance
+        threading.Thread(target=self._stop_after_trip, name="WatchdogStop", daemon=True).start()
+        for callback in list(self.on_trip):
+            try:
+                callback(record)
+            except Exception as e:
+                print(f"Erreur dans un abonné du chien de garde : {e}")
+        return record
+
+    def _stop_after_trip(self):
+        """
+        Arrête la boucle puis répète l'arrêt par le chemin ordinaire : il passe
+        après l'écriture bloquée éventuelle, dont la valeur périmée est écrasée.
+        """
+        motor = self.motor
+        try:
+            motor.stop_control()
+            motor.output.analog_write(motor.pwm_pin, 0, force=True)
+            motor.output.digital_write(motor.dir_pin, 0, force=True)
+        except Exception as e:
+            print(f"Erreur lors de l'arrêt du moteur après déclenchement : {e}")
+        finally:
+            # Après un défaut, l'état réel des broches n'est plus sûr : rien ne sera ignoré comme inchangé
+            motor.output.invalidate()
+
+    def stats(self):
+        """
+        État, nombre de déclenchements, dernier déclenchement et latence
+        d'arrêt maximale (s).
+        """
+        trips = list(self.trips)
+        return {"tripped": self.tripped, "trips": self.trip_count, "last": trips[-1] if trips else None,
+                "max_stop_latency": max((trip.stop_latency for trip in trips), default=0.0)}
+
+    def register_metrics(self, registry, name=None):
+        """
+        Déclare les déclenchements et la latence d'arrêt dans un MetricsRegistry.
+        """
+        name = name or getattr(self.motor, "name", None) or "M1"
+        registry.register("watchdog_trips_total", "counter", "Déclenchements du chien de garde.",
+                          lambda: self.trip_count, motor=name)
+        registry.register("watchdog_tripped", "gauge", "Chien de garde déclenché (sorties bloquées).",
+                          lambda: 1 if self.tripped else 0, motor=name)
+        registry.register("watchdog_stop_seconds", "histogram", "Détection -> écriture du PWM nul.",
+                          lambda: self.stop_histogram, motor=name)
+
+
+def measure_trip_latency(fault, setpoint=2000.0, settle=1.0, timeout=3.0, **watchdog_options):
+    """
+    Injecte un défaut sur un moteur simulé régulé et mesure le délai jusqu'au
+    PWM nul sur la carte.
+
+    Args:
+        fault: "loop" (boucle bloquée), "loop_error" (exception à chaque
+            période), "encoder" (fil coupé) ou "serial" (liaison bloquée 0,5 s).
+        setpoint: Consigne de la régulation avant le défaut (RPM).
+        settle: Durée de régulation avant l'injection (s).
+        timeout: Durée maximale d'attente de l'arrêt (s).
+        watchdog_options: Arguments de Watchdog.
+
+    Returns:
+        Un dictionnaire : délai défaut -> PWM nul sur la carte (s, None sans
+        arrêt), PWM sur la carte une fois le défaut passé, TripRecord et
+        Watchdog utilisé.
+    """
+    from Class.ClassMotor import Motor
+    from Class.ClassSimulatedBoard import SIMULATED_GAINS, open_board
+
+    board = open_board(True)
+    stalled = threading.Event()
+    broken = threading.Event()
+    try:
+        motor = Motor(board, 3, 12, 2, 7, 12)
+        motor.set_pid_parameters(*SIMULATED_GAINS)
+
+        def measure():
+            if stalled.is_set():
+                time.sleep(timeout + 1)
+            if broken.is_set():
+                raise RuntimeError("mesure indisponible")
+            return motor.estimate_speed()
+
+        watchdog = Watchdog(motor, **watchdog_options).start()
+        motor.start_control(measure, setpoint=setpoint)
+        time.sleep(settle)
+
+        injected = time.perf_counter()
+        if fault == "loop":
+            stalled.set()
+        elif fault == "loop_error":
+            broken.set()
+        elif fault == "encoder":
+            board.axes[0].encoder_connected = False
+        elif fault == "serial":
+            board.stall_link(0.5)
+        else:
+            raise ValueError(f"Défaut inconnu : {fault}")
+
+        stopped = None
+        while time.perf_counter() - injected < timeout:
+            if board.pin_values.get(3) == 0:
+                stopped = time.perf_counter() - injected
+                break
+            time.sleep(0.0002)
+        # L'écriture bloquée se termine avec la liaison : l'arrêt doit rester en place
+        while board.link_stalled():
+            time.sleep(0.001)
+        time.sleep(0.05)
+        watchdog.stop()
+        return {"board_stop": stopped, "board_final": board.pin_values.get(3),
+                "trip": watchdog.trips[-1] if watchdog.trips else None, "watchdog": watchdog}
+    finally:
+        stalled.clear()
+        board.shutdown()
+
+
+def main():
+    """
+    python -m Class.ClassWatchdog : latence d'arrêt pour chaque défaut simulé.
+
+    Une liaison bloquée doit être attribuée à la liaison série et la carte
+    doit être à 0 en moins d'une échéance de boucle, deux périodes de
+    surveillance et `stop_timeout` (code de sortie 1 sinon).
+    """
+    results = {fault: measure_trip_latency(fault) for fault in TRIP_REASONS}
+    print(f"{'défaut':<11} {'cause':<11} {'détection':>10} {'arrêt':>9} {'carte à 0':>10}")
+    for fault, result in results.items():
+        trip = result["trip"]
+        board_stop = result["board_stop"]
+        if trip is None:
+            print(f"{fault:<11} aucun déclenchement")
+            continue
+        print(f"{fault:<11} {trip.reason:<11} {trip.detection_delay * 1000:>8.1f}ms {trip.stop_latency * 1000:>7.2f}ms "
+              f"{board_stop * 1000 if board_stop is not None else float('nan'):>8.1f}ms")
+
+    serial = results["serial"]
+    watchdog = serial["watchdog"]
+    bound = watchdog.loop_timeout + 2 / watchdog.check_rate + watchdog.stop_timeout
+    trip = serial["trip"]
+    failures = []
+    if trip is None or trip.reason != "serial":
+        failures.append(f"cause {trip.reason if trip is not None else None} au lieu de serial")
+    if serial["board_stop"] is None or serial["board_stop"] > bound:
+        failures.append(f"carte à 0 après {serial['board_stop']} s (borne {bound * 1000:.0f} ms)")
+    if serial["board_final"] != 0:
+        failures.append(f"PWM {serial['board_final']} sur la carte après la fin du blocage")
+    if failures:
+        print(f"Erreur : liaison série bloquée : {' ; '.join(failures)}")
+        sys.exit(1)
+    print(f"Liaison série bloquée : carte à 0 en {serial['board_stop'] * 1000:.1f} ms (borne {bound * 1000:.0f} ms).")
+
+
+if __name__ == "__main__":
+    main()
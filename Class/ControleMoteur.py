@@ -1,6 +1,9 @@
-from telemetrix import telemetrix
+import sys
 import time
 
+from Class.ClassEncoderIngest import EncoderEventQueue
+from Class.ClassSimulatedBoard import open_board
+
 # Configuration des broches
 MOTOR_PWM_PIN = 3      # Broche PWM pour contrôler la vitesse du moteur
 MOTOR_DIR_PIN = 12      # Broche direction pour le sens du moteur
@@ -10,12 +13,15 @@ ENCODER_PIN_B = 7     # Broche de signal B de l'encodeur
 # Variables globales pour le comptage des impulsions
 encoder_count = 0
 
-def encoder_callback(data):
+# File des fronts du signal A : le callback ne fait qu'un ajout, le comptage se fait par lots
+encoder_events = EncoderEventQueue(ENCODER_PIN_A)
+encoder_callback = encoder_events.push
+
+def read_encoder_count(reset=False):
     """
-    Callback pour gérer les interruptions du signal A de l'encodeur.
+    Retourne le nombre de fronts du signal A depuis la dernière remise à zéro (lecture atomique).
     """
-    global encoder_count
-    encoder_count += 1  # Incrémenter le compteur à chaque front montant
+    return encoder_events.read(reset=reset) // 2  # 2 comptes par front sans canal B
 
 def initialize_motor_control(board, pwm_pin, dir_pin):
     """
@@ -63,35 +69,56 @@ def calculate_speed(count, time_interval, ticks_per_revolution=100, wheel_diamet
     speed = revolutions_per_second * (3.14159 * wheel_diameter)
     return speed
 
-def main():
+def main(simulated=None, interactive=False):
     """
     Programme principal pour contrôler le moteur et lire les impulsions.
+
+    Par défaut, un Motor sur les mêmes broches est piloté par le serveur de
+    commandes JSON (voir ClassMotorServer) ; l'invite de commandes reste
+    disponible avec --interactive.
+
+    Args:
+        simulated: True pour utiliser la carte simulée (voir open_board).
+        interactive: True pour l'invite de commandes au clavier.
     """
     global encoder_count
 
-    # Initialise la connexion à l'Arduino
+    # Initialise la connexion à l'Arduino (ou à la carte simulée)
     print("Connexion à l'Arduino...")
-    board = telemetrix.Telemetrix()
+    board = open_board(simulated)
 
     try:
+        if not interactive:
+            from Class.ClassMotorServer import serve_motor, server_options
+
+            # Le canal B n'est pas câblé sur ce montage. calculate_speed compte 100 fronts du signal A
+            # par tour ; Motor compte 2 par front sans canal B sur 4 x ticks_per_revolution comptes
+            # par tour, soit 2 x ticks_per_revolution fronts : 50 ticks donnent les mêmes 100 fronts.
+            serve_motor(board, dict(pwm_pin=MOTOR_PWM_PIN, dir_pin=MOTOR_DIR_PIN, encoder_pin_a=ENCODER_PIN_A,
+                                    encoder_pin_b=None, ticks_per_revolution=50), **server_options(sys.argv))
+            return
+
         # Initialisation des broches
         initialize_motor_control(board, MOTOR_PWM_PIN, MOTOR_DIR_PIN)
         initialize_encoder(board, ENCODER_PIN_A, ENCODER_PIN_B)
+        # L'invite bloque sur input() : la file des fronts est vidée en arrière-plan
+        encoder_events.start_draining()
 
         # Commandes utilisateur
         while True:
             command = input("Entrez 'start', 'stop', 'speed', ou 'quit' : ").strip().lower()
             if command == 'start':
-                encoder_count = 0  # Réinitialise le compteur
+                encoder_events.reset()  # Réinitialise le compteur
                 start_motor(board, MOTOR_PWM_PIN, MOTOR_DIR_PIN, speed=150)
             elif command == 'stop':
                 stop_motor(board, MOTOR_PWM_PIN, MOTOR_DIR_PIN)
             elif command == 'speed':
                 # Mesure de la vitesse pendant une période
-                encoder_count = 0  # Réinitialise le compteur
+                encoder_events.reset()  # Réinitialise le compteur
                 time_interval = 1  # Intervalle de mesure (secondes)
                 print("Mesure de la vitesse en cours...")
                 time.sleep(time_interval)
+                encoder_count = read_encoder_count()
                 speed = calculate_speed(encoder_count, time_interval)
                 print(f"Vitesse du moteur : {speed:.2f} m/s")
             elif command == 'quit':
@@ -101,8 +128,9 @@ def main():
                 print("Commande non reconnue. Essayez 'start', 'stop', 'speed', ou 'quit'.")
     finally:
         # Nettoyage et déconnexion
+        encoder_events.stop_draining()
         board.shutdown()
         print("Connexion à l'Arduino terminée.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(simulated=True if "--simulate" in sys.argv else None, interactive="--interactive" in sys.argv)
\ No newline at end of file
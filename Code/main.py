@@ -5,7 +5,9 @@ import Interface
 # Exécution de l'application
 from Interface.PidControllerInterfaceManuel import PIDControlApp
 
-app = QApplication(sys.argv)
-window = PIDControlApp()
-window.show()
-sys.exit(app.exec())
+# Garde nécessaire : le processus de contrôle (MotorProcess) peut réimporter ce module
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = PIDControlApp()
+    window.show()
+    sys.exit(app.exec())
@@ -0,0 +1,99 @@
+import time
+
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+
+from Class.ClassMetrics import Histogram
+
+
+class LiveChart:
+    def __init__(self, window=10.0, y_range=(0, 7000)):
+        """
+        Graphique temps réel à rendu incrémental.
+
+        Les axes, les titres, la légende et les objets Line2D sont créés une seule
+        fois ; chaque image ne fait que mettre à jour les données des courbes et
+        les redessiner par « blitting » au-dessus d'un fond mis en cache.
+
+        Args:
+            window: Durée affichée en secondes (l'axe X va de -window à 0).
+            y_range: Bornes de l'axe Y (RPM).
+        """
+        self.window = window
+        self.figure = Figure()
+        self.canvas = FigureCanvas(self.figure)
+        self.ax = self.figure.add_subplot()
+
+        self.ax.set_title("Motor Speed Over Time")
+        self.ax.set_xlabel("Time (s)")
+        self.ax.set_ylabel("Speed (RPM)")
+        self.ax.set_xlim(-window, 0)
+        self.ax.set_ylim(*y_range)
+
+        # Courbes animées : elles sont exclues du fond mis en cache
+        self.speed_line, = self.ax.plot([], [], label="Measured Speed (RPM)", color="blue", animated=True)
+        self.setpoint_line, = self.ax.plot([], [], label="Set Point (RPM)", color="orange",
+                                           linestyle="--", animated=True)
+        self.ax.legend(loc="upper right")
+        self.lines = [self.speed_line, self.setpoint_line]
+
+        self.frame_time = 0.0  # Durée moyenne d'une image (secondes)
+        self.frame_histogram = Histogram()
+        self.cpu_time = 0.0  # Temps CPU cumulé du rendu (secondes)
+        self._background = None
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        """
+        Après un rendu complet (premier affichage, redimensionnement), on met le
+        fond en cache puis on redessine les courbes par-dessus.
+        """
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        for line in self.lines:
+            self.ax.draw_artist(line)
+
+    def set_window(self, window):
+        """
+        Change la durée affichée ; le fond est recalculé au prochain rendu complet.
+        """
+        self.window = window
+        self.ax.set_xlim(-window, 0)
+        self._background = None
+
+    def register_metrics(self, registry):
+        """
+        Déclare la durée des images et le temps CPU du rendu dans un MetricsRegistry.
+        """
+        registry.register("chart_frame_seconds", "histogram", "Durée de rendu d'une image du graphique.",
+                          lambda: self.frame_histogram)
+        registry.register("cpu_seconds_total", "counter", "Temps CPU par sous-système.",
+                          lambda: self.cpu_time, subsystem="chart")
+
+    def update(self, times, speed, setpoint):
+        """
+        Met à jour les courbes et redessine uniquement les artistes modifiés.
+
+        Args:
+            times: Instants des échantillons relatifs au plus récent (<= 0).
+            speed: Vitesses mesurées (RPM).
+            setpoint: Consignes (RPM).
+        """
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        self.speed_line.set_data(times, speed)
+        self.setpoint_line.set_data(times, setpoint)
+
+        if self._background is None:
+            # Premier rendu complet : _on_draw mettra le fond en cache
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self._background)
+            for line in self.lines:
+                self.ax.draw_artist(line)
+            self.canvas.blit(self.figure.bbox)
+
+        elapsed = time.perf_counter() - start
+        self.cpu_time += time.thread_time() - cpu_start
+        self.frame_histogram.observe(elapsed)
+        self.frame_time = elapsed if self.frame_time == 0 else 0.9 * self.frame_time + 0.1 * elapsed
+        return elapsed
@@ -0,0 +1,363 @@
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+
+BENCHMARKS_DIRECTORY = "benchmarks"  # Un fichier JSON de résultats par exécution
+BENCHMARKS = ("encoder", "ingest_ceiling", "estimator", "loop", "telemetry", "chart", "startup")
+LOOP_RATES = (100, 500, 1000)
+RESULTS_VERSION = 1
+
+# Dégradation relative tolérée par groupe de mesures (les mesures temps réel sont plus bruitées)
+DEFAULT_TOLERANCE = 0.1
+TOLERANCES = {"loop": 0.5, "ingest_ceiling": 0.5, "chart": 0.25, "startup": 0.25}
+# Dégradation absolue tolérée quand la référence est nulle (dépassements 0 -> N)
+DEFAULT_ABSOLUTE_TOLERANCE = 0.0
+ABSOLUTE_TOLERANCES = {"loop": 2.0}
+
+
+def higher_is_better(name):
+    """
+    Sens d'amélioration d'une mesure d'après son unité (débits et fréquences : plus grand est meilleur).
+    """
+    return name.endswith("_per_s") or name.endswith("_fps")
+
+
+def _simulated_motor(realtime=False, **board_kwargs):
+    from Class.ClassMotor import Motor
+    from Class.ClassSimulatedBoard import SimulatedTelemetrix
+
+    board = SimulatedTelemetrix(realtime=realtime, **board_kwargs)
+    motor = Motor(board, pwm_pin=board.pwm_pin, dir_pin=board.dir_pin, encoder_pin_a=board.encoder_pin_a,
+                  encoder_pin_b=board.encoder_pin_b, ticks_per_revolution=board.ticks_per_revolution)
+    return board, motor
+
+
+def _quadrature_edges(motor, count, edge_period=1e-5):
+    # Fronts synthétiques en sens direct, tels que les fournit telemetrix
+    pin_a, pin_b = motor.encoder.pin_a, motor.encoder.pin_b
+    sequence = ((pin_a, 1), (pin_b, 1), (pin_a, 0), (pin_b, 0))
+    return [[2, sequence[i % 4][0], sequence[i % 4][1], i * edge_period] for i in range(count)]
+
+
+def bench_encoder(edges=200000, batch=500):
+    """
+    Débit de Motor.encoder_callback (mise en file) et du décodage par lots des fronts.
+    """
+    board, motor = _simulated_motor()
+    try:
+        data = _quadrature_edges(motor, edges)
+        callback, process = motor.encoder_callback, motor.encoder.process
+        push_time = process_time = 0.0
+        for start in range(0, edges, batch):
+            chunk = data[start:start + batch]
+            t0 = time.perf_counter()
+            for event in chunk:
+                callback(event)
+            t1 = time.perf_counter()
+            process()
+            process_time += time.perf_counter() - t1
+            push_time += t1 - t0
+        if motor.encoder.edges_total != edges:
+            raise RuntimeError(f"{motor.encoder.edges_total} fronts décodés sur {edges}")
+        return {"callback_edges_per_s": edges / push_time, "decode_edges_per_s": edges / process_time,
+                "ingest_edges_per_s": edges / (push_time + process_time)}
+    finally:
+        board.shutdown()
+
+
+def bench_ingest_ceiling():
+    """
+    Débit maximal de fronts ingérés sans perte par la file de l'encodeur
+    (producteur cadencé, débit augmenté par paliers de x1,5).
+    """
+    from Class.ClassEncoderIngest import measure_ingest_ceiling
+
+    result = measure_ingest_ceiling()
+    if result["edges_per_s"] == 0:
+        raise RuntimeError(f"Pertes dès le premier palier ({result['limit']})")
+    return {"edges_per_s": result["edges_per_s"]}
+
+
+def bench_estimator(samples=2000, rate_hz=500, pwm=150):
+    """
+    Coût par échantillon de Motor.calculate_speed et des estimateurs de vitesse
+    (fenêtre de comptage et observateurs), moteur simulé en temps virtuel à
+    vitesse constante.
+    """
+    from Class.ClassAutoTuner import PlantModel
+    from Class.ClassSpeedObserver import make_observer
+
+    board, motor = _simulated_motor()
+    try:
+        motor.start(pwm)
+        board.advance(1.0)  # Régime établi
+        period = 1.0 / rate_hz
+        model = PlantModel(board.model.gain, board.model.tau_mechanical, 0.005)
+        results = {}
+
+        start = time.perf_counter()
+        for i in range(samples):
+            motor.calculate_speed(i, period)
+        results["calculate_speed_us"] = (time.perf_counter() - start) / samples * 1e6
+
+        for name in (None, "alpha-beta", "kalman", "model-kalman"):
+            motor.set_observer(make_observer(name, motor.counts_per_revolution, model=model, rate_hz=rate_hz))
+            elapsed = 0.0
+            for _ in range(samples):
+                board.advance(period)
+                t0 = time.perf_counter()
+                motor.estimate_speed()
+                elapsed += time.perf_counter() - t0
+            results[f"{name or 'window'}_us".replace("-", "_")] = elapsed / samples * 1e6
+        motor.set_observer(None)
+        return results
+    finally:
+        motor.stop()
+        board.shutdown()
+
+
+def bench_loop(rates=LOOP_RATES, duration=1.0, setpoint=3000.0):
+    """
+    Gigue, écart maximal, dépassements et temps CPU par période de la boucle PID
+    à plusieurs fréquences, carte simulée en temps réel.
+    """
+    from Class.ClassSimulatedBoard import SIMULATED_GAINS
+
+    board, motor = _simulated_motor(realtime=True)
+    results = {}
+    try:
+        motor.set_pid_parameters(*SIMULATED_GAINS)
+        for rate in rates:
+            loop = motor.start_control(motor.estimate_speed, setpoint=setpoint, rate_hz=rate)
+            time.sleep(duration)
+            motor.stop_control()
+            stats = loop.stats()
+            results[f"{rate}hz_jitter_us"] = stats["jitter"] * 1e6
+            results[f"{rate}hz_max_deviation_us"] = stats["max_deviation"] * 1e6
+            results[f"{rate}hz_overruns"] = stats["overruns"]
+            results[f"{rate}hz_tick_cpu_us"] = loop.cpu_time / max(loop.tick_count, 1) * 1e6
+        return results
+    finally:
+        motor.stop()
+        board.shutdown()
+
+
+def bench_telemetry(capacity=100000, appends=50000, block=1000, window=5000, reads=2000):
+    """
+    Coût des ajouts (unitaires et par blocs) et des lectures du TelemetryBuffer.
+    """
+    from Class.ClassTelemetryBuffer import TelemetryBuffer
+
+    buffer = TelemetryBuffer(capacity)
+    values = np.random.default_rng(0).uniform(0, 7000, (len(buffer.channels), appends))
+    rows = values.T.tolist()
+    results = {}
+
+    start = time.perf_counter()
+    for row in rows:
+        buffer.append(*row)
+    results["append_us"] = (time.perf_counter() - start) / appends * 1e6
+
+    blocks = [values[:, i:i + block] for i in range(0, appends, block)]
+    start = time.perf_counter()
+    for data in blocks:
+        buffer.extend(data)
+    results["extend_ns_per_sample"] = (time.perf_counter() - start) / appends * 1e9
+
+    for name, read in (("view", lambda: buffer.arrays(window)), ("snapshot", lambda: buffer.snapshot(window)),
+                       ("latest", buffer.latest)):
+        start = time.perf_counter()
+        for _ in range(reads):
+            read()
+        results[f"{name}_us"] = (time.perf_counter() - start) / reads * 1e6
+    return results
+
+
+def bench_chart(duration=2.0):
+    """
+    Durée de rendu d'une image du graphique de PIDControlApp en régulation
+    (interface complète hors écran, processus neuf, carte simulée).
+    """
+    from Interface.StartupBenchmark import benchmark
+
+    samples = benchmark(1, simulated=True, chart_duration=duration)
+    if not samples["chart_frame"]:
+        raise RuntimeError("Aucune image rendue")
+    return {"frame_ms": samples["chart_frame"][0] * 1000, "refresh_fps": samples["chart_fps"][0]}
+
+
+def bench_startup():
+    """
+    Démarrage à froid de l'interface (processus neuf, carte simulée) : durées des phases.
+    """
+    from Interface.StartupBenchmark import benchmark
+
+    samples = benchmark(1, simulated=True)
+    if not samples["total"]:
+        raise RuntimeError("Démarrage sans mesure")
+    return {f"{phase}_ms": values[0] * 1000 for phase, values in samples.items() if values}
+
+
+BENCHMARK_FUNCTIONS = {"encoder": bench_encoder, "ingest_ceiling": bench_ingest_ceiling, "estimator": bench_estimator,
+                       "loop": bench_loop, "telemetry": bench_telemetry, "chart": bench_chart, "startup": bench_startup}
+
+
+def run_suite(names=BENCHMARKS, repeats=3):
+    """
+    Exécute les mesures choisies, chacune `repeats` fois ; la médiane est retenue.
+
+    Args:
+        names: Mesures à exécuter (voir BENCHMARKS).
+        repeats: Nombre de répétitions de chaque mesure.
+
+    Returns:
+        Dictionnaire des résultats (voir save_results) : environnement, par
+        mesure « groupe.nom », médiane, minimum, maximum et échantillons, et
+        les mesures en échec avec leur erreur.
+    """
+    samples = {}
+    failures = {}
+    for name in names:
+        function = BENCHMARK_FUNCTIONS[name]
+        for i in range(repeats):
+            start = time.perf_counter()
+            try:
+                values = function()
+            except Exception as e:
+                failures[name] = f"{type(e).__name__}: {e}"
+                print(f"Erreur dans la mesure {name} : {e}")
+                break
+            for metric, value in values.items():
+                samples.setdefault(f"{name}.{metric}", []).append(float(value))
+            print(f"{name} {i + 1}/{repeats} ({time.perf_counter() - start:.1f} s)")
+
+    metrics = {metric: {"median": statistics.median(values), "min": min(values), "max": max(values),
+                        "samples": values}
+               for metric, values in samples.items()}
+    return {"version": RESULTS_VERSION, "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "environment": {"python": platform.python_version(), "implementation": platform.python_implementation(),
+                            "platform": platform.platform(), "machine": platform.machine(),
+                            "cpus": os.cpu_count(), "numpy": np.__version__},
+            "repeats": repeats, "metrics": metrics, "failures": failures}
+
+
+def save_results(results, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=1)
+
+
+def load_results(path):
+    with open(path) as f:
+        results = json.load(f)
+    if results.get("version") != RESULTS_VERSION:
+        raise ValueError(f"Version de résultats non prise en charge : {results.get('version')}")
+    return results
+
+
+def compare_results(current, baseline, tolerance=None):
+    """
+    Compare deux exécutions sur les médianes des mesures communes.
+
+    Une mesure régresse si elle se dégrade (baisse d'un débit, hausse d'une
+    durée) de plus que la tolérance relative : celle passée en argument, sinon
+    celle de son groupe (TOLERANCES) ou DEFAULT_TOLERANCE. Une mesure nulle
+    dans la référence régresse si elle se dégrade de plus que la tolérance
+    absolue de son groupe (ABSOLUTE_TOLERANCES ou DEFAULT_ABSOLUTE_TOLERANCE).
+
+    Returns:
+        (lignes du rapport, liste des mesures en régression) ; les régressions
+        sont signalées par « ! ».
+    """
+    lines = ["Comparaison avec la référence " + baseline.get("created", "") + " :"]
+    regressions = []
+    for metric, entry in current["metrics"].items():
+        base = baseline["metrics"].get(metric)
+        if base is None:
+            continue
+        group = metric.split(".")[0]
+        old, new = base["median"], entry["median"]
+        if old == 0:
+            # Pas de variation relative possible : écart absolu
+            change = new - old
+            limit = ABSOLUTE_TOLERANCES.get(group, DEFAULT_ABSOLUTE_TOLERANCE)
+            description = f"{change:+.4g}"
+        else:
+            change = (new - old) / abs(old)
+            limit = tolerance if tolerance is not None else TOLERANCES.get(group, DEFAULT_TOLERANCE)
+            description = f"{change * 100:+.1f} %"
+        worse = -change if higher_is_better(metric) else change
+        flag = "!" if worse > limit else " "
+        if flag == "!":
+            regressions.append(metric)
+        lines.append(f"{flag} {metric:<36} {old:>12.4g} -> {new:<12.4g} ({description})")
+    # Mesures de la référence disparues des groupes exécutés (renommées ou en erreur)
+    groups = {metric.split(".")[0] for metric in current["metrics"]} | set(current.get("failures", {}))
+    missing = sorted(metric for metric in set(baseline["metrics"]) - set(current["metrics"])
+                     if metric.split(".")[0] in groups)
+    if missing:
+        lines.append(f"  Absentes de cette exécution : {', '.join(missing)}")
+    return lines, regressions
+
+
+def format_results(results):
+    lines = [f"{'mesure':<36} {'médiane':>12} {'min':>12} {'max':>12}"]
+    for metric, entry in results["metrics"].items():
+        lines.append(f"{metric:<36} {entry['median']:>12.4g} {entry['min']:>12.4g} {entry['max']:>12.4g}")
+    for name, error in results.get("failures", {}).items():
+        lines.append(f"{name:<36} en échec : {error}")
+    return lines
+
+
+def main():
+    """
+    python -m Interface.PerformanceBenchmark [mesure ...] [--repeats n] [--json fichier]
+    [--compare reference.json] [--tolerance 0.1]
+
+    Sans mesure nommée, toute la suite est exécutée (voir BENCHMARKS). Les
+    résultats sont enregistrés dans benchmarks/ (ou le fichier --json) ; avec
+    --compare, les régressions sont signalées. Le code de sortie vaut 1 en
+    cas de régression ou si une mesure a échoué.
+    """
+    args = sys.argv[1:]
+    options = {}
+    for option in ("--repeats", "--json", "--compare", "--tolerance"):
+        if option in args:
+            index = args.index(option)
+            options[option] = args[index + 1]
+            del args[index:index + 2]
+    unknown = [name for name in args if name not in BENCHMARKS]
+    if unknown:
+        print(f"Mesures inconnues : {', '.join(unknown)} (disponibles : {', '.join(BENCHMARKS)})")
+        sys.exit(2)
+
+    results = run_suite(args or BENCHMARKS, repeats=int(options.get("--repeats", 3)))
+    print("\n".join(format_results(results)))
+    path = options.get("--json") or os.path.join(BENCHMARKS_DIRECTORY, time.strftime("%Y%m%d_%H%M%S") + ".json")
+    save_results(results, path)
+    print(f"Résultats enregistrés dans {path}")
+
+    failed = False
+    if "--compare" in options:
+        tolerance = float(options["--tolerance"]) if "--tolerance" in options else None
+        lines, regressions = compare_results(results, load_results(options["--compare"]), tolerance)
+        print("\n".join(lines))
+        if regressions:
+            print(f"{len(regressions)} régression(s) : {', '.join(regressions)}")
+            failed = True
+    if results["failures"]:
+        print(f"{len(results['failures'])} mesure(s) en échec : {', '.join(results['failures'])}")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,130 @@
-from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                               QPushButton, QLabel, QDoubleSpinBox, QCheckBox, QSlider, QGroupBox)
-from PySide6.QtCore import Qt, QTimer
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-import matplotlib.pyplot as plt
-import numpy as np
 import time
 
-from telemetrix import telemetrix
+_IMPORT_START = time.perf_counter()
+
+from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
+                               QPushButton, QLabel, QDoubleSpinBox, QSpinBox, QCheckBox, QSlider, QGroupBox,
+                               QComboBox, QFileDialog)
+from PySide6.QtCore import Qt, QTimer, QEvent, Signal
+import os
+import threading
+
+# Les modules de calcul (NumPy, matplotlib, telemetrix et les classes qui en
+# dépendent) sont importés à leur première utilisation : la fenêtre s'affiche
+# sans attendre leur chargement ni la connexion à la carte.
+
+# Configuration du moteur piloté par l'interface
+MOTOR_CONFIG = dict(pwm_pin=3, dir_pin=12, encoder_pin_a=2, encoder_pin_b=7, ticks_per_revolution=12)
+# Moteurs de la carte, un canal chacun dans l'interface (voir ClassBoardManager.MOTOR_PINS)
+MOTOR_CONFIGS = [MOTOR_CONFIG]
+TELEMETRY_CAPACITY = 200000
+SESSIONS_DIRECTORY = "sessions"  # Dossier des sessions enregistrées
+WATCHDOG_LOG = "watchdog_trips.jsonl"  # Déclenchements du chien de garde (une ligne JSON chacun)
+
+# Phases du démarrage mesurées (durées en secondes, voir startup_finished)
+STARTUP_PHASES = ("imports", "window", "shown", "chart", "board", "motors", "total")
+IMPORT_TIME = time.perf_counter() - _IMPORT_START
+
+
+def open_channels(motor_configs, simulated=None, use_worker_process=False):
+    """
+    Connexion à la carte et création d'un canal par moteur (exécuté hors du thread de l'interface).
+
+    Returns:
+        (carte, BoardManager, canaux, durées) : carte et gestionnaire valent None
+        en mode processus séparé ; un canal est (nom, moteur, télémétrie,
+        acquisition) ; durées des phases "board" et "motors" en secondes.
+    """
+    start = time.perf_counter()
+    channels = []
+    if use_worker_process:
+        from Class.ClassMotorProcess import MotorProcess
 
-from Class.ClassMotor import Motor
+        # Carte, encodeur et boucle PID dans un autre processus ; télémétrie en mémoire partagée
+        motor = MotorProcess(motor_configs[0], capacity=TELEMETRY_CAPACITY, simulated=simulated).launch()
+        channels.append(("M1", motor, motor.telemetry, None))
+        elapsed = time.perf_counter() - start
+        return None, None, channels, {"board": elapsed, "motors": 0.0}
+
+    from Class.ClassBoardConnection import connect_board
+    from Class.ClassBoardManager import BoardManager
+    from Class.ClassSpeedAcquisition import SpeedAcquisition
+    from Class.ClassTelemetryBuffer import TelemetryBuffer
+    from Class.ClassWatchdog import Watchdog
+
+    board = connect_board(simulated)
+    connected = time.perf_counter()
+    try:
+        # Une seule connexion partagée par tous les moteurs (écritures groupées par période)
+        board_manager = BoardManager(board)
+        for config in motor_configs:
+            # Tampon de télémétrie partagé (interface, enregistreur et régulateur)
+            telemetry = TelemetryBuffer(capacity=TELEMETRY_CAPACITY)
+            motor = board_manager.add_motor(telemetry=telemetry, **config)
+
+            # Acquisition de la vitesse en arrière-plan (ne bloque plus la boucle Qt)
+            acquisition = SpeedAcquisition(motor, sample_rate=50)
+            acquisition.record_open_loop(telemetry)
+            acquisition.start()
+            # Arrêt forcé si la boucle, l'encodeur ou la liaison série ne répond plus
+            Watchdog(motor, log_path=WATCHDOG_LOG).start()
+            channels.append((motor.name, motor, telemetry, acquisition))
+    except Exception:
+        for _, motor, _, acquisition in channels:
+            motor.watchdog.stop()
+            acquisition.stop()
+        board.shutdown()
+        raise
+    return board, board_manager, channels, {"board": connected - start,
+                                            "motors": time.perf_counter() - connected}
 
 
 class PIDControlApp(QMainWindow):
+    # Résultat du réglage automatique, émis depuis le thread de l'essai
+    autotune_finished = Signal(object)
+    # Table de gains remplie par les essais à plusieurs vitesses (ou l'exception)
+    schedule_finished = Signal(object)
+    # Bilan (MoveResult) de chaque déplacement terminé en mode position
+    motion_complete = Signal(object)
+    # Résultat de open_channels (ou l'exception), émis depuis le thread de connexion
+    board_connected = Signal(object)
+    # Durées des phases du démarrage, émises une fois la carte connectée et le graphique créé
+    startup_finished = Signal(dict)
 
-    def __init__(self):
+    def __init__(self, simulated=None, use_worker_process=None, motor_configs=None):
+        """
+        Args:
+            simulated: True pour utiliser la carte simulée (voir open_board).
+            use_worker_process: True pour exécuter le moteur et la boucle PID dans un
+                processus séparé (MotorProcess). Si None, la variable d'environnement
+                MOTOR_WORKER_PROCESS décide (1, true ou yes).
+            motor_configs: Broches des moteurs partageant la carte, un canal par
+                moteur (MOTOR_CONFIGS si None). Le processus séparé ne pilote que le premier.
+        """
+        construction_start = time.perf_counter()
         super().__init__()
         self.setWindowTitle("PID Controller Interface")
         self.setGeometry(100, 100, 800, 600)
+        self.chart_window = 10.0  # Durée affichée sur le graphique (secondes)
 
-        # === Initialisation de la carte et du moteur ===
-        print("Connexion à l'Arduino...")
-        self.board = telemetrix.Telemetrix()
-        self.motor = Motor(
-            board=self.board,
-            pwm_pin=3,
-            dir_pin=12,
-            encoder_pin_a=2,
-            encoder_pin_b=7,
-            ticks_per_revolution=12
-        )
+        if use_worker_process is None:
+            use_worker_process = os.environ.get("MOTOR_WORKER_PROCESS", "").strip().lower() in ("1", "true", "yes")
+        self.simulated = simulated
+        self.use_worker_process = use_worker_process
+
+        # Durées des phases du démarrage (voir STARTUP_PHASES)
+        self._construction_start = construction_start
+        self.startup_times = {"imports": IMPORT_TIME}
+
+        # === Carte et moteurs : connectés en arrière-plan (voir connect_board) ===
+        # Un canal par moteur : (nom, moteur, télémétrie, acquisition)
+        self.motor_configs = motor_configs if motor_configs is not None else MOTOR_CONFIGS
+        self.channels = []
+        self.board = None
+        self.board_manager = None
+        self.motor = self.telemetry = self.acquisition = None
+        self._connect_thread = None
+        self._closing = False
 
         # Layout principal
         main_layout = QHBoxLayout()
@@ -37,6 +133,19 @@ class PIDControlApp(QMainWindow):
         control_panel = QWidget()
         control_layout = QVBoxLayout(control_panel)
 
+        # État de la connexion à la carte
+        self.connection_label = QLabel("Carte : non connectée")
+        self.reconnect_button = QPushButton("Reconnect")
+        self.reconnect_button.setEnabled(False)
+        control_layout.addWidget(self.connection_label)
+        control_layout.addWidget(self.reconnect_button)
+
+        # Canal (moteur) piloté par les commandes et affiché sur le graphique
+        self.channel_combo = QComboBox()
+        self.channel_combo.setEnabled(False)
+        control_layout.addWidget(QLabel("Motor channel"))
+        control_layout.addWidget(self.channel_combo)
+
         # Boutons Start/Stop
         self.start_button = QPushButton("Start")
         self.stop_button = QPushButton("Stop")
@@ -56,11 +165,61 @@ class PIDControlApp(QMainWindow):
         control_layout.addWidget(self.set_point_slider)
         control_layout.addWidget(self.set_point_value)
 
+        # Profil appliqué aux changements de consigne (au lieu d'un échelon)
+        trajectory_group = QGroupBox("Setpoint Profile")
+        trajectory_layout = QVBoxLayout(trajectory_group)
+        self.profile_combo = QComboBox()
+        self.profile_combo.addItems(["Step", "Ramp", "S-curve"])
+        self.acceleration_input = QDoubleSpinBox()
+        self.acceleration_input.setRange(100.0, 1e6)
+        self.acceleration_input.setValue(20000.0)
+        self.acceleration_input.setSuffix(" RPM/s")
+        self.feedforward_checkbox = QCheckBox("Velocity feedforward")
+        self.feedforward_checkbox.setEnabled(False)  # Disponible après identification (Auto-tune)
+        self.load_profile_button = QPushButton("Play Profile (CSV)")
+        trajectory_layout.addWidget(self.profile_combo)
+        trajectory_layout.addWidget(self.acceleration_input)
+        trajectory_layout.addWidget(self.feedforward_checkbox)
+        trajectory_layout.addWidget(self.load_profile_button)
+        control_layout.addWidget(trajectory_group)
+        self.plant_model = None  # Dernier modèle identifié du moteur
+
+        # Mode position : boucle de position en cascade sur la boucle de vitesse (voir ClassPositionControl)
+        position_group = QGroupBox("Position Mode")
+        position_layout = QVBoxLayout(position_group)
+        self.position_input = QDoubleSpinBox()
+        self.position_input.setRange(-10000.0, 10000.0)
+        self.position_input.setDecimals(2)
+        self.position_input.setSuffix(" tr")
+        self.position_window_input = QSpinBox()
+        self.position_window_input.setRange(1, 1000)
+        self.position_window_input.setValue(4)
+        self.position_window_input.setPrefix("± ")
+        self.position_window_input.setSuffix(" comptes")
+        self.move_button = QPushButton("Move")
+        self.position_label = QLabel("Position : -")
+        self.position_label.setWordWrap(True)
+        position_layout.addWidget(self.position_input)
+        position_layout.addWidget(QLabel("In-position window"))
+        position_layout.addWidget(self.position_window_input)
+        position_layout.addWidget(self.move_button)
+        position_layout.addWidget(self.position_label)
+        control_layout.addWidget(position_group)
+        self._move_count = 0  # Déplacements déjà signalés (motion_complete)
+
         # Zone d'affichage de la vitesse mesurée
         self.actual_speed_label = QLabel("Actual Speed (RPM):")
         self.actual_speed_display = QLabel("0.0")
         control_layout.addWidget(self.actual_speed_label)
         control_layout.addWidget(self.actual_speed_display)
+        self.acceleration_display = QLabel("Acceleration (RPM/s): -")
+        control_layout.addWidget(self.acceleration_display)
+
+        # Estimation de la vitesse : fenêtre de comptage ou observateur
+        self.observer_combo = QComboBox()
+        self.observer_combo.addItems(["M/T window", "Alpha-beta", "Kalman", "Model Kalman"])
+        control_layout.addWidget(QLabel("Speed estimator"))
+        control_layout.addWidget(self.observer_combo)
 
         # Paramètres PID
         pid_group = QGroupBox("PID Parameters")
@@ -72,6 +231,10 @@ class PIDControlApp(QMainWindow):
         self.proportional_input = QDoubleSpinBox()
         self.integral_input = QDoubleSpinBox()
         self.derivative_input = QDoubleSpinBox()
+        for spin_box in (self.proportional_input, self.integral_input, self.derivative_input):
+            spin_box.setDecimals(4)
+            spin_box.setMaximum(1000.0)
+            spin_box.setSingleStep(0.01)
 
         pid_layout.addWidget(self.proportional_checkbox)
         pid_layout.addWidget(self.proportional_input)
@@ -80,8 +243,91 @@ class PIDControlApp(QMainWindow):
         pid_layout.addWidget(self.derivative_checkbox)
         pid_layout.addWidget(self.derivative_input)
 
+        # Meilleurs gains d'un balayage (classement CSV de ClassGainSweep)
+        self.load_sweep_button = QPushButton("Load Sweep")
+        self.sweep_combo = QComboBox()
+        self.sweep_combo.setEnabled(False)
+        pid_layout.addWidget(self.load_sweep_button)
+        pid_layout.addWidget(self.sweep_combo)
+        self.sweep_gains = []
+
+        # Table de gains indexée par la consigne (voir ClassGainSchedule)
+        self.schedule_checkbox = QCheckBox("Gain scheduling")
+        self.schedule_checkbox.setEnabled(False)  # Disponible après chargement ou remplissage d'une table
+        self.load_schedule_button = QPushButton("Load Schedule")
+        self.schedule_label = QLabel("")
+        self.schedule_label.setWordWrap(True)
+        pid_layout.addWidget(self.schedule_checkbox)
+        pid_layout.addWidget(self.load_schedule_button)
+        pid_layout.addWidget(self.schedule_label)
+        self.gain_schedule = None  # Dernière table chargée ou remplie
+
         control_layout.addWidget(pid_group)
 
+        # Réglage automatique : essai indiciel ou au relais puis règle de réglage
+        autotune_group = QGroupBox("Auto-tune")
+        autotune_layout = QVBoxLayout(autotune_group)
+        self.autotune_method_combo = QComboBox()
+        self.autotune_method_combo.addItems(["Step", "Relay", "Frequency"])
+        self.autotune_rule_combo = QComboBox()
+        self.autotune_rule_combo.addItems(["IMC", "Ziegler-Nichols", "Cohen-Coon"])
+        self.autotune_simulated_checkbox = QCheckBox("Simulated plant")
+        self.autotune_button = QPushButton("Auto-tune")
+        self.tune_schedule_button = QPushButton("Tune Schedule")
+        self.autotune_label = QLabel("")
+        if use_worker_process:
+            # Le processus de contrôle ne donne pas accès au moteur : essai sur modèle uniquement
+            self.autotune_simulated_checkbox.setChecked(True)
+            self.autotune_simulated_checkbox.setEnabled(False)
+        autotune_layout.addWidget(self.autotune_method_combo)
+        autotune_layout.addWidget(self.autotune_rule_combo)
+        autotune_layout.addWidget(self.autotune_simulated_checkbox)
+        autotune_layout.addWidget(self.autotune_button)
+        autotune_layout.addWidget(self.tune_schedule_button)
+        autotune_layout.addWidget(self.autotune_label)
+        control_layout.addWidget(autotune_group)
+        self._autotune_thread = None
+
+        # Période et gigue mesurées de la boucle de régulation
+        self.loop_stats_label = QLabel("Boucle PID : arrêtée")
+        control_layout.addWidget(self.loop_stats_label)
+
+        # Chien de garde du moteur affiché : état, dernier déclenchement et réarmement
+        watchdog_layout = QHBoxLayout()
+        self.watchdog_label = QLabel("Chien de garde : -")
+        self.watchdog_label.setWordWrap(True)
+        self.watchdog_reset_button = QPushButton("Reset watchdog")
+        self.watchdog_reset_button.setEnabled(False)
+        self.watchdog_reset_button.clicked.connect(self.reset_watchdog)
+        watchdog_layout.addWidget(self.watchdog_label, 1)
+        watchdog_layout.addWidget(self.watchdog_reset_button)
+        control_layout.addLayout(watchdog_layout)
+
+        # Débit et latence de la liaison série partagée
+        self.bus_stats_label = QLabel("Liaison série : -")
+        control_layout.addWidget(self.bus_stats_label)
+        # Écritures envoyées et évitées par l'étage de sortie du moteur affiché
+        self.output_stats_label = QLabel("Sorties : -")
+        control_layout.addWidget(self.output_stats_label)
+
+        # Temps de rendu d'une image du graphique
+        self.frame_time_label = QLabel("Image : -")
+        control_layout.addWidget(self.frame_time_label)
+
+        # Mesures des chemins critiques (voir ClassMetrics), rafraîchies deux fois par seconde
+        diagnostics_group = QGroupBox("Diagnostics")
+        diagnostics_layout = QVBoxLayout(diagnostics_group)
+        self.diagnostics_label = QLabel("-")
+        self.diagnostics_label.setStyleSheet("font-family: monospace")
+        diagnostics_layout.addWidget(self.diagnostics_label)
+        control_layout.addWidget(diagnostics_group)
+        self.metrics = None
+        self.metrics_exporter = None
+        self._diagnostics_previous = None
+        self.diagnostics_timer = QTimer(self)
+        self.diagnostics_timer.setInterval(500)
+        self.diagnostics_timer.timeout.connect(self.update_diagnostics)
+
         # Bouton de mise à jour du graphique
         self.update_chart_button = QPushButton("Update Chart")
         control_layout.addWidget(self.update_chart_button)
@@ -90,13 +336,53 @@ class PIDControlApp(QMainWindow):
         self.measure_speed_button = QPushButton("Measure Speed")
         control_layout.addWidget(self.measure_speed_button)
 
+        # Enregistrement de la session sur disque
+        self.record_button = QPushButton("Record")
+        self.record_button.setCheckable(True)
+        self.record_label = QLabel("")
+        control_layout.addWidget(self.record_button)
+        control_layout.addWidget(self.record_label)
+
+        # Relecture d'une session enregistrée
+        replay_group = QGroupBox("Replay")
+        replay_layout = QVBoxLayout(replay_group)
+        self.open_session_button = QPushButton("Open Session")
+        self.play_button = QPushButton("Play")
+        self.play_button.setCheckable(True)
+        self.live_button = QPushButton("Live")
+        self.replay_speed_combo = QComboBox()  # Vitesses ajoutées avec le graphique (create_chart)
+        self.decimation_combo = QComboBox()  # Modes de décimation ajoutés avec le graphique
+        self.replay_slider = QSlider(Qt.Horizontal)
+        self.replay_slider.setRange(0, 1000)
+        self.window_input = QDoubleSpinBox()
+        self.window_input.setRange(0.5, 1e6)
+        self.window_input.setValue(self.chart_window)
+        self.window_input.setSuffix(" s")
+        self.replay_label = QLabel("Live")
+
+        replay_layout.addWidget(self.open_session_button)
+        replay_layout.addWidget(self.play_button)
+        replay_layout.addWidget(self.replay_speed_combo)
+        replay_layout.addWidget(self.decimation_combo)
+        replay_layout.addWidget(self.replay_slider)
+        replay_layout.addWidget(QLabel("Chart window"))
+        replay_layout.addWidget(self.window_input)
+        replay_layout.addWidget(self.live_button)
+        replay_layout.addWidget(self.replay_label)
+        control_layout.addWidget(replay_group)
+        self.replay = None
+        self._replay_clock = time.perf_counter()
+
         # Ajouter le panneau de contrôle au layout principal
         main_layout.addWidget(control_panel)
 
-        # Graphique
-        self.figure, self.ax = plt.subplots()
-        self.canvas = FigureCanvas(self.figure)
-        main_layout.addWidget(self.canvas)
+        # Graphique : créé juste après le premier affichage (import de matplotlib)
+        self.chart = None
+        self.chart_placeholder = QLabel("Chargement du graphique...")
+        self.chart_placeholder.setAlignment(Qt.AlignCenter)
+        self.chart_placeholder.setMinimumWidth(500)
+        main_layout.addWidget(self.chart_placeholder, 1)
+        self.main_layout = main_layout
 
         # Création du widget central et configuration
         central_widget = QWidget()
@@ -107,6 +393,43 @@ class PIDControlApp(QMainWindow):
         self.start_button.clicked.connect(self.start_motor)
         self.stop_button.clicked.connect(self.stop_motor)
         self.update_chart_button.clicked.connect(self.update_chart_real_time)
+        self.record_button.toggled.connect(self.toggle_recording)
+        self.open_session_button.clicked.connect(self.open_session)
+        self.play_button.toggled.connect(self.toggle_replay)
+        self.live_button.clicked.connect(self.go_live)
+        self.replay_speed_combo.currentIndexChanged.connect(self.update_replay_speed)
+        self.decimation_combo.currentIndexChanged.connect(self.update_decimation)
+        self.replay_slider.valueChanged.connect(self.seek_replay)
+        self.window_input.valueChanged.connect(self.update_chart_window)
+        self.autotune_button.clicked.connect(self.start_autotune)
+        self.autotune_finished.connect(self.apply_autotune_result)
+        self.load_sweep_button.clicked.connect(self.load_sweep)
+        self.sweep_combo.activated.connect(self.apply_sweep_gains)
+        self.schedule_checkbox.toggled.connect(self.update_gain_schedule)
+        self.load_schedule_button.clicked.connect(self.load_gain_schedule)
+        self.tune_schedule_button.clicked.connect(self.start_schedule_tuning)
+        self.schedule_finished.connect(self.apply_schedule_result)
+        self.feedforward_checkbox.toggled.connect(self.update_feedforward)
+        self.load_profile_button.clicked.connect(self.play_profile)
+        self.move_button.clicked.connect(self.move_to_position)
+        self.motion_complete.connect(self.show_move_result)
+        self.observer_combo.currentIndexChanged.connect(self.update_observer)
+        self.channel_combo.currentIndexChanged.connect(self.select_channel)
+        self.reconnect_button.clicked.connect(self.connect_board)
+        self.board_connected.connect(self.attach_channels)
+
+        # Commandes inutilisables tant que la carte n'est pas connectée
+        self.motor_widgets = [self.start_button, self.stop_button, self.set_point_slider, trajectory_group,
+                              position_group, self.observer_combo, pid_group, autotune_group,
+                              self.update_chart_button, self.measure_speed_button, self.record_button]
+        for widget in self.motor_widgets:
+            widget.setEnabled(False)
+
+        # Mise à jour des gains PID en direct
+        for checkbox in (self.proportional_checkbox, self.integral_checkbox, self.derivative_checkbox):
+            checkbox.toggled.connect(self.update_pid_parameters)
+        for spin_box in (self.proportional_input, self.integral_input, self.derivative_input):
+            spin_box.valueChanged.connect(self.update_pid_parameters)
 
         ###############################################################################################
         ##########################################PAS REGARGER#########################################
@@ -121,27 +444,267 @@ class PIDControlApp(QMainWindow):
         ###############################################################################################
         ##########################################REGARGER#########################################
         ###############################################################################################
-        # Initialisation du QTimer pour mettre à jour le graphique toutes les 1 seconde
+        # Initialisation du QTimer : rafraîchissement limité à la fréquence de l'écran
+        refresh_rate = self.screen().refreshRate() if self.screen() is not None else 0
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_chart_real_time)  # Connecte le timer à la méthode de mise à jour
-        self.timer.start(100)  # Intervalle de 100 ms (0.1 seconde)
+        self.timer.setInterval(max(1, round(1000 / (refresh_rate if refresh_rate > 0 else 60))))
 
-        # Données fictives pour le graphique
-        self.time_data = []  # On va commencer sans données
-        self.speed_data = []  # Liste vide pour stocker les vitesses
+        self.startup_times["window"] = time.perf_counter() - construction_start
+        self.connect_board()
+
+    def connect_board(self):
+        """Lance la connexion à la carte et la création des moteurs dans un thread."""
+        if self._connect_thread is not None and self._connect_thread.is_alive():
+            return
+        self.connection_label.setText("Carte : connexion en cours...")
+        self.reconnect_button.setEnabled(False)
+        print("Connexion à l'Arduino...")
+
+        def run():
+            try:
+                self.board_connected.emit(open_channels(self.motor_configs, self.simulated,
+                                                        self.use_worker_process))
+            except Exception as e:
+                self.board_connected.emit(e)
+
+        self._connect_thread = threading.Thread(target=run, name="BoardConnection", daemon=True)
+        self._connect_thread.start()
+
+    def attach_channels(self, result):
+        """Installe les moteurs une fois la carte connectée (appelé dans le thread de l'interface)."""
+        if isinstance(result, Exception):
+            self.connection_label.setText(f"Carte : échec de la connexion ({result})")
+            self.reconnect_button.setEnabled(True)
+            print(f"Erreur lors de la connexion à la carte : {result}")
+            return
+        board, board_manager, channels, durations = result
+        if self._closing:
+            # Fenêtre fermée pendant la connexion : on libère tout de suite la carte
+            self.close_channels(channels, board)
+            return
+        self.board, self.board_manager, self.channels = board, board_manager, channels
+        self.startup_times.update(durations)
+
+        self.channel_combo.blockSignals(True)
+        self.channel_combo.clear()
+        self.channel_combo.addItems([f"{name} (PWM {self.motor_configs[i]['pwm_pin']})"
+                                     for i, (name, _, _, _) in enumerate(channels)])
+        self.channel_combo.blockSignals(False)
+        _, self.motor, self.telemetry, self.acquisition = channels[0]
+        self.channel_combo.setEnabled(len(channels) > 1)
+        for widget in self.motor_widgets:
+            widget.setEnabled(True)
+
+        if self.use_worker_process:
+            self.connection_label.setText("Carte : connectée (processus de contrôle)")
+        else:
+            port = getattr(getattr(board, "serial_port", None), "port", None)
+            self.connection_label.setText(f"Carte : connectée ({port or 'simulée'})")
+        self.start_metrics()
+        self.finish_startup()
+
+    def start_metrics(self):
+        """Déclare les mesures des canaux, de la liaison série et du graphique, puis démarre l'export."""
+        from Class.ClassMetrics import MetricsRegistry, exporter_from_env
+
+        self.metrics = MetricsRegistry()
+        for name, motor, _, acquisition in self.channels:
+            if acquisition is not None:  # En processus séparé, le fils exporte ses propres mesures
+                motor.register_metrics(self.metrics, name)
+                acquisition.register_metrics(self.metrics, name)
+                motor.watchdog.register_metrics(self.metrics, name)
+        if self.board_manager is not None:
+            self.board_manager.register_metrics(self.metrics)
+        if self.chart is not None:
+            self.chart.register_metrics(self.metrics)
+        self.metrics_exporter = exporter_from_env(self.metrics)
+        self._diagnostics_previous = None
+        self.diagnostics_timer.start()
+
+    def create_chart(self):
+        """Crée le graphique (import de matplotlib) une fois la fenêtre affichée."""
+        if self.chart is not None:
+            return
+        start = time.perf_counter()
+        from Class.ClassSessionReplay import DECIMATION_MODES, REPLAY_SPEEDS
+        from Interface.LiveChart import LiveChart
+
+        self.chart = LiveChart(window=self.chart_window)
+        self.figure, self.ax, self.canvas = self.chart.figure, self.chart.ax, self.chart.canvas
+        self.main_layout.replaceWidget(self.chart_placeholder, self.canvas)
+        self.chart_placeholder.deleteLater()
+        self.replay_speed_combo.addItems([f"{speed}x" for speed in REPLAY_SPEEDS])
+        self.decimation_combo.addItems(list(DECIMATION_MODES))
+        if self.metrics is not None:
+            self.chart.register_metrics(self.metrics)
+        self.startup_times["chart"] = time.perf_counter() - start
+        self.finish_startup()
+
+    def finish_startup(self):
+        """Affiche et émet les durées du démarrage quand toutes les phases sont terminées."""
+        times = self.startup_times
+        if "total" in times or any(phase not in times for phase in STARTUP_PHASES[:-1]):
+            return
+        times["total"] = time.perf_counter() - _IMPORT_START
+        print("Démarrage : " + ", ".join(f"{phase} {times[phase] * 1000:.0f} ms" for phase in STARTUP_PHASES))
+        self.startup_finished.emit(dict(times))
 
     def update_set_point(self, value):
-        """Met à jour la valeur de consigne affichée."""
+        """Met à jour la valeur de consigne affichée.
+
+        En régulation, le changement suit le profil choisi (rampe ou courbe en S)
+        depuis la consigne courante de la boucle.
+        """
         self.set_point_value.setText(str(value))
+        self.update_schedule_label(value)
+        loop = self.motor.control_loop
+        profile = self.profile_combo.currentText()
+        if loop is None or profile == "Step":
+            self.motor.set_setpoint(value)
+            return
+        from Class.ClassTrajectory import ramp, s_curve
+
+        current = getattr(loop, "setpoint", self.motor.setpoint)
+        acceleration = self.acceleration_input.value()
+        if profile == "Ramp":
+            trajectory = ramp(current, value, acceleration)
+        else:
+            trajectory = s_curve(current, value, acceleration, 10 * acceleration)
+        self.motor.follow_trajectory(trajectory)
+
+    def select_channel(self, index):
+        """Passe les commandes et le graphique sur un autre moteur et affiche ses réglages."""
+        _, self.motor, self.telemetry, self.acquisition = self.channels[index]
+        pid = self.motor.pid
+        for checkbox, spin_box, value in ((self.proportional_checkbox, self.proportional_input, pid.kp),
+                                          (self.integral_checkbox, self.integral_input, pid.ki),
+                                          (self.derivative_checkbox, self.derivative_input, pid.kd)):
+            for widget in (checkbox, spin_box):
+                widget.blockSignals(True)
+            spin_box.setValue(value)
+            checkbox.setChecked(value > 0)
+            for widget in (checkbox, spin_box):
+                widget.blockSignals(False)
+        self.set_point_slider.blockSignals(True)
+        self.set_point_slider.setValue(round(self.motor.setpoint))
+        self.set_point_slider.blockSignals(False)
+        self.set_point_value.setText(str(self.set_point_slider.value()))
+        self.observer_combo.blockSignals(True)
+        self.observer_combo.setCurrentIndex(getattr(self.motor, "observer_index", 0))
+        self.observer_combo.blockSignals(False)
+        self.schedule_checkbox.blockSignals(True)
+        self.schedule_checkbox.setChecked(self.motor.gain_schedule is not None)
+        self.schedule_checkbox.blockSignals(False)
+        self.update_schedule_label()
+        self._move_count = self.motor.move_count
+        self.update_position_status()
+
+    def update_observer(self, index):
+        """Installe l'observateur de vitesse choisi ; l'acquisition passe alors à 200 Hz (5 ms)."""
+        from Class.ClassSpeedObserver import OBSERVERS, make_observer
+
+        name = None if index == 0 else OBSERVERS[index - 1]
+        try:
+            observer = make_observer(name, 4 * self.motor.ticks_per_revolution, model=self.plant_model)
+        except ValueError as e:
+            print(f"Erreur : {e}")
+            self.observer_combo.setCurrentIndex(0)
+            return
+        self.motor.set_observer(observer)
+        self.motor.observer_index = index
+        sample_rate = 200 if observer is not None else 50
+        if self.acquisition is not None:
+            self.acquisition.set_sample_rate(sample_rate)
+        else:
+            self.motor.set_sample_rate(sample_rate)
+
+    def update_feedforward(self, checked):
+        """Active la commande anticipée calculée à partir du modèle identifié."""
+        from Class.ClassTrajectory import VelocityFeedforward
+
+        feedforward = None
+        if checked and self.plant_model is not None:
+            feedforward = VelocityFeedforward.from_model(self.plant_model)
+        self.motor.set_feedforward(feedforward)
+
+    def play_profile(self):
+        """Fait suivre à la boucle un profil de consigne lu dans un fichier CSV (temps, RPM)."""
+        path, _ = QFileDialog.getOpenFileName(self, "Play Profile", "", "CSV (*.csv)")
+        if not path:
+            return
+        try:
+            if self.motor.control_loop is None:
+                print("Démarrez la régulation (PID) avant de lancer un profil.")
+                return
+            from Class.ClassTrajectory import load_csv
+
+            trajectory = load_csv(path)
+            self.motor.follow_trajectory(trajectory)
+            print(f"Profil de {trajectory.duration:.1f} s lancé depuis {path}")
+        except Exception as e:
+            print(f"Erreur lors du chargement du profil : {e}")
 
     def start_motor(self):
-        """Logique pour démarrer le moteur."""
+        """Logique pour démarrer le moteur.
+
+        Si au moins un terme PID (ou la table de gains) est activé, la vitesse est
+        régulée autour de la consigne du slider ; sinon le moteur démarre en
+        boucle ouverte.
+        """
         try:
-            self.motor.start()
+            if self.pid_enabled():
+                self.update_pid_parameters()
+                measure = None
+                if self.acquisition is not None:
+                    # La boucle estime la vitesse à chaque période (fronts horodatés ou
+                    # observateur) : latest_speed n'est rafraîchie qu'à 10-50 Hz
+                    measure = self.motor.estimate_speed
+                self.motor.start_control(measure, setpoint=self.set_point_slider.value())
+            else:
+                self.motor.start()
             print("Moteur démarré")
         except Exception as e:
             print(f"Erreur : {e}")
 
+    def move_to_position(self):
+        """Déplace le moteur à la position saisie (tours), en démarrant le mode position si besoin.
+
+        Le mode position utilise les gains PID saisis pour sa boucle de vitesse ;
+        la fenêtre de position est prise en compte au démarrage du mode.
+        """
+        try:
+            if not self.pid_enabled():
+                print("Activez au moins un terme PID (boucle de vitesse) avant le mode position.")
+                return
+            if not self.motor.position_mode:
+                self.update_pid_parameters()
+                self.motor.start_position_control(rate_hz=1000, window=self.position_window_input.value())
+            self.motor.move_to(self.motor.revolutions_to_counts(self.position_input.value()))
+        except Exception as e:
+            print(f"Erreur : {e}")
+
+    def update_position_status(self):
+        """Affiche la position continue et émet motion_complete pour chaque nouveau déplacement terminé."""
+        motor = self.motor
+        counts_per_revolution = 4 * motor.ticks_per_revolution
+        text = f"Position : {motor.position_counts / counts_per_revolution:.2f} tr"
+        result = motor.last_move
+        if result is not None:
+            text += (f" | dernier déplacement : {result.move_time * 1000:.0f} ms, "
+                     f"stabilisation {result.settle_time * 1000:.0f} ms, écart {result.error} "
+                     f"(dépassement {result.overshoot}) comptes")
+        self.position_label.setText(text)
+        count = motor.move_count
+        if count != self._move_count:
+            self._move_count = count
+            self.motion_complete.emit(result)
+
+    def show_move_result(self, result):
+        """Affiche le bilan d'un déplacement terminé."""
+        print(f"En position : {result.position} comptes (cible {result.target}), "
+              f"déplacement {result.move_time * 1000:.0f} ms, stabilisation {result.settle_time * 1000:.0f} ms")
+
     def stop_motor(self):
         """Logique pour arrêter le moteur."""
         try:
@@ -150,6 +713,371 @@ class PIDControlApp(QMainWindow):
         except Exception as e:
             print(f"Erreur : {e}")
 
+    def toggle_recording(self, checked):
+        """Démarre ou arrête l'enregistrement de la session dans SESSIONS_DIRECTORY."""
+        try:
+            if checked:
+                directory = os.path.join(SESSIONS_DIRECTORY, time.strftime("%Y%m%d_%H%M%S"))
+                self.motor.start_recording(directory)
+                self.record_label.setText(directory)
+            else:
+                self.motor.stop_recording()
+                self.record_label.setText("")
+        except Exception as e:
+            print(f"Erreur lors de l'enregistrement : {e}")
+
+    def open_session(self):
+        """Ouvre une session enregistrée et passe le graphique en mode relecture."""
+        directory = QFileDialog.getExistingDirectory(self, "Open Session", SESSIONS_DIRECTORY)
+        if not directory:
+            return
+        try:
+            from Class.ClassSessionReplay import REPLAY_SPEEDS, SessionReplay
+
+            self.replay = SessionReplay(directory)
+            self.replay.speed = REPLAY_SPEEDS[self.replay_speed_combo.currentIndex()]
+            self.update_decimation(self.decimation_combo.currentIndex())
+            self._replay_clock = time.perf_counter()
+            self.replay_slider.setValue(0)
+            print(f"Session ouverte : {self.replay.samples} échantillons "
+                  f"en {self.replay.load_time * 1000:.0f} ms")
+        except Exception as e:
+            print(f"Erreur lors de l'ouverture de la session : {e}")
+
+    def toggle_replay(self, checked):
+        """Lance ou met en pause la relecture."""
+        if self.replay is not None:
+            self.replay.playing = checked
+            self._replay_clock = time.perf_counter()
+
+    def go_live(self):
+        """Quitte la relecture et revient à l'affichage en direct."""
+        self.replay = None
+        self.play_button.setChecked(False)
+        self.replay_label.setText("Live")
+
+    def update_replay_speed(self, index):
+        if self.replay is not None:
+            from Class.ClassSessionReplay import REPLAY_SPEEDS
+
+            self.replay.speed = REPLAY_SPEEDS[index]
+
+    def update_decimation(self, index):
+        """Choisit la décimation de la relecture (enveloppe min/max ou LTTB)."""
+        if self.replay is not None and index >= 0:
+            from Class.ClassSessionReplay import DECIMATION_MODES
+
+            self.replay.decimation = DECIMATION_MODES[index]
+
+    def seek_replay(self, value):
+        """Déplace le curseur de relecture selon la position du slider."""
+        if self.replay is not None:
+            self.replay.seek(value / self.replay_slider.maximum())
+
+    def update_chart_window(self, value):
+        """Change la durée affichée (zoom) en direct comme en relecture."""
+        self.chart_window = value
+        if self.chart is not None:
+            self.chart.set_window(value)
+
+    def update_frame_time_label(self):
+        """Affiche le temps de rendu moyen d'une image du graphique."""
+        frame_time = self.chart.frame_time
+        self.frame_time_label.setText(f"Image : {frame_time * 1000:.2f} ms "
+                                      f"(max {1 / frame_time if frame_time > 0 else 0:.0f} fps)")
+
+    def update_replay_chart(self):
+        """Fait avancer la relecture et affiche la fenêtre courante au niveau de détail adapté."""
+        now = time.perf_counter()
+        self.replay.advance(now - self._replay_clock)
+        self._replay_clock = now
+        if not self.replay.playing and self.play_button.isChecked():
+            self.play_button.setChecked(False)
+
+        self.replay_slider.blockSignals(True)
+        self.replay_slider.setValue(round(self.replay.position() * self.replay_slider.maximum()))
+        self.replay_slider.blockSignals(False)
+
+        data = self.replay.window(self.chart_window, max_points=2 * max(self.canvas.width(), 500))
+        times, speed = data["rpm"]
+        self.chart.update(times, speed, data["setpoint"][1])
+        self.update_frame_time_label()
+        self.replay_label.setText(f"Replay {self.replay.cursor - self.replay.t_start:.1f} / "
+                                  f"{self.replay.duration:.1f} s ({self.replay.speed}x)")
+
+    def start_autotune(self):
+        """Lance le réglage automatique dans un thread (l'essai dure plusieurs secondes)."""
+        if self._autotune_thread is not None and self._autotune_thread.is_alive():
+            return
+        from Class.ClassAutoTuner import TUNING_RULES, AutoTuner, simulated_tuner
+
+        method = self.autotune_method_combo.currentText().lower()
+        rule = TUNING_RULES[self.autotune_rule_combo.currentIndex()]
+        if self.autotune_simulated_checkbox.isChecked():
+            tuner = simulated_tuner()
+        else:
+            self.motor.stop_control()
+            tuner = AutoTuner(self.motor, measure=self.acquisition.latest_speed,
+                              sample_rate=self.acquisition.sample_rate)
+
+        def run():
+            try:
+                self.autotune_finished.emit(tuner.tune(method, rule))
+            except Exception as e:
+                self.autotune_finished.emit(e)
+
+        self.autotune_button.setEnabled(False)
+        self.start_button.setEnabled(False)
+        self.autotune_label.setText(f"Essai en cours ({method})...")
+        self._autotune_thread = threading.Thread(target=run, name="AutoTune", daemon=True)
+        self._autotune_thread.start()
+
+    def apply_autotune_result(self, result):
+        """Reporte les gains calculés dans les champs PID (appelé dans le thread de l'interface)."""
+        self.autotune_button.setEnabled(True)
+        self.start_button.setEnabled(True)
+        if isinstance(result, Exception):
+            self.autotune_label.setText("Échec du réglage")
+            print(f"Erreur lors du réglage automatique : {result}")
+            return
+        model = result.model
+        self.autotune_label.setText(f"K={model.gain:.2f}, tau={model.time_constant * 1000:.0f} ms, "
+                                    f"retard={model.dead_time * 1000:.0f} ms")
+        self.plant_model = model
+        self.feedforward_checkbox.setEnabled(True)
+        self.update_feedforward(self.feedforward_checkbox.isChecked())
+        self.set_pid_inputs(result.kp, result.ki, result.kd)
+
+    def start_schedule_tuning(self):
+        """Remplit une table de gains par des essais indiciels à plusieurs vitesses (dans un thread)."""
+        if self._autotune_thread is not None and self._autotune_thread.is_alive():
+            return
+        from Class.ClassAutoTuner import TUNING_RULES, AutoTuner, simulated_tuner
+        from Class.ClassGainSchedule import tune_schedule
+
+        rule = TUNING_RULES[self.autotune_rule_combo.currentIndex()]
+        if self.autotune_simulated_checkbox.isChecked():
+            tuner = simulated_tuner()
+        else:
+            self.motor.stop_control()
+            tuner = AutoTuner(self.motor, measure=self.acquisition.latest_speed,
+                              sample_rate=self.acquisition.sample_rate)
+
+        def run():
+            try:
+                self.schedule_finished.emit(tune_schedule(tuner, rule=rule)[0])
+            except Exception as e:
+                self.schedule_finished.emit(e)
+
+        self.autotune_button.setEnabled(False)
+        self.tune_schedule_button.setEnabled(False)
+        self.start_button.setEnabled(False)
+        self.autotune_label.setText("Essais à plusieurs vitesses en cours...")
+        self._autotune_thread = threading.Thread(target=run, name="ScheduleTune", daemon=True)
+        self._autotune_thread.start()
+
+    def apply_schedule_result(self, result):
+        """Enregistre la table remplie par les essais et la propose (appelé dans le thread de l'interface)."""
+        from Class.ClassGainSchedule import GAIN_SCHEDULE
+
+        self.autotune_button.setEnabled(True)
+        self.tune_schedule_button.setEnabled(True)
+        self.start_button.setEnabled(True)
+        if isinstance(result, Exception):
+            self.autotune_label.setText("Échec du remplissage de la table")
+            print(f"Erreur lors du remplissage de la table de gains : {result}")
+            return
+        try:
+            result.save(GAIN_SCHEDULE)
+            self.autotune_label.setText(f"Table de {len(result)} points enregistrée dans {GAIN_SCHEDULE}")
+        except OSError as e:
+            print(f"Erreur lors de l'enregistrement de la table de gains : {e}")
+        self.set_gain_schedule(result)
+
+    def load_gain_schedule(self):
+        """Charge une table de gains enregistrée (CSV rpm, kp, ki, kd)."""
+        from Class.ClassGainSchedule import GAIN_SCHEDULE, GainSchedule
+
+        path, _ = QFileDialog.getOpenFileName(self, "Load Schedule", GAIN_SCHEDULE, "CSV (*.csv)")
+        if not path:
+            return
+        try:
+            self.set_gain_schedule(GainSchedule.load(path))
+        except Exception as e:
+            print(f"Erreur lors du chargement de la table de gains : {e}")
+
+    def set_gain_schedule(self, schedule):
+        """Propose une nouvelle table ; elle remplace aussitôt la table active du moteur."""
+        self.gain_schedule = schedule
+        self.schedule_checkbox.setEnabled(True)
+        if self.schedule_checkbox.isChecked():
+            self.update_gain_schedule(True)
+        else:
+            self.update_schedule_label()
+
+    def update_gain_schedule(self, checked):
+        """Active la table de gains sur le moteur (sinon retour aux gains des champs PID)."""
+        self.motor.set_gain_schedule(self.gain_schedule if checked else None)
+        self.update_schedule_label()
+
+    def update_schedule_label(self, setpoint=None):
+        """Affiche les gains de la table à la consigne courante."""
+        schedule = self.motor.gain_schedule if self.motor is not None else None
+        if schedule is None:
+            self.schedule_label.setText("" if self.gain_schedule is None else
+                                        f"Table de {len(self.gain_schedule)} points (inactive)")
+            return
+        setpoint = self.motor.setpoint if setpoint is None else setpoint
+        kp, ki, kd = schedule.gains(setpoint)
+        self.schedule_label.setText(f"{setpoint:.0f} RPM : P={kp:.4f}, I={ki:.4f}, D={kd:.4f}")
+
+    def load_sweep(self):
+        """Charge le classement d'un balayage de gains et propose les meilleurs jeux."""
+        from Class.ClassGainSweep import SWEEPS_DIRECTORY, load_ranked_gains
+
+        path, _ = QFileDialog.getOpenFileName(self, "Load Sweep", SWEEPS_DIRECTORY, "CSV (*.csv)")
+        if not path:
+            return
+        try:
+            self.sweep_gains = load_ranked_gains(path)
+            self.sweep_combo.clear()
+            self.sweep_combo.addItems([f"P={g['kp']:.4f} I={g['ki']:.4f} D={g['kd']:.4f} "
+                                       f"(ITAE {g['itae']:.3g}, dép. {g['overshoot']:.1f} %)"
+                                       for g in self.sweep_gains])
+            self.sweep_combo.setEnabled(bool(self.sweep_gains))
+            if self.sweep_gains:
+                self.apply_sweep_gains(0)
+        except Exception as e:
+            print(f"Erreur lors du chargement du balayage : {e}")
+
+    def apply_sweep_gains(self, index):
+        """Reporte le jeu de gains choisi dans les champs PID."""
+        if 0 <= index < len(self.sweep_gains):
+            gains = self.sweep_gains[index]
+            self.set_pid_inputs(gains["kp"], gains["ki"], gains["kd"])
+
+    def set_pid_inputs(self, kp, ki, kd):
+        """Remplit les champs PID, coche les termes non nuls et applique les gains."""
+        for checkbox, spin_box, value in ((self.proportional_checkbox, self.proportional_input, kp),
+                                          (self.integral_checkbox, self.integral_input, ki),
+                                          (self.derivative_checkbox, self.derivative_input, kd)):
+            spin_box.setValue(value)
+            checkbox.setChecked(value > 0)
+        self.update_pid_parameters()
+
+    def pid_enabled(self):
+        """Indique si au moins un terme du PID, ou la table de gains, est activé."""
+        return (self.proportional_checkbox.isChecked() or self.integral_checkbox.isChecked()
+                or self.derivative_checkbox.isChecked() or self.schedule_checkbox.isChecked())
+
+    def update_loop_stats(self):
+        """Affiche la période et la gigue mesurées de la boucle de régulation."""
+        loop = self.motor.control_loop
+        if loop is None:
+            self.loop_stats_label.setText("Boucle PID : arrêtée")
+            return
+        stats = loop.stats()
+        self.loop_stats_label.setText(
+            f"Boucle PID : {stats['mean_period'] * 1000:.2f} ms "
+            f"(cible {stats['target_period'] * 1000:.2f} ms), "
+            f"gigue {stats['jitter'] * 1e6:.0f} µs, dépassements {stats['overruns']}")
+
+    def update_watchdog_status(self):
+        """Affiche l'état du chien de garde du moteur et active le réarmement après un déclenchement."""
+        watchdog = self.motor.watchdog
+        if watchdog is None:
+            return
+        if not watchdog.tripped:
+            self.watchdog_label.setText(f"Chien de garde : armé ({watchdog.trip_count} déclenchement(s))")
+            self.watchdog_label.setStyleSheet("")
+            self.watchdog_reset_button.setEnabled(False)
+            return
+        text = "Chien de garde : DÉCLENCHÉ, PWM forcé à 0"
+        if watchdog.trips:
+            trip = watchdog.trips[-1]
+            text += f" ({trip.reason} : {trip.detail}, arrêt en {trip.stop_latency * 1000:.2f} ms)"
+        self.watchdog_label.setText(text)
+        self.watchdog_label.setStyleSheet("color: red")
+        self.watchdog_reset_button.setEnabled(True)
+
+    def reset_watchdog(self):
+        """Réarme le chien de garde (les commandes du moteur sont de nouveau transmises)."""
+        try:
+            self.motor.watchdog.reset()
+            self.update_watchdog_status()
+        except Exception as e:
+            print(f"Erreur lors du réarmement du chien de garde : {e}")
+
+    def update_bus_stats(self):
+        """Affiche le débit, l'occupation et la latence d'écriture de la liaison série partagée."""
+        output = self.motor.output.stats()
+        self.output_stats_label.setText(
+            f"Sorties : {output['sent']} envoyées, {output['suppressed']} inchangées, "
+            f"{output['coalesced']} regroupées, {output['cancelled']} abandonnées "
+            f"({output['saved_ratio'] * 100:.0f} % évitées)")
+        if self.board_manager is None:
+            return
+        stats = self.board_manager.stats()
+        self.bus_stats_label.setText(
+            f"Liaison série : {stats['motors']} moteur(s), {stats['bytes_per_second']:.0f} o/s "
+            f"({stats['utilisation'] * 100:.0f} %), {stats['commands_per_write']:.1f} cmd/écriture, "
+            f"latence {stats['mean_latency'] * 1e6:.0f} µs")
+
+    def update_diagnostics(self):
+        """Affiche les mesures des chemins critiques ; débits et quantiles portent sur le dernier intervalle."""
+        from Class.ClassMetrics import difference, snapshot_quantile
+
+        now = time.perf_counter()
+        current = self.metrics.snapshot()
+        previous_time, previous = self._diagnostics_previous or (None, {})
+        self._diagnostics_previous = (now, current)
+        if previous_time is None or now <= previous_time:
+            return
+        elapsed = now - previous_time
+        name = next((name for name, motor, _, _ in self.channels if motor is self.motor), None)
+
+        def delta(metric, **labels):
+            key = (metric, tuple(sorted(labels.items())))
+            return difference(current[key], previous.get(key)) if key in current else None
+
+        def gauge(metric, scale=1.0, unit="", **labels):
+            value = current.get((metric, tuple(sorted(labels.items()))))
+            return "-" if value is None else f"{value * scale:.0f}{unit}"
+
+        def quantiles(metric, scale, unit, **labels):
+            histogram = delta(metric, **labels)
+            if histogram is None or histogram.count == 0:
+                return "-"
+            return (f"p50 {snapshot_quantile(histogram, 0.5) * scale:.3g} {unit}, "
+                    f"p99 {snapshot_quantile(histogram, 0.99) * scale:.3g} {unit}")
+
+        def cpu(subsystem, **labels):
+            value = delta("cpu_seconds_total", subsystem=subsystem, **labels)
+            return "-" if value is None else f"{value / elapsed * 100:.1f} %"
+
+        edges = delta("encoder_edges_total", motor=name)
+        dropped = delta("encoder_dropped_edges_total", motor=name)
+        serial = "serial_write_latency_seconds" if self.board_manager is not None else "output_write_latency_seconds"
+        serial_labels = {} if self.board_manager is not None else {"motor": name}
+        if self.metrics_exporter is None:
+            export = "désactivé (MOTOR_METRICS_PORT / MOTOR_METRICS_FILE)"
+        else:
+            export = ", ".join(target for target in (self.metrics_exporter.url, self.metrics_exporter.path) if target)
+        if self.use_worker_process:
+            export += " ; moteur : processus de contrôle (port + 1, *.control)"
+
+        self.diagnostics_label.setText("\n".join([
+            f"Encodeur : {'-' if edges is None else f'{edges / elapsed:.0f}'} fronts/s, "
+            f"{'-' if dropped is None else dropped} perdus, file {gauge('encoder_queue_depth', motor=name)}",
+            f"Boucle : {quantiles('loop_period_seconds', 1000, 'ms', motor=name)}, "
+            f"gigue {gauge('loop_jitter_seconds', 1e6, ' µs', motor=name)}",
+            f"Écritures : {quantiles(serial, 1e6, 'µs', **serial_labels)}, "
+            f"en attente {gauge('output_pending_writes', motor=name)}",
+            f"Image : {quantiles('chart_frame_seconds', 1000, 'ms')}",
+            f"CPU : contrôle {cpu('control', motor=name)}, encodeur {cpu('encoder', motor=name)}, "
+            f"acquisition {cpu('acquisition', motor=name)}, série {cpu('serial')}, graphique {cpu('chart')}",
+            f"Export : {export}"]))
+
     def update_pid_parameters(self):
         """Met à jour les paramètres PID du moteur en fonction des valeurs saisies et des cases cochées."""
         try:
@@ -205,31 +1133,93 @@ class PIDControlApp(QMainWindow):
     def update_chart_real_time(self):
         """Met à jour le graphique avec les données de vitesse réelle en temps réel."""
         try:
-            # Mesurer la vitesse réelle du moteur
-            measured_speed = self.motor.measure_speed(measurement_time=0.1)  # Mesure rapide sur 100 ms
-
-            # Temps écoulé
-            current_time = self.time_data[-1] + 0.1 if self.time_data else 0
-
-            # Ajouter les données au graphique
-            self.time_data.append(current_time)
-            self.speed_data.append(measured_speed)
-
-            # Limiter les données à 100 points pour ne pas saturer le graphique
-            if len(self.time_data) > 100:
-                self.time_data = self.time_data[1:]
-                self.speed_data = self.speed_data[1:]
-
-            # Mettre à jour le graphique
-            self.ax.clear()
-            self.ax.plot(self.time_data, self.speed_data, label="Measured Speed (RPM)", color="blue")
-            self.ax.set_title("Motor Speed Over Time")
-            self.ax.set_xlabel("Time (s)")
-            self.ax.set_ylabel("Speed (RPM)")
-            self.ax.set_ylim(0, 7000)  # Adapter à la plage de vitesses
-            self.ax.legend()
-            self.canvas.draw()
+            # Pas de rendu si la fenêtre n'est pas visible
+            if not self.isVisible() or self.isMinimized() or self.chart is None:
+                return
+
+            if self.replay is not None:
+                self.update_replay_chart()
+                return
+
+            # Dernier échantillon de la télémétrie (locale ou en mémoire partagée)
+            if self.telemetry is None:
+                return
+            self.update_watchdog_status()
+            latest = self.telemetry.latest()
+            if latest is None:
+                return
+            measured_speed = latest["rpm"]
+            self.actual_speed_display.setText(f"{measured_speed:.1f}")
+            if self.observer_combo.currentIndex() > 0:
+                self.acceleration_display.setText(
+                    f"Acceleration (RPM/s): {self.motor.acceleration_estimate:.0f}")
+            self.update_loop_stats()
+            self.update_bus_stats()
+            self.update_position_status()
+
+            # Vues sans copie sur la fenêtre de temps affichée
+            data = self.telemetry.arrays()
+            times = data["time"]
+            if len(times) == 0:
+                return
+            first = times.searchsorted(times[-1] - self.chart_window)
+
+            # Mise à jour incrémentale des courbes (temps relatif au dernier échantillon)
+            self.chart.update(times[first:] - times[-1], data["rpm"][first:], data["setpoint"][first:])
+            self.update_frame_time_label()
 
         except Exception as e:
             print(f"Erreur lors de la mise à jour du graphique : {e}")
 
+    def showEvent(self, event):
+        """Reprend le rafraîchissement du graphique quand la fenêtre est affichée."""
+        self.timer.start()
+        super().showEvent(event)
+        if "shown" not in self.startup_times:
+            # Premier affichage : le graphique est créé au tour suivant de la boucle Qt
+            self.startup_times["shown"] = time.perf_counter() - self._construction_start
+            QTimer.singleShot(0, self.create_chart)
+
+    def hideEvent(self, event):
+        """Suspend le rafraîchissement du graphique quand la fenêtre est masquée."""
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def changeEvent(self, event):
+        """Suspend le rendu lorsque la fenêtre est réduite."""
+        if event.type() == QEvent.WindowStateChange:
+            if self.isMinimized():
+                self.timer.stop()
+            elif self.isVisible():
+                self.timer.start()
+        super().changeEvent(event)
+
+    def closeEvent(self, event):
+        """Arrête l'acquisition (ou le processus de contrôle) avant la fermeture de la fenêtre."""
+        self._closing = True
+        self.diagnostics_timer.stop()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+            self.metrics_exporter = None
+        self.close_channels(self.channels, self.board)
+        self.board = None
+        super().closeEvent(event)
+
+    @staticmethod
+    def close_channels(channels, board=None):
+        """Arrête les moteurs et leur acquisition (et la carte si elle est donnée)."""
+        for _, motor, _, acquisition in channels:
+            if acquisition is not None:
+                # PWM à 0 avant d'arrêter le chien de garde : plus rien ne couperait la sortie ensuite
+                try:
+                    motor.stop()
+                except Exception as e:
+                    print(f"Erreur lors de l'arrêt du moteur {motor.name} : {e}")
+                if motor.watchdog is not None:
+                    motor.watchdog.stop()
+                motor.stop_recording()
+                acquisition.stop()
+            else:
+                motor.close()
+        if board is not None:
+            board.shutdown()
@@ -0,0 +1,135 @@
+import time
+
+_PROCESS_START = time.perf_counter()
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Phases mesurées : création de QApplication puis phases de PIDControlApp (STARTUP_PHASES)
+BENCHMARK_PHASES = ("qt", "imports", "window", "shown", "chart", "board", "motors", "total")
+# Rendu du graphique en régulation : durée moyenne d'une image (s) et images par seconde
+CHART_FIELDS = ("chart_frame", "chart_fps")
+
+
+def run_child(simulated=True, chart_duration=0.0):
+    """
+    Un démarrage complet de l'interface (dans un processus neuf), puis écriture
+    des durées des phases en JSON sur la sortie standard.
+
+    Si `chart_duration` est positif, le moteur est ensuite régulé à 3000 RPM
+    pendant cette durée et le temps de rendu des images du graphique est ajouté
+    aux mesures (CHART_FIELDS).
+    """
+    from PySide6.QtCore import QTimer
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication(sys.argv[:1])
+    qt_time = time.perf_counter() - _PROCESS_START
+    from Interface.PidControllerInterfaceManuel import PIDControlApp
+
+    window = PIDControlApp(simulated=simulated)
+    results = {}
+
+    def close():
+        window.close()
+        app.quit()
+
+    def chart_finished(start):
+        histogram = window.chart.frame_histogram
+        if histogram.count:
+            results.update(chart_frame=histogram.sum / histogram.count,
+                           chart_fps=histogram.count / (time.perf_counter() - start))
+        close()
+
+    def finished(times):
+        results.update(times, qt=qt_time, total=time.perf_counter() - _PROCESS_START)
+        if chart_duration <= 0 or window.chart is None:
+            close()
+            return
+        from Class.ClassSimulatedBoard import SIMULATED_GAINS
+
+        window.set_pid_inputs(*SIMULATED_GAINS)
+        window.set_point_slider.setValue(3000)
+        window.start_motor()
+        window.chart.frame_histogram.reset()
+        start = time.perf_counter()
+        QTimer.singleShot(round(chart_duration * 1000), lambda: chart_finished(start))
+
+    window.startup_finished.connect(finished)
+    QTimer.singleShot(60000, app.quit)  # Garde-fou si la carte ne répond pas
+    window.show()
+    app.exec()
+    print("STARTUP " + json.dumps(results), flush=True)
+
+
+def benchmark(runs=5, simulated=True, offscreen=True, chart_duration=0.0):
+    """
+    Mesure le démarrage à froid de l'interface sur plusieurs processus.
+
+    Args:
+        runs: Nombre de démarrages.
+        simulated: True pour la carte simulée.
+        offscreen: True pour ne pas afficher les fenêtres (plateforme Qt offscreen).
+        chart_duration: Durée de régulation après chaque démarrage pour mesurer
+            le rendu du graphique (0 : démarrage seul).
+
+    Returns:
+        Dictionnaire phase -> liste des durées (secondes), plus CHART_FIELDS si
+        le rendu est mesuré.
+    """
+    env = dict(os.environ)
+    if offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    command = [sys.executable, "-m", "Interface.StartupBenchmark", "--child"]
+    if simulated:
+        command.append("--simulate")
+    fields = BENCHMARK_PHASES
+    if chart_duration > 0:
+        command += ["--chart", str(chart_duration)]
+        fields += CHART_FIELDS
+    samples = {field: [] for field in fields}
+    for i in range(runs):
+        output = subprocess.run(command, env=env, capture_output=True, text=True, timeout=120).stdout
+        lines = [line for line in output.splitlines() if line.startswith("STARTUP ")]
+        if not lines:
+            print(f"Erreur : démarrage {i + 1} sans mesure")
+            continue
+        times = json.loads(lines[-1][len("STARTUP "):])
+        for field in fields:
+            if field in times:
+                samples[field].append(times[field])
+    return samples
+
+
+def main():
+    """
+    python -m Interface.StartupBenchmark [runs] [--simulate] [--visible] [--json fichier]
+    """
+    args = sys.argv[1:]
+    if "--child" in args:
+        chart_duration = float(args[args.index("--chart") + 1]) if "--chart" in args else 0.0
+        run_child(simulated=True if "--simulate" in args else None, chart_duration=chart_duration)
+        return
+    path = None
+    if "--json" in args:
+        index = args.index("--json")
+        path = args[index + 1]
+        del args[index:index + 2]
+    runs = next((int(arg) for arg in args if arg.isdigit()), 5)
+    samples = benchmark(runs, simulated=True if "--simulate" in args else None, offscreen="--visible" not in args)
+
+    print(f"{'phase':<8} {'médiane':>10} {'min':>10} {'max':>10}")
+    for phase, values in samples.items():
+        if values:
+            print(f"{phase:<8} {statistics.median(values) * 1000:>8.0f}ms {min(values) * 1000:>8.0f}ms "
+                  f"{max(values) * 1000:>8.0f}ms")
+    if path is not None:
+        with open(path, "w") as f:
+            json.dump(samples, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()